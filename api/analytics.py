@@ -0,0 +1,69 @@
+import argparse
+import json
+import sys
+import time
+
+from orchestrators.analytics import analytics_store, index_batch_results
+
+# —————————————————————————————
+# Portfolio queries over the cross-SOP analytics index
+#   python -m api.analytics steps --sector Retail --priority High --keyword inventory --max-payback 3
+#   python -m api.analytics savings --by tenant
+#   python -m api.analytics ingest batch_results.jsonl
+#   python -m api.analytics sql "SELECT role, COUNT(*) AS n FROM step_facts GROUP BY role"
+# —————————————————————————————
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query analysed SOP reports without re-running agents.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    steps = commands.add_parser("steps", help="Steps matching all the given filters, highest savings first")
+    steps.add_argument("--sector")
+    steps.add_argument("--tenant")
+    steps.add_argument("--priority", choices=["High", "Medium", "Low"])
+    steps.add_argument("--role")
+    steps.add_argument("--keyword", help="Text contained in the step")
+    steps.add_argument("--max-payback", type=float, help="Payback period in months, at most")
+    steps.add_argument("--min-savings", type=float, help="Monthly savings in SGD, at least")
+    steps.add_argument("--limit", type=int, default=100)
+
+    savings = commands.add_parser("savings", help="Total monthly savings per tenant or sector")
+    savings.add_argument("--by", choices=["tenant", "sector"], default="tenant")
+    savings.add_argument("--sector")
+
+    ingest = commands.add_parser("ingest", help="Index the reports of BatchRunner JSONL output files")
+    ingest.add_argument("results", nargs="+")
+
+    sql = commands.add_parser("sql", help="Read-only SQL over the reports / step_facts tables")
+    sql.add_argument("query")
+
+    commands.add_parser("stats", help="Number of indexed reports and steps")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    if args.command == "steps":
+        result = analytics_store.find_steps(
+            sector=args.sector,
+            tenant=args.tenant,
+            priority=args.priority,
+            role=args.role,
+            keyword=args.keyword,
+            max_payback_months=args.max_payback,
+            min_savings=args.min_savings,
+            limit=args.limit,
+        )
+    elif args.command == "savings":
+        result = analytics_store.savings_by(args.by, sector=args.sector)
+    elif args.command == "ingest":
+        result = {path: index_batch_results(analytics_store, path) for path in args.results}
+    elif args.command == "sql":
+        result = analytics_store.query(args.query)
+    else:
+        result = analytics_store.stats()
+    print(json.dumps(result, indent=2))
+    print(json.dumps({"elapsed_ms": round((time.perf_counter() - start) * 1000, 2)}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
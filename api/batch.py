@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import json
+
+from orchestrators.analytics import analytics_store
+from orchestrators.batch_runner import BatchRunner, load_jobs, run_orchestrator
+from orchestrators.output_schemas import output_stats
+from tools.llm_cache import MODES as LLM_CACHE_MODES, llm_cache
+from tools.step_library import MODES as STEP_LIBRARY_MODES, step_library
+from tools.tracing import tracer
+
+
+def parse_rate_limits(values):
+    # "stage=calls_per_second", e.g. --rate-limit orchestrator=2
+    limits = {}
+    for value in values or []:
+        stage, rate = value.split("=", 1)
+        limits[stage] = float(rate)
+    return limits
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analyse a batch of SOP files.")
+    parser.add_argument("source", help="Directory of SOP files or a .json/.jsonl manifest")
+    parser.add_argument("--output", default="batch_results.jsonl", help="JSONL results file")
+    parser.add_argument("--sector", default="Retail", help="Default sector")
+    parser.add_argument("--business-context", help="JSON file with the default business context")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate-limit", action="append", help="Per-stage limit as stage=calls_per_second")
+    parser.add_argument("--mode", choices=["orchestrator", "fast", "incremental"], default="orchestrator",
+                        help="LLM orchestrator, the code-driven fast-path pipeline, or the fast path "
+                             "re-using stored runs of earlier SOP versions")
+    parser.add_argument("--trace-out", help="Append per-span JSON trace records to this JSONL file")
+    parser.add_argument("--resume", action="store_true", help="Skip SOPs already completed in --output")
+    parser.add_argument("--no-analytics", action="store_true",
+                        help="Don't add the reports to the cross-SOP analytics index")
+    parser.add_argument("--llm-cache", choices=LLM_CACHE_MODES, default=llm_cache.mode,
+                        help="Sub-agent response cache: use, refresh (re-call and overwrite) or bypass")
+    parser.add_argument("--step-library", choices=STEP_LIBRARY_MODES,
+                        help="Step library (fast/incremental): use, refresh (re-ask the agents and overwrite) "
+                             "or off; defaults to refresh with --llm-cache refresh")
+    args = parser.parse_args()
+
+    business_context = None
+    if args.business_context:
+        with open(args.business_context, "r", encoding="utf-8") as fh:
+            business_context = json.load(fh)
+
+    if args.trace_out:
+        tracer.export_path = args.trace_out
+    llm_cache.mode = args.llm_cache
+    # Re-calling the agents must not be short-circuited by answers learned from them
+    step_library.mode = args.step_library or ("refresh" if args.llm_cache == "refresh" else step_library.mode)
+
+    jobs = load_jobs(args.source, sector=args.sector, business_context=business_context)
+    if args.mode == "fast":
+        from orchestrators.fast_pipeline import run_fast_pipeline as analyse
+    elif args.mode == "incremental":
+        from orchestrators.incremental import run_incremental_pipeline as analyse
+    else:
+        analyse = run_orchestrator
+    runner = BatchRunner(
+        analyse,
+        concurrency=args.concurrency,
+        rate_limits=parse_rate_limits(args.rate_limit),
+        analytics=None if args.no_analytics else analytics_store,
+    )
+    summary = asyncio.run(runner.run(jobs, args.output, resume=args.resume))
+    if args.mode != "orchestrator":
+        summary["llm_cache"] = llm_cache.stats()
+        if step_library.enabled:
+            summary["step_library"] = step_library.stats()
+    summary["outputs"] = output_stats.stats()
+    print(json.dumps(summary, indent=2))
+
+if __name__ == "__main__":
+    main()
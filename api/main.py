@@ -1,5 +1,10 @@
 import json
 from orchestrators.business_process_agent import business_process_agent
+from orchestrators.agent_calls import record_usage
+from orchestrators.analytics import analytics_store
+from orchestrators.output_schemas import check_output
+from orchestrators.pipeline_types import tenant_of
+from tools.tracing import payload_size, tracer
 import sys; print(sys.path)
 
 def main():
@@ -17,8 +22,24 @@ def main():
         "compliance": ["ACRA","IRAS"]
       }
     }
-    result = business_process_agent.run(params)
-    print(json.dumps(result.content, indent=2))
+    with tracer.run(file_path=sop_file, sector=params["sector"]) as trace:
+        with tracer.span(business_process_agent.name, kind="agent", model=business_process_agent.model) as span:
+            result = business_process_agent.run(params)
+            span.set(input_bytes=payload_size(params), output_bytes=payload_size(result.content))
+            record_usage(span, result, params, result.content)
+    # Locally repaired report; faults that couldn't be repaired are listed on stderr
+    report, repairs, errors = check_output(business_process_agent.name, result.content)
+    if errors:
+        print(json.dumps({"output_errors": errors}, indent=2), file=sys.stderr)
+    print(json.dumps(report if report is not None else result.content, indent=2))
+    if not errors:
+        # Kept for portfolio queries: python -m api.analytics steps --sector Retail
+        try:
+            analytics_store.add_report(report, params["sector"], tenant_of(params["business_context"]), sop_file)
+        except Exception as exc:  # the analysis itself succeeded
+            print(json.dumps({"analytics_error": f"{type(exc).__name__}: {exc}"}), file=sys.stderr)
+    # Per-stage timing/token summary goes to stderr so stdout stays the report
+    print(json.dumps(trace.summary(), indent=2), file=sys.stderr)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,425 @@
+import argparse
+import hmac
+import json
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from orchestrators.analytics import analytics_store
+from orchestrators.artifacts import pack_result, unpack_result
+from orchestrators.pipeline_types import tenant_of
+from tools.storage import DATA_DIR
+from tools.tracing import tracer
+
+# —————————————————————————————
+# Long-lived local API server
+# Agents, tools, models and IDP indexes are loaded once at startup; SOP
+# analysis jobs are accepted over HTTP and run by a fixed pool of workers
+# from a bounded queue (a full queue answers 429 with Retry-After).
+# Jobs may only read SOP files under the upload root (--upload-root, default
+# <BPA_DATA_DIR>/uploads); `file_path` is resolved relative to it.
+#
+#   POST /jobs                 {"file_path", "sector", "business_context"} -> 202 {"id", ...}
+#   GET  /jobs/<id>            status and per-stage events so far
+#   GET  /jobs/<id>/result     200 with the report, 202 while still running
+#   GET  /jobs/<id>/events     NDJSON stream of stage events until the job ends
+#   GET  /health               queue depth, worker count, job counts, warm sectors
+#   GET  /tenants/<tenant>/analytics/steps    ?sector=&priority=&role=&keyword=&max_payback=&min_savings=
+#   GET  /tenants/<tenant>/analytics/savings  ?by=sector|tenant  the tenant's total monthly savings
+# Analytics requests must carry that tenant's key ("Authorization: Bearer
+# <key>"); keys come from a JSON file {"<tenant>": "<key>"} given with
+# --tenant-keys (or BPA_TENANT_KEYS). Without one, analytics are not served
+# over HTTP. Results only ever cover the tenant in the path; cross-tenant
+# queries are only available locally (python -m api.analytics).
+#
+#   python -m api.server --port 8080 --workers 2 --queue-size 16 --warm-sector Retail --upload-root /srv/sops \
+#       --tenant-keys /etc/bpa/tenant_keys.json
+# —————————————————————————————
+
+MAX_FINISHED_JOBS = 1000
+RETRY_AFTER_S = 5
+JOB_PATH = re.compile(r"^/jobs/([0-9a-f]+)(/result|/events)?/?$")
+ANALYTICS_PATH = re.compile(r"^/tenants/([^/]+)/analytics/(steps|savings)/?$")
+DEFAULT_UPLOAD_ROOT = Path(os.environ.get("BPA_UPLOAD_ROOT") or DATA_DIR / "uploads")
+DEFAULT_TENANT_KEYS = os.environ.get("BPA_TENANT_KEYS")
+
+
+def resolve_upload(root: Path, file_path: str) -> str:
+    """
+    Resolves a client-supplied `file_path` against the upload root.
+    Raises ValueError for paths outside it (absolute, "..", symlinks out).
+    """
+    root = Path(root).resolve()
+    resolved = (root / file_path).resolve()
+    if not resolved.is_relative_to(root):
+        raise ValueError("file_path must be inside the server's upload root")
+    if not resolved.is_file():
+        raise ValueError(f"no such file under the upload root: {file_path}")
+    return str(resolved)
+
+
+def load_tenant_keys(path: Optional[str]) -> dict:
+    """
+    Reads {tenant: key} from a JSON file; no file means no keys.
+    """
+    if not path:
+        return {}
+    with open(path, "r", encoding="utf-8") as fh:
+        keys = json.load(fh)
+    if not isinstance(keys, dict) or not all(isinstance(k, str) and k for k in keys.values()):
+        raise ValueError(f"{path}: expected a JSON object of tenant -> non-empty key")
+    return keys
+
+
+class Job:
+    def __init__(self, params: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.params = params
+        self.status = "queued"
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self._changed = threading.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("ok", "error")
+
+    def add_event(self, event: dict) -> None:
+        with self._changed:
+            self.events.append({"ts": round(time.time(), 3), **event})
+            self._changed.notify_all()
+
+    def finish(self, status: str) -> None:
+        # Status and the final event change together so streams never stop early
+        with self._changed:
+            self.finished_at = time.time()
+            self.status = status
+            self.events.append({
+                "ts": round(self.finished_at, 3), "stage": "job",
+                "status": "finished" if status == "ok" else "failed",
+            })
+            self._changed.notify_all()
+
+    def wait_events(self, start: int, timeout: float) -> list:
+        """
+        Returns the events after index `start`, waiting up to `timeout`
+        seconds for new ones while the job is still running.
+        """
+        with self._changed:
+            if len(self.events) <= start and not self.done:
+                self._changed.wait(timeout)
+            return self.events[start:]
+
+    def to_dict(self, with_result: bool = False) -> dict:
+        out = {
+            "id": self.id,
+            "status": self.status,
+            "file_path": self.params.get("file_path"),
+            "sector": self.params.get("sector"),
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": list(self.events),
+        }
+        if self.error:
+            out["error"] = self.error
+        if with_result:
+            out["result"] = unpack_result(self.result) if self.result is not None else None
+        return out
+
+
+class JobManager:
+    """
+    Runs analysis jobs on `workers` threads from a queue of at most
+    `queue_size` waiting jobs, sharing one warm pipeline.
+    """
+
+    def __init__(self, pipeline, workers: int = 2, queue_size: int = 16, analytics=None):
+        self.pipeline = pipeline
+        self.analytics = analytics  # AnalyticsStore indexing finished reports, or None
+        self.queue = queue.Queue(maxsize=max(1, queue_size))
+        self.jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"bpa-worker-{i}", daemon=True)
+            for i in range(max(1, workers))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, params: dict) -> Job:
+        """
+        Raises queue.Full when the queue is at capacity.
+        """
+        job = Job(params)
+        job.add_event({"stage": "job", "status": "queued"})
+        with self._lock:
+            self.queue.put_nowait(job)
+            self.jobs[job.id] = job
+            self._prune()
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def _prune(self) -> None:
+        finished = [jid for jid, j in self.jobs.items() if j.done]
+        for jid in finished[: max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[jid]
+
+    def _worker(self) -> None:
+        while True:
+            job = self.queue.get()
+            try:
+                self._run(job)
+            finally:
+                self.queue.task_done()
+
+    def _run(self, job: Job) -> None:
+        job.status = "running"
+        job.started_at = time.time()
+        job.add_event({"stage": "job", "status": "started"})
+        status = "error"
+        try:
+            with tracer.run(run_id=job.id, file_path=job.params["file_path"], sector=job.params.get("sector")) as trace:
+                result = self.pipeline.run(job.params, on_event=job.add_event)
+            if self.analytics is not None:
+                try:
+                    self.analytics.add_report(
+                        result, job.params.get("sector") or "Retail",
+                        tenant_of(job.params.get("business_context")), job.params["file_path"],
+                    )
+                except Exception as exc:  # the analysis itself succeeded
+                    result["analytics_error"] = f"{type(exc).__name__}: {exc}"
+            result["trace_summary"] = trace.summary()
+            job.result = pack_result(result)  # finished results are held in compact form until fetched
+            status = "ok"
+        except Exception as exc:  # one bad SOP (or result) must not take the worker down
+            job.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            job.finish(status)
+
+    def health(self) -> dict:
+        with self._lock:
+            counts = {}
+            for job in self.jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "status": "ok",
+            "workers": len(self._threads),
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "jobs": counts,
+            "sector_pool": self.pipeline.sector_pool.describe(),
+        }
+
+
+class APIHandler(BaseHTTPRequestHandler):
+    manager: JobManager = None  # set by make_server
+    upload_root: Path = DEFAULT_UPLOAD_ROOT
+    tenant_keys: dict = {}  # tenant -> API key, set by make_server
+    server_version = "BusinessProcessAgent/1.0"
+
+    def _send_json(self, status: int, body: dict, headers: Optional[dict] = None) -> None:
+        payload = json.dumps(body, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": "not found"})
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(params, dict) or not isinstance(params.get("file_path"), str) or not params["file_path"]:
+                raise ValueError("body must be a JSON object with 'file_path'")
+            params["file_path"] = resolve_upload(self.upload_root, params["file_path"])
+        except ValueError as exc:
+            return self._send_json(400, {"error": str(exc)})
+        params.setdefault("sector", "Retail")
+        params.setdefault("business_context", {})
+        try:
+            job = self.manager.submit(params)
+        except queue.Full:
+            return self._send_json(
+                429, {"error": "queue full, retry later"}, {"Retry-After": str(RETRY_AFTER_S)}
+            )
+        self._send_json(202, {
+            "id": job.id,
+            "status": job.status,
+            "status_url": f"/jobs/{job.id}",
+            "result_url": f"/jobs/{job.id}/result",
+            "events_url": f"/jobs/{job.id}/events",
+        }, {"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self):
+        if self.path.rstrip("/") == "/health":
+            return self._send_json(200, self.manager.health())
+        m = ANALYTICS_PATH.match(urlsplit(self.path).path)
+        if m:
+            return self._analytics(unquote(m.group(1)), m.group(2))
+        m = JOB_PATH.match(self.path)
+        job = self.manager.get(m.group(1)) if m else None
+        if job is None:
+            return self._send_json(404, {"error": "not found"})
+        view = m.group(2)
+        if view == "/events":
+            return self._stream_events(job)
+        if view == "/result":
+            if not job.done:
+                return self._send_json(202, job.to_dict(), {"Retry-After": "1"})
+            return self._send_json(200 if job.status == "ok" else 500, job.to_dict(with_result=True))
+        self._send_json(200, job.to_dict())
+
+    def _tenant_error(self, tenant: str) -> Optional[tuple]:
+        # (status, body, headers) when the caller may not read `tenant`'s data
+        if not self.tenant_keys:
+            return 403, {"error": "tenant keys are not configured on this server"}, None
+        scheme, _, key = (self.headers.get("Authorization") or "").partition(" ")
+        if scheme.lower() != "bearer" or not key.strip():
+            return 401, {"error": "missing tenant key"}, {"WWW-Authenticate": "Bearer"}
+        expected = self.tenant_keys.get(tenant, "")
+        # Unknown tenants and wrong keys answer alike
+        if not expected or not hmac.compare_digest(key.strip().encode("utf-8"), expected.encode("utf-8")):
+            return 403, {"error": "key does not grant access to this tenant"}, None
+        return None
+
+    def _analytics(self, tenant: str, view: str) -> None:
+        store = self.manager.analytics
+        query = {k: v[-1] for k, v in parse_qs(urlsplit(self.path).query).items()}
+        denied = self._tenant_error(tenant)
+        if denied is not None:
+            return self._send_json(*denied)
+        if store is None:
+            return self._send_json(404, {"error": "analytics index disabled"})
+        try:
+            if view == "steps":
+                rows = store.find_steps(
+                    sector=query.get("sector"),
+                    tenant=tenant,
+                    priority=query.get("priority"),
+                    role=query.get("role"),
+                    keyword=query.get("keyword"),
+                    max_payback_months=float(query["max_payback"]) if "max_payback" in query else None,
+                    min_savings=float(query["min_savings"]) if "min_savings" in query else None,
+                    limit=int(query.get("limit", 100)),
+                )
+            else:
+                rows = store.savings_by(query.get("by", "sector"), sector=query.get("sector"), tenant=tenant)
+        except ValueError as exc:
+            return self._send_json(400, {"error": str(exc)})
+        self._send_json(200, {"tenant": tenant, "rows": rows})
+
+    def _stream_events(self, job: Job) -> None:
+        # One JSON event per line; the connection closes when the job ends
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sent = 0
+        try:
+            while True:
+                events = job.wait_events(sent, timeout=15.0)
+                for event in events:
+                    self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+                sent += len(events)
+                self.wfile.flush()
+                if job.done and sent >= len(job.events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # client went away
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass  # job progress is available through the API and traces
+
+
+def build_pipeline(mode: str = "fast", warm_sectors=()):
+    """
+    Builds the shared pipeline, loads the warm sectors' resources up front
+    and starts the sector pool's background refresh.
+    """
+    if mode == "incremental":
+        from orchestrators.incremental import IncrementalPipeline as Pipeline
+    else:
+        from orchestrators.fast_pipeline import FastPipeline as Pipeline
+    pipeline = Pipeline()
+    for sector in warm_sectors or ():
+        pipeline.prefetch_sector(sector)
+    pipeline.sector_pool.start_refresh()
+    return pipeline
+
+
+def make_server(
+    host: str, port: int, manager: JobManager, upload_root: Path = DEFAULT_UPLOAD_ROOT, tenant_keys: Optional[dict] = None,
+) -> ThreadingHTTPServer:
+    """
+    Args:
+      tenant_keys: {tenant: key} granting access to that tenant's analytics;
+        analytics are not served without it.
+    """
+    handler = type(
+        "BoundAPIHandler", (APIHandler,),
+        {"manager": manager, "upload_root": Path(upload_root), "tenant_keys": dict(tenant_keys or {})},
+    )
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve SOP analysis jobs over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=2, help="Jobs analysed concurrently")
+    parser.add_argument("--queue-size", type=int, default=16, help="Waiting jobs before requests get 429")
+    parser.add_argument("--mode", choices=["fast", "incremental"], default="fast")
+    parser.add_argument("--warm-sector", action="append", default=[], help="Sector whose resources load at startup")
+    parser.add_argument("--no-analytics", action="store_true", help="Don't index finished reports for analytics")
+    parser.add_argument(
+        "--upload-root", default=str(DEFAULT_UPLOAD_ROOT), help="Directory jobs may read SOP files from"
+    )
+    parser.add_argument(
+        "--tenant-keys", default=DEFAULT_TENANT_KEYS,
+        help='JSON file {"<tenant>": "<key>"}; analytics requests need their tenant\'s key as a Bearer token',
+    )
+    parser.add_argument("--trace-out", help="Append per-span JSON trace records to this JSONL file")
+    args = parser.parse_args()
+    tenant_keys = load_tenant_keys(args.tenant_keys)
+
+    if args.trace_out:
+        tracer.export_path = args.trace_out
+    start = time.perf_counter()
+    analytics = None if args.no_analytics else analytics_store
+    manager = JobManager(build_pipeline(args.mode, args.warm_sector), args.workers, args.queue_size, analytics)
+    server = make_server(args.host, args.port, manager, args.upload_root, tenant_keys)
+    print(f"Warm in {time.perf_counter() - start:.2f}s; listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
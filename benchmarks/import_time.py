@@ -0,0 +1,111 @@
+import argparse
+import json
+import re
+import subprocess
+import sys
+
+# —————————————————————————————
+# Startup import-cost report
+# Imports each entry-point module in a fresh interpreter with
+# `python -X importtime` and reports total import time plus the most
+# expensive modules and top-level packages, so regressions that drag heavy
+# dependencies (sklearn, langchain, pdfplumber, requests, ...) back onto
+# the startup path are easy to spot.
+#
+#   python -m benchmarks.import_time
+#   python -m benchmarks.import_time api.server --top 20 --json
+# —————————————————————————————
+
+DEFAULT_MODULES = (
+    "business_process_agent",
+    "tools",
+    "orchestrators.fast_pipeline",
+    "orchestrators.business_process_agent",
+    "api.batch",
+    "api.server",
+)
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def profile_import(module: str) -> dict:
+    """
+    Args:
+      module: Dotted module name to import in a fresh interpreter.
+    Returns:
+      { "module", "ok", "total_ms", "modules": [ {"name", "self_ms", "cumulative_ms", "depth"} ], "error"? }
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    modules = []
+    other = []
+    for line in proc.stderr.splitlines():
+        m = IMPORTTIME_LINE.match(line)
+        if not m:
+            if not line.startswith("import time:"):
+                other.append(line)
+            continue
+        self_us, cumulative_us, indent, name = m.groups()
+        modules.append({
+            "name": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": (len(indent) - 1) // 2,
+        })
+    # Nested imports are listed before the module importing them, one level
+    # deeper; keep only the target's subtree (drop interpreter startup).
+    end = next((i for i in range(len(modules) - 1, -1, -1) if modules[i]["name"] == module), None)
+    if end is not None:
+        start = end
+        while start > 0 and modules[start - 1]["depth"] > 0:
+            start -= 1
+        modules = modules[start:end + 1]
+    result = {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "total_ms": round(modules[-1]["cumulative_ms"] if end is not None else sum(m["self_ms"] for m in modules), 1),
+        "modules": modules,
+    }
+    if proc.returncode != 0:
+        result["error"] = other[-1] if other else f"exit code {proc.returncode}"
+    return result
+
+
+def by_package(modules: list) -> list:
+    """
+    Sums self time per top-level package; returns (package, ms) pairs, most expensive first.
+    """
+    totals = {}
+    for m in modules:
+        package = m["name"].split(".")[0]
+        totals[package] = totals.get(package, 0.0) + m["self_ms"]
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import cost of the entry points.")
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES))
+    parser.add_argument("--top", type=int, default=10, help="Most expensive modules/packages to list")
+    parser.add_argument("--json", action="store_true", help="Print the full report as JSON")
+    args = parser.parse_args()
+
+    reports = [profile_import(module) for module in args.modules]
+    if args.json:
+        for r in reports:
+            r["packages"] = [{"package": p, "self_ms": round(ms, 1)} for p, ms in by_package(r["modules"])[: args.top]]
+            r["modules"] = sorted(r["modules"], key=lambda m: m["cumulative_ms"], reverse=True)[: args.top]
+        print(json.dumps(reports, indent=2))
+        return
+
+    for r in reports:
+        status = "" if r["ok"] else f"  FAILED: {r['error']}"
+        print(f"{r['module']}: {r['total_ms']:.1f} ms{status}")
+        for package, ms in by_package(r["modules"])[: args.top]:
+            print(f"    {package:40s} {ms:>9.1f} ms self")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+# Keep caches, indexes and models of benchmark runs away from the real data dir.
+# Must happen before any `tools` import reads BPA_DATA_DIR.
+os.environ.setdefault("BPA_DATA_DIR", tempfile.mkdtemp(prefix="bpa-bench-"))
+# Measure the pipeline itself, not replays from the sub-agent response cache.
+os.environ.setdefault("BPA_LLM_CACHE", "bypass")
+# Nor from step library matches, which skip agent calls after the first run.
+os.environ.setdefault("BPA_STEP_LIBRARY", "off")
+
+from benchmarks.stubs import (  # noqa: E402
+    FixtureOCRTool,
+    StubBenchmarkingAgent,
+    StubProcessMiningAgent,
+)
+from benchmarks.synthetic import synthetic_sop  # noqa: E402
+from orchestrators.fast_pipeline import FastPipeline, build_roi_items  # noqa: E402
+from orchestrators.pipeline_types import Issue  # noqa: E402
+from tools.document_tools import LangChainParserTool  # noqa: E402
+from tools.idp_store import IDPRetrievalTool, idp_store  # noqa: E402
+from tools.pattern_tools import AnomalyDetectionTool, SequenceClusteringTool  # noqa: E402
+from tools.roi_calculator import ROICalculatorTool  # noqa: E402
+from tools.step_extraction import extract_steps  # noqa: E402
+
+# —————————————————————————————
+# Offline benchmark suite
+# Measures per-tool and end-to-end latency percentiles, throughput and peak
+# memory with stub LLM agents and recorded OCR/IDP fixtures, over the
+# sample-data SOPs plus synthetic SOPs of 10 to 10,000 steps.
+#
+#   python -m benchmarks.run_benchmarks --write-baseline
+#   python -m benchmarks.run_benchmarks --compare
+# —————————————————————————————
+
+BENCH_DIR = Path(__file__).parent
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+DEFAULT_OUTPUT = BENCH_DIR / "results.json"
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+SAMPLE_SOPS = ("sample-data/sop_low_complexity.txt", "sample-data/StyleHiveSOP.txt", "sample-data/StyleHive SOP.pdf")
+SYNTHETIC_SIZES = (10, 100, 1000, 10000)
+REGRESSION_THRESHOLD = 1.25  # p50 slower than baseline by more than 25%
+
+
+def measure(fn, iterations: int, units: int = 1) -> dict:
+    """
+    Times `fn` over `iterations` runs, then repeats it once under tracemalloc
+    for peak memory (kept separate so tracing overhead doesn't skew latency).
+    """
+    fn()  # warm-up
+    durations = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    durations.sort()
+    median = statistics.median(durations)
+    p95_idx = min(len(durations) - 1, int(round(0.95 * (len(durations) - 1))))
+    return {
+        "iterations": iterations,
+        "mean_ms": round(statistics.mean(durations) * 1000, 3),
+        "p50_ms": round(median * 1000, 3),
+        "p95_ms": round(durations[p95_idx] * 1000, 3),
+        "throughput_per_s": round(units / median, 2) if median > 0 else None,
+        "peak_mem_kb": round(peak / 1024, 1),
+    }
+
+
+def tool_cases(file_path: str, label: str, iterations: int) -> dict:
+    parser = LangChainParserTool()
+    clustering = SequenceClusteringTool()
+    anomaly = AnomalyDetectionTool()
+    roi = ROICalculatorTool()
+    retrieval = IDPRetrievalTool()
+
+    def parse_cold():
+        parser.cache.clear()
+        parser.parse(file_path)
+
+    text = parser.parse(file_path)["text"]
+    steps = extract_steps(text)
+    n = len(steps)
+    issues = [Issue(s, "Manual process", "Slows down the workflow") for s in steps]
+    items = build_roi_items(issues, [])
+
+    cases = {
+        f"parse_cold@{label}": measure(parse_cold, iterations, units=n),
+        f"parse_warm@{label}": measure(lambda: parser.parse(file_path), iterations, units=n),
+        f"extract_steps@{label}": measure(lambda: extract_steps(text), iterations, units=n),
+        f"roi_calculator@{label}": measure(lambda: roi.run(items), iterations, units=n),
+        f"idp_retrieval@{label}": measure(lambda: retrieval.run("Retail", steps, top_k=3), iterations, units=n),
+    }
+    if n >= 2:
+        cases[f"sequence_clustering@{label}"] = measure(lambda: clustering.run(steps, num_clusters=5), iterations, units=n)
+        cases[f"anomaly_detection@{label}"] = measure(lambda: anomaly.run(steps), iterations, units=n)
+    return cases
+
+
+def end_to_end_case(pipeline: FastPipeline, file_path: str, label: str, iterations: int) -> dict:
+    params = {"file_path": file_path, "sector": "Retail", "business_context": {}}
+    return {f"end_to_end@{label}": measure(lambda: pipeline.run(params), iterations)}
+
+
+def run_suite(iterations: int, sizes=SYNTHETIC_SIZES) -> dict:
+    idp_store.ingest("Retail", str(FIXTURES_DIR / "idp" / "Retail.txt"))
+    pipeline = FastPipeline(StubProcessMiningAgent(), StubBenchmarkingAgent())
+    pipeline.ocr = FixtureOCRTool()
+
+    cases = {}
+    ocr = FixtureOCRTool()
+    cases["ocr_fixture@StyleHive SOP.pdf"] = measure(lambda: ocr.run("StyleHive SOP.pdf"), iterations)
+    for sop in SAMPLE_SOPS:
+        label = Path(sop).name
+        cases.update(tool_cases(sop, label, iterations))
+        cases.update(end_to_end_case(pipeline, sop, label, iterations))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = Path(tmp) / f"synthetic_{n}.txt"
+            path.write_text(synthetic_sop(n), encoding="utf-8")
+            its = iterations if n <= 1000 else max(1, iterations // 5)
+            label = f"synthetic_{n}"
+            cases.update(tool_cases(str(path), label, its))
+            cases.update(end_to_end_case(pipeline, str(path), label, its))
+            print(f"  {label}: done", file=sys.stderr)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "iterations": iterations,
+        },
+        "cases": cases,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = REGRESSION_THRESHOLD) -> list:
+    """
+    Returns one row per case present in both runs, flagging p50 regressions.
+    """
+    rows = []
+    for case, current in sorted(results["cases"].items()):
+        base = baseline["cases"].get(case)
+        if not base or not base["p50_ms"]:
+            continue
+        ratio = current["p50_ms"] / base["p50_ms"]
+        rows.append({
+            "case": case,
+            "baseline_p50_ms": base["p50_ms"],
+            "p50_ms": current["p50_ms"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > threshold,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline pipeline benchmarks (no live LLM/Vision/IMDA calls).")
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="*", default=list(SYNTHETIC_SIZES), help="Synthetic SOP step counts")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT))
+    parser.add_argument("--write-baseline", action="store_true", help=f"Also write results to {DEFAULT_BASELINE.name}")
+    parser.add_argument("--compare", nargs="?", const=str(DEFAULT_BASELINE), help="Compare against a baseline file")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    results = run_suite(args.iterations, args.sizes)
+    Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.write_baseline:
+        DEFAULT_BASELINE.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    for case, r in sorted(results["cases"].items()):
+        print(f"{case:45s} p50={r['p50_ms']:>10.2f}ms p95={r['p95_ms']:>10.2f}ms peak={r['peak_mem_kb']:>10.1f}KB")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as fh:
+            rows = compare(results, json.load(fh), args.threshold)
+        regressions = [r for r in rows if r["regression"]]
+        for r in rows:
+            flag = "REGRESSION" if r["regression"] else ""
+            print(f"{r['case']:45s} {r['baseline_p50_ms']:>10.2f} -> {r['p50_ms']:>10.2f}ms x{r['ratio']:.2f} {flag}")
+        if regressions:
+            sys.exit(f"{len(regressions)} case(s) regressed by more than {args.threshold:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import random
+
+# —————————————————————————————
+# Synthetic SOP generator for scaling benchmarks.
+# Produces numbered procedures (sections x sub-steps) in the same shape as
+# sample-data/StyleHiveSOP.txt, deterministic for a given seed.
+# —————————————————————————————
+
+ACTORS = ("Floor Staff", "Inventory Clerk", "Store Manager", "Cashier", "HQ Finance")
+VERBS = ("Count", "Record", "Verify", "Email", "Approve", "Scan", "Update", "Review", "Enter", "Print")
+OBJECTS = (
+    "shelf stock for each SKU",
+    "daily sales totals in the spreadsheet",
+    "supplier packlist against the purchase order",
+    "the variance report to Finance",
+    "pending purchase orders in the Procurement module",
+    "received cartons at the loading bay",
+    "on-hand levels in the POS system",
+    "the paper timesheet for each shift",
+    "customer returns in the returns log",
+    "the delivery acceptance form",
+)
+QUALIFIERS = ("", " manually", " every morning", " by 11 AM daily", " before closing", " weekly")
+
+
+def synthetic_sop(n_steps: int, seed: int = 7, steps_per_section: int = 4) -> str:
+    """
+    Returns SOP text with exactly `n_steps` numbered leaf steps.
+    """
+    rng = random.Random(seed)
+    lines = [
+        "Standard Operating Procedure (SOP)",
+        f"Title: Synthetic Retail Procedure ({n_steps} steps)",
+        "Document No.: SYN-SOP-001",
+        "Version: 1.0",
+        "",
+        "5.3. Step-By-Step Workflow",
+    ]
+    section = 0
+    for i in range(n_steps):
+        if i % steps_per_section == 0:
+            section += 1
+            lines.append(f"      {section}. Section {section} Tasks ({rng.choice(ACTORS)})")
+        sub = i % steps_per_section + 1
+        lines.append(f"{section}.{sub}. {rng.choice(VERBS)} {rng.choice(OBJECTS)}{rng.choice(QUALIFIERS)}.")
+    return "\n".join(lines) + "\n"
+
+
+def scanned_sop_pdf(out_path: str, text_pdf: str, n_steps: int = 16, steps_per_page: int = 8) -> None:
+    """
+    Writes a mixed PDF: the first page of `text_pdf` (with its text layer)
+    followed by image-only pages of a synthetic SOP, as a scanner would
+    produce them. Exercises the page-level OCR routing offline.
+    """
+    import pypdfium2 as pdfium
+    from PIL import Image, ImageDraw, ImageFont
+
+    from tools.step_extraction import extract_steps
+
+    src = pdfium.PdfDocument(text_pdf)
+    pdf = pdfium.PdfDocument.new()
+    pdf.import_pages(src, [0])
+    width, height = src[0].get_size()
+    font = ImageFont.load_default(size=16)
+    steps = [f"{n}. {step}" for n, step in enumerate(extract_steps(synthetic_sop(n_steps)), 1)]
+    for start in range(0, len(steps), steps_per_page):
+        image = Image.new("L", (int(width * 1.5), int(height * 1.5)), 255)
+        draw = ImageDraw.Draw(image)
+        for row, line in enumerate(steps[start:start + steps_per_page]):
+            draw.text((60, 90 + row * 45), line, fill=0, font=font)
+        page = pdf.new_page(width, height)
+        obj = pdfium.PdfImage.new(pdf)
+        obj.set_bitmap(pdfium.PdfBitmap.from_pil(image))
+        obj.set_matrix(pdfium.PdfMatrix().scale(width, height))
+        page.insert_obj(obj)
+        page.gen_content()
+    pdf.save(out_path)
+
+
+if __name__ == "__main__":
+    # python -m benchmarks.synthetic  (regenerates the scanned-page fixture)
+    from pathlib import Path
+
+    fixture = Path(__file__).parent / "fixtures" / "pdf" / "scanned_sop.pdf"
+    fixture.parent.mkdir(parents=True, exist_ok=True)
+    scanned_sop_pdf(str(fixture), "sample-data/StyleHive SOP.pdf")
+    print(f"Wrote {fixture}")
@@ -1,6 +1,29 @@
-# Import actual agent instances
-from .document_ingestion_agent import document_ingestion_agent
-from .process_mining_agent import process_mining_agent
-from .pattern_detection_agent import pattern_detection_agent
-from .benchmarking_agent import benchmarking_agent
-from .roi_estimation_agent import roi_estimation_agent
\ No newline at end of file
+import importlib
+
+# —————————————————————————————
+# Sub-agent instances, loaded on first attribute access so that importing
+# the package (or one agent) doesn't build every agent and pull in all of
+# their tool dependencies.
+# —————————————————————————————
+
+_AGENT_MODULES = {
+    "document_ingestion_agent": ".document_ingestion_agent",
+    "process_mining_agent": ".process_mining_agent",
+    "pattern_detection_agent": ".pattern_detection_agent",
+    "benchmarking_agent": ".benchmarking_agent",
+    "roi_estimation_agent": ".roi_estimation_agent",
+}
+
+__all__ = list(_AGENT_MODULES)
+
+
+def __getattr__(name):
+    if name not in _AGENT_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    agent = getattr(importlib.import_module(_AGENT_MODULES[name], __name__), name)
+    globals()[name] = agent  # later lookups skip __getattr__
+    return agent
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
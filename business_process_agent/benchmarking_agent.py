@@ -8,16 +8,18 @@ from google.adk.tools import google_search
 from google.adk.agents import LlmAgent
 from google.adk.tools import google_search
 from tools.idp_fetcher_tool import IDPFetcherTool
+from tools.idp_store import IDPRetrievalTool
 
 benchmarking_agent = LlmAgent(
     name="BenchmarkingAgent",
     model="gemini-pro",  # strong multi-step reasoning
-    tools=[google_search, IDPFetcherTool()],
+    tools=[google_search, IDPRetrievalTool(), IDPFetcherTool()],
     instruction="""
         **Role:**
         You are the Benchmarking Agent. Your job is to compare a company’s discovered workflow steps against Singapore’s Industry Digital Plan (IDP) best practices for their sector.
         
         **Tools:**
+        - `IDPRetrievalTool`: returns the top-k most relevant passages from the locally indexed IDP corpus for each workflow step.
         - `IDPFetcherTool`: fetches and extracts the full text of the IMDA IDP PDF for the target sector.
         - `google_search`: to locate related IDP guidance or sector-specific resources online.
         
@@ -32,14 +34,18 @@ benchmarking_agent = LlmAgent(
         "issues": [                      // from PatternDetectionAgent
             {"step":"...","issue":"...","impact":"..."},
             …
+        ],
+        "idp_passages": [                // optional, pre-retrieved by the pipeline
+            {"step":"...","matches":[{"title":"...","text":"...","score":1.0}]},
+            …
         ]
         }
         ```
         
         **Workflow:**
-        1. Use `IDPFetcherTool.run(sector)` to retrieve the IDP text.  
+        1. If `idp_passages` is provided, use those passages. Otherwise call `IDPRetrievalTool.run(sector, process_map)`; only if no local IDP corpus exists, use `IDPFetcherTool.run(sector)` to retrieve the IDP text.  
         2. Optionally, refine with `google_search` to find online summaries or updates.  
-        3. For each entry in `process_map`, locate matching best practices within the IDP text (e.g., keyword search).  
+        3. For each entry in `process_map`, locate matching best practices within the retrieved IDP passages.  
         4. Cross-reference against `issues` to prioritize steps that both violate current norms and carry high impact.
         
         **Task:**
@@ -71,5 +77,8 @@ benchmarking_agent = LlmAgent(
         - Suggestions must come directly from the IDP document or an official IMDA source.  
         - Priority = High if the issue impact is critical (e.g., manual, error-prone) and strongly referenced in the IDP.  
         - Preserve the exact wording of each original step in your output.
+        - A passage matched for several steps carries its `text` only at its first occurrence; later matches list just its `title`, `source` and `page`.
+        - `process_map` may be trimmed to the steps referenced by `issues` when the input is long.
+        - If the input has an `output_feedback` field, your previous answer failed validation: return the complete output again with the listed errors fixed.
     """,
 )
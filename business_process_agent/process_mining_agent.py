@@ -59,8 +59,10 @@ process_mining_agent = LlmAgent(
 
         **Constraints:**
         - Maximum of 20 steps per process; if more, summarize or group similar steps.
+        - If the input has a `chunk` field, the steps are one section of a longer SOP: map exactly the given steps, in order, without summarizing, grouping or adding steps.
         - Roles must be one of the SME’s defined roles (staff, manager, cashier, HQ).
         - Preserve the original language of each step; do not paraphrase or shorten beyond 120 characters.
         - Execution order must follow logical dependencies; if unsure, assume linear sequence.
+        - If the input has an `output_feedback` field, your previous answer failed validation: return the complete output again with the listed errors fixed.
     """,
 )
@@ -0,0 +1,90 @@
+from orchestrators.output_schemas import MAX_OUTPUT_RETRIES, OutputValidationError, check_output, output_stats
+from orchestrators.prompt_budget import CHARS_PER_TOKEN, prompt_compactor
+from tools.llm_cache import llm_cache
+from tools.tracing import payload_size, record_cache, tracer
+
+# —————————————————————————————
+# Direct sub-agent invocation used by the code-driven pipeline.
+# Inputs are compacted to the receiving agent's token budget
+# (orchestrators/prompt_budget.py) and responses go through the shared LLM
+# response cache (tools/llm_cache.py); each agent span records the prompt
+# size before/after compaction and whether the call was served from cache.
+# Responses are validated against the agent's output schema and repaired
+# locally (orchestrators/output_schemas.py); only faults that can't be
+# repaired cost a retry, which sends the validation errors back to the agent.
+# —————————————————————————————
+
+
+def record_usage(span, result, payload, content) -> None:
+    """
+    Records LLM token counts on `span`, from usage metadata when available.
+    """
+    usage = getattr(result, "usage_metadata", None)
+    if usage is not None:
+        span.set(
+            prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+            output_tokens=getattr(usage, "candidates_token_count", 0) or 0,
+        )
+    else:
+        span.set(
+            prompt_tokens=payload_size(payload) // CHARS_PER_TOKEN,
+            output_tokens=payload_size(content) // CHARS_PER_TOKEN,
+            tokens_estimated=True,
+        )
+
+
+def retry_agent(agent, name: str, payload: dict, errors: list) -> tuple:
+    """
+    Re-asks `agent` for its output, listing the faults local repair could not fix.
+    Returns check_output()'s (output, repairs, errors) for the new response.
+    """
+    payload = {**payload, "output_feedback": {"errors": errors[:10]}}
+    with tracer.span(f"{name}.retry", kind="agent", model=getattr(agent, "model", None)) as span:
+        result = agent.run(payload)
+        span.set(input_bytes=payload_size(payload), output_bytes=payload_size(result.content))
+        record_usage(span, result, payload, result.content)
+        return check_output(name, result.content)
+
+
+def call_agent(agent, payload: dict, cache=llm_cache, compactor=prompt_compactor) -> dict:
+    """
+    Args:
+      agent: An LlmAgent (or any object exposing `run(payload).content`).
+      payload: JSON-serializable input for the agent.
+      cache: Response cache to consult, or None to always call the agent.
+      compactor: Prompt compactor applied to `payload`, or None to send it as is.
+    Returns:
+      The agent's parsed JSON output, validated and repaired.
+    Raises:
+      OutputValidationError: The output is still invalid after the retries.
+    """
+    name = getattr(agent, "name", type(agent).__name__)
+    with tracer.span(name, kind="agent", model=getattr(agent, "model", None)) as span:
+        if compactor is not None:
+            payload, stats = compactor.compact(name, payload)
+            span.set(**stats)
+        key = cache.key(agent, payload) if cache is not None else None
+        if cache is not None and cache.mode == "use":
+            cached = cache.get(key)
+            record_cache(hit=cached is not None)
+            if cached is not None:
+                span.set(llm_cache="hit", input_bytes=payload_size(payload), output_bytes=payload_size(cached))
+                return cached
+        result = agent.run(payload)
+        span.set(input_bytes=payload_size(payload), output_bytes=payload_size(result.content))
+        record_usage(span, result, payload, result.content)
+        output, repairs, errors = check_output(name, result.content)
+        retries = 0
+        while errors and retries < MAX_OUTPUT_RETRIES:
+            retries += 1
+            output, repairs, errors = retry_agent(agent, name, payload, errors)
+        output_stats.add(name, repaired=bool(repairs), retried=retries > 0, failed=bool(errors))
+        span.set(output_repaired=int(bool(repairs)), output_retried=int(retries > 0))
+        if repairs:
+            span.set(output_repairs=repairs)
+        if errors:
+            raise OutputValidationError(name, errors)
+        if cache is not None:
+            span.set(llm_cache="miss" if cache.mode == "use" else cache.mode)
+            cache.put(key, agent, output)  # only well-formed responses are cached
+        return output
@@ -0,0 +1,274 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from orchestrators.pipeline_types import DEFAULT_TENANT
+from tools.step_extraction import step_key
+from tools.storage import DATA_DIR
+
+# —————————————————————————————
+# Cross-SOP analytics index
+# Every finished report is flattened into one SQLite file (WAL mode, shared
+# by batch workers, the API server and the query CLI):
+#   reports     one row per analysed SOP (tenant, sector, totals)
+#   step_facts  one row per step of a report, with its role, issue, IDP
+#               suggestion, priority and ROI figures side by side
+# Indexed on sector, priority, role, savings and payback so portfolio
+# questions ("High-priority inventory steps in Retail paying back within
+# 3 months", "monthly savings per tenant") are answered from the index
+# without re-running any agent. Re-indexing the same SOP replaces its rows.
+# Layout: <BPA_DATA_DIR>/analytics.sqlite3
+# —————————————————————————————
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    report_id TEXT PRIMARY KEY,
+    tenant TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    file_path TEXT,
+    total_monthly_savings REAL NOT NULL,
+    idp_alignment_summary TEXT,
+    steps INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS step_facts (
+    report_id TEXT NOT NULL REFERENCES reports (report_id) ON DELETE CASCADE,
+    tenant TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    ord INTEGER,
+    step TEXT NOT NULL,
+    step_key TEXT NOT NULL,
+    role TEXT,
+    issue TEXT,
+    impact TEXT,
+    idp_suggestion TEXT,
+    priority TEXT,
+    savings_sgd REAL,
+    payback_months REAL
+);
+CREATE INDEX IF NOT EXISTS reports_tenant ON reports (tenant);
+CREATE INDEX IF NOT EXISTS reports_sector ON reports (sector);
+CREATE INDEX IF NOT EXISTS facts_report ON step_facts (report_id);
+CREATE INDEX IF NOT EXISTS facts_sector_priority ON step_facts (sector, priority, payback_months);
+CREATE INDEX IF NOT EXISTS facts_role ON step_facts (role);
+CREATE INDEX IF NOT EXISTS facts_savings ON step_facts (savings_sgd);
+"""
+
+FACT_COLUMNS = (
+    "report_id", "tenant", "sector", "ord", "step", "step_key", "role",
+    "issue", "impact", "idp_suggestion", "priority", "savings_sgd", "payback_months",
+)
+GROUP_COLUMNS = {"tenant": "tenant", "sector": "sector"}
+
+
+def step_facts(report: dict) -> list:
+    """
+    Joins a report's process_map, issues, benchmarks and roi by step into
+    one dict per step, in process order; steps only named in the later
+    sections follow.
+    """
+    facts = {}
+
+    def fact(step: str) -> dict:
+        key = step_key(step)
+        if key not in facts:
+            facts[key] = {"step": step, "step_key": key}
+        return facts[key]
+
+    for p in report.get("process_map", []):
+        f = fact(p["step"])
+        f.setdefault("ord", p.get("order"))
+        f.setdefault("role", p.get("role"))
+    for i in report.get("issues", []):
+        f = fact(i["step"])
+        f.setdefault("issue", i.get("issue"))
+        f.setdefault("impact", i.get("impact"))
+    for b in report.get("benchmarks", []):
+        f = fact(b["step"])
+        f.setdefault("idp_suggestion", b.get("idp_suggestion"))
+        f.setdefault("priority", b.get("priority"))
+    for r in report.get("roi", []):
+        f = fact(r["step"])
+        f.setdefault("savings_sgd", r.get("estimated_savings_SGD"))
+        f.setdefault("payback_months", r.get("payback_months"))
+    return list(facts.values())
+
+
+class AnalyticsStore:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else DATA_DIR / "analytics.sqlite3"
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def add_report(
+        self,
+        report: dict,
+        sector: str,
+        tenant: str = DEFAULT_TENANT,
+        file_path: Optional[str] = None,
+        report_id: Optional[str] = None,
+    ) -> str:
+        """
+        Indexes a final report (the PipelineReport dict / orchestrator output).
+        Args:
+          report_id: Defaults to one ID per (tenant, sector, file_path), so
+            re-analysing an SOP replaces its previous rows.
+        Returns:
+          The report ID.
+        """
+        if report_id is None:
+            report_id = hashlib.sha1(f"{tenant}\n{sector}\n{file_path}".encode("utf-8")).hexdigest()[:16]
+        facts = step_facts(report)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM reports WHERE report_id = ?", (report_id,))
+            conn.execute(
+                "INSERT INTO reports VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    report_id, tenant, sector, file_path,
+                    float(report.get("total_monthly_savings") or 0.0),
+                    report.get("idp_alignment_summary"),
+                    len(report.get("process_map", [])),
+                    time.time(),
+                ),
+            )
+            conn.executemany(
+                f"INSERT INTO step_facts ({', '.join(FACT_COLUMNS)}) VALUES ({', '.join('?' * len(FACT_COLUMNS))})",
+                [
+                    (report_id, tenant, sector, *(f.get(c) for c in FACT_COLUMNS[3:]))
+                    for f in facts
+                ],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return report_id
+
+    def find_steps(
+        self,
+        sector: Optional[str] = None,
+        tenant: Optional[str] = None,
+        priority: Optional[str] = None,
+        role: Optional[str] = None,
+        keyword: Optional[str] = None,
+        max_payback_months: Optional[float] = None,
+        min_savings: Optional[float] = None,
+        limit: int = 100,
+    ) -> list:
+        """
+        Steps across all indexed reports matching every given filter, highest
+        savings first. `keyword` matches within the normalized step text.
+        Returns:
+          [ {"report_id", "tenant", "sector", "file_path", "step", "role", "issue",
+             "impact", "idp_suggestion", "priority", "savings_sgd", "payback_months"}, ... ]
+        """
+        where, params = [], []
+        for column, value in (("f.sector", sector), ("f.tenant", tenant), ("f.priority", priority), ("f.role", role)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                params.append(value)
+        if keyword:
+            where.append("f.step_key LIKE ?")
+            params.append(f"%{step_key(keyword)}%")
+        if max_payback_months is not None:
+            where.append("f.payback_months <= ?")
+            params.append(max_payback_months)
+        if min_savings is not None:
+            where.append("f.savings_sgd >= ?")
+            params.append(min_savings)
+        sql = (
+            "SELECT f.report_id, f.tenant, f.sector, r.file_path, f.step, f.role, f.issue, f.impact, "
+            "f.idp_suggestion, f.priority, f.savings_sgd, f.payback_months "
+            "FROM step_facts f JOIN reports r USING (report_id)"
+            + (f" WHERE {' AND '.join(where)}" if where else "")
+            + " ORDER BY f.savings_sgd IS NULL, f.savings_sgd DESC LIMIT ?"
+        )
+        return [dict(row) for row in self._conn().execute(sql, (*params, limit))]
+
+    def savings_by(self, group: str = "tenant", sector: Optional[str] = None, tenant: Optional[str] = None) -> list:
+        """
+        Total monthly savings per tenant or per sector, optionally within one
+        sector and/or tenant.
+        Returns:
+          [ {<group>, "reports", "total_monthly_savings"}, ... ] largest first.
+        """
+        try:
+            column = GROUP_COLUMNS[group]
+        except KeyError:
+            raise ValueError(f"Unknown group '{group}', expected one of {sorted(GROUP_COLUMNS)}") from None
+        where, params = [], []
+        for name, value in (("sector", sector), ("tenant", tenant)):
+            if value:
+                where.append(f"{name} = ?")
+                params.append(value)
+        sql = (
+            f"SELECT {column}, COUNT(*) AS reports, ROUND(SUM(total_monthly_savings), 2) AS total_monthly_savings "
+            "FROM reports" + (f" WHERE {' AND '.join(where)}" if where else "") +
+            f" GROUP BY {column} ORDER BY total_monthly_savings DESC"
+        )
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def query(self, sql: str, params=()) -> list:
+        """
+        Runs a read-only SQL query over `reports` / `step_facts`.
+        """
+        conn = self._conn()
+        conn.execute("PRAGMA query_only=ON")
+        try:
+            return [dict(row) for row in conn.execute(sql, params)]
+        finally:
+            conn.execute("PRAGMA query_only=OFF")
+
+    def stats(self) -> dict:
+        conn = self._conn()
+        return {
+            "reports": conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0],
+            "steps": conn.execute("SELECT COUNT(*) FROM step_facts").fetchone()[0],
+            "path": str(self.path),
+        }
+
+
+def index_batch_results(store: "AnalyticsStore", results_path: str) -> int:
+    """
+    Indexes the "ok" records of a BatchRunner JSONL output file; returns how many.
+    """
+    count = 0
+    with open(results_path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn record
+            if record.get("status") != "ok":
+                continue
+            store.add_report(
+                record["result"],
+                sector=record.get("sector") or "Retail",
+                tenant=record.get("tenant") or DEFAULT_TENANT,
+                file_path=record.get("file_path"),
+            )
+            count += 1
+    return count
+
+
+# Shared store fed by the batch runner, the API server and api/main.py
+analytics_store = AnalyticsStore()
@@ -0,0 +1,230 @@
+import json
+import sys
+from array import array
+from typing import Optional
+
+from orchestrators.pipeline_types import Benchmark, Issue, PipelineReport, ProcessStep, ROIEntry
+
+try:
+    import msgpack
+except ImportError:  # optional dependency: fall back to compact JSON
+    msgpack = None
+
+# —————————————————————————————
+# Compact representation of pipeline artifacts
+# Every string in a report (step text, roles, issues, IDP suggestions,
+# priorities) is stored once in a string table and referenced by ID from
+# columnar arrays, so a step that appears in the process map, the issues,
+# the benchmarks and the ROI rows is stored once instead of four times.
+# Serialized with msgpack when installed: numeric columns are written as raw
+# little-endian buffers and read back as memoryviews over the payload
+# (zero-copy). Without msgpack the same structure is written as JSON.
+# Used for the runs kept by orchestrators.incremental.RunStore and for
+# finished results held by the API server (pack_result/unpack_result).
+# —————————————————————————————
+
+FORMAT = "msgpack" if msgpack is not None else "json"
+SUFFIX = ".msgpack" if msgpack is not None else ".json"
+LITTLE_ENDIAN = sys.byteorder == "little"
+REPORT_KEYS = ("process_map", "issues", "benchmarks", "roi", "total_monthly_savings", "idp_alignment_summary")
+
+
+def dumps(obj) -> bytes:
+    """
+    Serializes plain data (dicts, lists, str, numbers, bytes) with msgpack, or JSON without it.
+    """
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes):
+    """
+    Inverse of dumps(); also reads JSON written before msgpack was installed.
+    """
+    if data[:1] in (b"{", b"["):
+        return json.loads(data)
+    if msgpack is None:
+        raise RuntimeError("msgpack payload found but msgpack is not installed")
+    return msgpack.unpackb(data, raw=False)
+
+
+class StringTable:
+    __slots__ = ("strings", "_ids")
+
+    def __init__(self, strings=()):
+        self.strings = []
+        self._ids = {}
+        for text in strings:
+            self.id(text)
+
+    def id(self, text: str) -> int:
+        """
+        Returns the ID of `text`, adding it on first sight.
+        """
+        sid = self._ids.get(text)
+        if sid is None:
+            sid = self._ids[text] = len(self.strings)
+            self.strings.append(sys.intern(text))
+        return sid
+
+    def __getitem__(self, sid: int) -> str:
+        return self.strings[sid]
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+
+def pack_column(values) -> object:
+    # Numeric column -> raw little-endian buffer (msgpack) or list (JSON)
+    if msgpack is None:
+        return list(values)
+    if not LITTLE_ENDIAN:
+        values = array(getattr(values, "typecode", None) or values.format, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def unpack_column(data, typecode: str):
+    if isinstance(data, list):
+        return array(typecode, data)
+    if LITTLE_ENDIAN:
+        return memoryview(data).cast(typecode)  # zero-copy view over the payload
+    values = array(typecode)
+    values.frombytes(data)
+    values.byteswap()
+    return values
+
+
+class CompactReport:
+    """
+    Columnar, ID-referenced form of a PipelineReport.
+    Each table is a dict of equal-length columns; string columns hold IDs
+    into `strings`, `order` and the ROI figures are numeric.
+    """
+
+    __slots__ = ("strings", "process_map", "issues", "benchmarks", "roi", "total_monthly_savings", "idp_alignment_summary")
+
+    # table -> ((column, kind), ...); kind "s" = string ID, "i" = int32, "d" = float64
+    SCHEMA = {
+        "process_map": (("order", "i"), ("step", "s"), ("role", "s")),
+        "issues": (("step", "s"), ("issue", "s"), ("impact", "s")),
+        "benchmarks": (("step", "s"), ("idp_suggestion", "s"), ("priority", "s")),
+        "roi": (("step", "s"), ("estimated_savings_SGD", "d"), ("payback_months", "d")),
+    }
+    RECORDS = {"process_map": ProcessStep, "issues": Issue, "benchmarks": Benchmark, "roi": ROIEntry}
+
+    def __init__(self, strings, tables: dict, total_monthly_savings: float, idp_alignment_summary: int):
+        self.strings = strings
+        for name in self.SCHEMA:
+            setattr(self, name, tables[name])
+        self.total_monthly_savings = total_monthly_savings
+        self.idp_alignment_summary = idp_alignment_summary
+
+    @classmethod
+    def from_report(cls, report: PipelineReport, table: Optional[StringTable] = None) -> "CompactReport":
+        """
+        Args:
+          table: String table to add to, e.g. one already holding other
+            strings of the same artifact.
+        """
+        table = table if table is not None else StringTable()
+        tables = {}
+        for name, columns in cls.SCHEMA.items():
+            records = getattr(report, name)
+            tables[name] = {
+                column: array(
+                    "i" if kind == "s" else kind,
+                    (table.id(getattr(r, column)) if kind == "s" else getattr(r, column) for r in records),
+                )
+                for column, kind in columns
+            }
+        return cls(table, tables, report.total_monthly_savings, table.id(report.idp_alignment_summary))
+
+    def to_report(self) -> PipelineReport:
+        strings = self.strings
+        tables = {}
+        for name, columns in self.SCHEMA.items():
+            cols = getattr(self, name)
+            values = [
+                [strings[i] for i in cols[column]] if kind == "s" else list(cols[column])
+                for column, kind in columns
+            ]
+            tables[name] = [self.RECORDS[name](*row) for row in zip(*values)]
+        return PipelineReport(
+            **tables,
+            total_monthly_savings=self.total_monthly_savings,
+            idp_alignment_summary=strings[self.idp_alignment_summary],
+        )
+
+    def to_dict(self) -> dict:
+        return self.to_report().to_dict()
+
+    def to_obj(self) -> dict:
+        """
+        Plain data for dumps(): the string table plus packed columns.
+        """
+        return {
+            "strings": self.strings.strings,
+            "tables": {
+                name: {column: pack_column(getattr(self, name)[column]) for column, _ in columns}
+                for name, columns in self.SCHEMA.items()
+            },
+            "total_monthly_savings": self.total_monthly_savings,
+            "idp_alignment_summary": self.idp_alignment_summary,
+        }
+
+    @classmethod
+    def from_obj(cls, obj: dict) -> "CompactReport":
+        tables = {
+            name: {
+                column: unpack_column(obj["tables"][name][column], "i" if kind == "s" else kind)
+                for column, kind in columns
+            }
+            for name, columns in cls.SCHEMA.items()
+        }
+        return cls(StringTable(obj["strings"]), tables, obj["total_monthly_savings"], obj["idp_alignment_summary"])
+
+    def to_bytes(self) -> bytes:
+        return dumps(self.to_obj())
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "CompactReport":
+        return cls.from_obj(loads(data))
+
+
+def report_from_dict(data: dict) -> PipelineReport:
+    """
+    Inverse of PipelineReport.to_dict(); raises KeyError/TypeError on other shapes.
+    """
+    return PipelineReport(
+        **{name: [record(**r) for r in data[name]] for name, record in CompactReport.RECORDS.items()},
+        total_monthly_savings=data["total_monthly_savings"],
+        idp_alignment_summary=data["idp_alignment_summary"],
+    )
+
+
+def pack_result(result: dict) -> bytes:
+    """
+    Serializes a pipeline result dict: the report in CompactReport form, any
+    other keys (revision, trace_summary, ...) as plain data. Results that are
+    not report-shaped are written as they are.
+    """
+    try:
+        report = CompactReport.from_report(report_from_dict(result))
+    except (KeyError, TypeError):
+        return dumps(result)
+    extra = {k: v for k, v in result.items() if k not in REPORT_KEYS}
+    return dumps({"compact_report": report.to_obj(), "extra": extra})
+
+
+def unpack_result(data: bytes) -> dict:
+    """
+    Inverse of pack_result().
+    """
+    obj = loads(data)
+    if not isinstance(obj, dict) or "compact_report" not in obj:
+        return obj
+    result = CompactReport.from_obj(obj["compact_report"]).to_dict()
+    result.update(obj["extra"])
+    return result
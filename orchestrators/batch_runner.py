@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from orchestrators.pipeline_types import tenant_of
+from tools.tracing import payload_size, tracer
+
+# —————————————————————————————
+# Batch / multi-SOP analysis
+# Runs the analysis pipeline for many SOPs through a bounded asyncio worker
+# pool, streams one JSONL record per SOP as soon as it finishes, and can
+# resume a partially completed batch from its output file.
+# —————————————————————————————
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt", ".jpg", ".jpeg", ".png"}
+
+
+class StageRateLimiter:
+    """
+    Thread-safe per-stage rate limiter. `limits` maps a stage name to the
+    maximum number of calls per second across all workers; stages without
+    a limit are not throttled.
+    """
+
+    def __init__(self, limits: Optional[dict] = None):
+        self.limits = dict(limits or {})
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, stage: str) -> None:
+        rate = self.limits.get(stage)
+        if not rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(stage, now))
+            self._next_slot[stage] = slot + 1.0 / rate
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def load_jobs(source: str, sector: Optional[str] = None, business_context: Optional[dict] = None) -> list:
+    """
+    Args:
+      source: A directory of SOP files, or a manifest (.json list or .jsonl)
+        whose entries hold `file_path` and optionally `id`, `sector`, `business_context`.
+      sector: Default sector for entries that don't specify one.
+      business_context: Default business context for entries that don't specify one.
+    Returns:
+      List of job dicts: { "id", "file_path", "sector", "business_context" }
+    """
+    path = Path(source)
+    if path.is_dir():
+        entries = [
+            {"id": str(p.relative_to(path)), "file_path": str(p)}
+            for p in sorted(path.rglob("*"))
+            if p.is_file() and p.suffix.lower() in SUPPORTED_EXTENSIONS
+        ]
+    elif path.suffix == ".jsonl":
+        with open(path, "r", encoding="utf-8") as fh:
+            entries = [json.loads(line) for line in fh if line.strip()]
+    else:
+        with open(path, "r", encoding="utf-8") as fh:
+            entries = json.load(fh)
+
+    jobs = []
+    for entry in entries:
+        file_path = entry["file_path"]
+        if path.is_file() and not Path(file_path).is_absolute():
+            file_path = str(path.parent / file_path)
+        jobs.append({
+            "id": entry.get("id") or entry["file_path"],
+            "file_path": file_path,
+            "sector": entry.get("sector") or sector,
+            "business_context": entry.get("business_context") or business_context or {},
+        })
+    return jobs
+
+
+def completed_job_ids(output_path: str) -> set:
+    """
+    Returns the ids of jobs that already finished successfully in `output_path`.
+    """
+    done = set()
+    path = Path(output_path)
+    if not path.exists():
+        return done
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # torn final line from an interrupted run
+            if record.get("status") == "ok":
+                done.add(record["id"])
+    return done
+
+
+def _ends_with_newline(path: str) -> bool:
+    with open(path, "rb") as fh:
+        fh.seek(-1, 2)
+        return fh.read(1) == b"\n"
+
+
+def run_orchestrator(params: dict, limiter: StageRateLimiter) -> dict:
+    """
+    Default analysis function: one call to the LLM orchestrator.
+    """
+    from orchestrators.agent_calls import record_usage
+    from orchestrators.business_process_agent import business_process_agent
+    from orchestrators.output_schemas import OutputValidationError, check_output, output_stats
+
+    limiter.acquire("orchestrator")
+    with tracer.span(business_process_agent.name, kind="agent", model=business_process_agent.model) as span:
+        result = business_process_agent.run(params)
+        content = result.content
+        span.set(input_bytes=payload_size(params), output_bytes=payload_size(content))
+        record_usage(span, result, params, content)
+        # Repaired locally; a re-run of the whole orchestrator is left to the caller
+        report, repairs, errors = check_output(business_process_agent.name, content)
+        output_stats.add(business_process_agent.name, repaired=bool(repairs), failed=bool(errors))
+        span.set(output_repaired=int(bool(repairs)))
+    if errors:
+        raise OutputValidationError(business_process_agent.name, errors)
+    return report
+
+
+class BatchRunner:
+    def __init__(
+        self,
+        analyse: Callable[[dict, StageRateLimiter], dict] = run_orchestrator,
+        concurrency: int = 4,
+        rate_limits: Optional[dict] = None,
+        analytics=None,
+    ):
+        """
+        Args:
+          analytics: AnalyticsStore that indexes every successful report, or None.
+        """
+        self.analyse = analyse
+        self.concurrency = max(1, concurrency)
+        self.limiter = StageRateLimiter(rate_limits)
+        self.analytics = analytics
+
+    def _run_one(self, job: dict) -> dict:
+        params = {k: job[k] for k in ("file_path", "sector", "business_context")}
+        start = time.perf_counter()
+        with tracer.run(run_id=str(job["id"]), file_path=job["file_path"], sector=job["sector"]) as trace:
+            try:
+                result = self.analyse(params, self.limiter)
+                record = {"id": job["id"], "status": "ok", "result": result}
+            except Exception as exc:  # one bad SOP must not stop the batch
+                record = {"id": job["id"], "status": "error", "error": f"{type(exc).__name__}: {exc}"}
+        record["file_path"] = job["file_path"]
+        record["sector"] = job["sector"]
+        record["tenant"] = tenant_of(job["business_context"])
+        if self.analytics is not None and record["status"] == "ok":
+            try:
+                self.analytics.add_report(record["result"], job["sector"], record["tenant"], job["file_path"])
+            except Exception as exc:  # the analysis itself succeeded
+                record["analytics_error"] = f"{type(exc).__name__}: {exc}"
+        record["elapsed_s"] = round(time.perf_counter() - start, 3)
+        record["trace_summary"] = trace.summary()
+        return record
+
+    async def run(self, jobs: Iterable[dict], output_path: str, resume: bool = False) -> dict:
+        """
+        Args:
+          jobs: Job dicts from `load_jobs`.
+          output_path: JSONL file receiving one record per finished job.
+          resume: Skip jobs already recorded as "ok" in `output_path` and append.
+        Returns:
+          { "submitted": int, "skipped": int, "ok": int, "error": int, "elapsed_s": float,
+            "trace_summary": {...} }  # per-stage/tool/agent aggregate over the batch
+        """
+        done = completed_job_ids(output_path) if resume else set()
+        jobs = list(jobs)
+        pending = [job for job in jobs if job["id"] not in done]
+        summary = {"submitted": len(pending), "skipped": len(jobs) - len(pending), "ok": 0, "error": 0}
+
+        queue = asyncio.Queue()
+        for job in pending:
+            queue.put_nowait(job)
+
+        start = time.perf_counter()
+        with tracer.batch() as batch, open(output_path, "a" if resume else "w", encoding="utf-8") as out:
+            if resume and out.tell() and not _ends_with_newline(output_path):
+                out.write("\n")  # terminate a torn record before appending
+
+            async def worker():
+                while True:
+                    try:
+                        job = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    record = await asyncio.to_thread(self._run_one, job)
+                    out.write(json.dumps(record) + "\n")
+                    out.flush()
+                    summary[record["status"]] += 1
+
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+
+        summary["elapsed_s"] = round(time.perf_counter() - start, 3)
+        summary["trace_summary"] = batch.summary()
+        return summary
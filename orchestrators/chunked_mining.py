@@ -0,0 +1,117 @@
+import contextvars
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from orchestrators.agent_calls import call_agent
+from orchestrators.pipeline_types import ProcessStep
+from tools.step_extraction import step_key
+
+# —————————————————————————————
+# Map-reduce process mining for long SOPs
+# Map: the extracted steps are assigned to the parser chunks they appear in
+# (a step cut by a chunk boundary is whole in the next chunk thanks to the
+# overlap; a step seen in an overlap belongs to the first chunk only), the
+# per-chunk lists are packed into prompt-sized batches and ProcessMiningAgent
+# runs on every batch concurrently.
+# Reduce: batch outputs are concatenated in document order, with repeats at
+# batch joins dropped (by normalized step text), and renumbered.
+# —————————————————————————————
+
+BATCH_MAX_STEPS = 20  # ProcessMiningAgent's per-prompt step limit
+MAP_WORKERS = int(os.environ.get("BPA_MAP_WORKERS", 16))
+
+
+def assign_steps_to_chunks(steps: list, chunks: list) -> list:
+    """
+    Args:
+      steps: Ordered steps extracted from the full document text.
+      chunks: Ordered, overlapping text chunks from LangChainParserTool.
+    Returns:
+      One list of steps per chunk; every step appears exactly once, in order.
+    """
+    if not chunks:
+        return [list(steps)]
+    groups = [[] for _ in chunks]
+    current = 0
+    for step in steps:
+        # Chunks are in document order, so the search only moves forward
+        for idx in range(current, len(chunks)):
+            if step in chunks[idx]:
+                current = idx
+                break
+        # Not found verbatim (e.g. a step longer than the overlap): keep it
+        # with the chunk of the step before it
+        groups[current].append(step)
+    return groups
+
+
+def pack_batches(groups: list, max_steps: int = BATCH_MAX_STEPS) -> list:
+    """
+    Packs consecutive chunk groups into batches of at most `max_steps`
+    steps, splitting oversized groups.
+    """
+    batches, batch = [], []
+    for group in groups:
+        for start in range(0, len(group), max_steps):
+            part = group[start:start + max_steps]
+            if len(batch) + len(part) > max_steps:
+                batches.append(batch)
+                batch = []
+            batch.extend(part)
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def merge_process_maps(outputs: list) -> list:
+    """
+    Args:
+      outputs: Per-batch agent outputs ({"process_map": [...]}) in document order.
+    Returns:
+      One de-duplicated list of ProcessStep, numbered in document order.
+    """
+    merged, last_key = [], None
+    for output in outputs:
+        entries = output.get("process_map", [])
+        entries = sorted(entries, key=lambda p: int(p.get("order", 0) or 0))  # stable for missing orders
+        for entry in entries:
+            key = step_key(entry["step"])
+            # Steps legitimately repeat across an SOP; only back-to-back copies are merged
+            if not key or key == last_key:
+                continue
+            last_key = key
+            merged.append(ProcessStep(
+                order=len(merged) + 1, step=sys.intern(entry["step"]), role=sys.intern(entry.get("role", "staff"))
+            ))
+    return merged
+
+
+def mine_chunked(agent, steps: list, chunks: list, limiter=None, workers: int = MAP_WORKERS) -> list:
+    """
+    Args:
+      agent: ProcessMiningAgent (or a stand-in exposing `run(payload).content`).
+      steps: Ordered steps extracted from the full document text.
+      chunks: Overlapping text chunks the steps were extracted from.
+      limiter: Optional StageRateLimiter; each batch call counts as one
+        "process_mining" call.
+      workers: Maximum number of concurrent agent calls.
+    Returns:
+      The merged process map as a list of ProcessStep.
+    """
+    batches = pack_batches(assign_steps_to_chunks(steps, chunks))
+
+    def mine_batch(index: int, batch: list) -> dict:
+        if limiter is not None:
+            limiter.acquire("process_mining")
+        payload = {"steps": batch, "chunk": {"index": index, "count": len(batches)}}
+        return call_agent(agent, payload)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as pool:
+        # Each call runs in a copy of this context so its span nests under the stage
+        futures = [
+            pool.submit(contextvars.copy_context().run, mine_batch, i, batch)
+            for i, batch in enumerate(batches)
+        ]
+        outputs = [f.result() for f in futures]
+    return merge_process_maps(outputs)
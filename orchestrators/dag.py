@@ -0,0 +1,91 @@
+import asyncio
+import inspect
+import time
+from typing import Callable, Iterable, Optional
+
+# —————————————————————————————
+# Dependency-graph (DAG) executor
+# Each node starts as soon as all of its dependencies have finished, so
+# independent stages and prefetches overlap. Synchronous node functions run
+# in worker threads (with the caller's context, so tracing spans nest
+# correctly); coroutine functions are awaited directly.
+# —————————————————————————————
+
+
+class DAGExecutor:
+    def __init__(self, on_event: Optional[Callable[[dict], None]] = None):
+        self.nodes = {}
+        self.on_event = on_event
+
+    def add(self, name: str, fn: Callable, deps: Iterable[str] = ()) -> "DAGExecutor":
+        """
+        Registers a node. `fn` is called with one keyword argument per
+        dependency, holding that dependency's result.
+        """
+        if name in self.nodes:
+            raise ValueError(f"Duplicate DAG node: {name}")
+        self.nodes[name] = (fn, tuple(deps))
+        return self
+
+    def _validate(self) -> None:
+        for name, (_, deps) in self.nodes.items():
+            missing = [d for d in deps if d not in self.nodes]
+            if missing:
+                raise ValueError(f"Node '{name}' depends on unknown nodes: {missing}")
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Cycle detected at node '{name}'")
+            visiting.add(name)
+            for dep in self.nodes[name][1]:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.nodes:
+            visit(name)
+
+    def _emit(self, **event) -> None:
+        if self.on_event is not None:
+            self.on_event(event)
+
+    async def run(self) -> dict:
+        """
+        Returns:
+          { node_name: result } for every node. The first failure cancels
+          all still-running nodes and is re-raised.
+        """
+        self._validate()
+        tasks = {}
+
+        async def run_node(name):
+            fn, deps = self.nodes[name]
+            inputs = {}
+            for dep in deps:
+                inputs[dep] = await tasks[dep]
+            self._emit(stage=name, status="started")
+            start = time.perf_counter()
+            try:
+                if inspect.iscoroutinefunction(fn):
+                    result = await fn(**inputs)
+                else:
+                    result = await asyncio.to_thread(fn, **inputs)
+            except Exception as exc:
+                self._emit(stage=name, status="failed", error=f"{type(exc).__name__}: {exc}")
+                raise
+            self._emit(stage=name, status="finished", elapsed_s=round(time.perf_counter() - start, 3))
+            return result
+
+        for name in self.nodes:
+            tasks[name] = asyncio.ensure_future(run_node(name))
+        try:
+            await asyncio.gather(*tasks.values())
+        except Exception:
+            for task in tasks.values():
+                task.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        return {name: task.result() for name, task in tasks.items()}
@@ -0,0 +1,476 @@
+import asyncio
+import re
+import sys
+
+from orchestrators.agent_calls import call_agent
+from orchestrators.chunked_mining import BATCH_MAX_STEPS, mine_chunked
+from orchestrators.dag import DAGExecutor
+from orchestrators.pipeline_types import (
+    DEFAULT_TENANT,
+    Benchmark,
+    IngestionResult,
+    Issue,
+    PipelineReport,
+    ProcessStep,
+    ROIEntry,
+    tenant_of,
+)
+from tools.document_tools import LangChainParserTool, OCRTool
+from tools.anomaly_model import get_anomaly_detector
+from tools.idp_store import IDPRetrievalTool
+from tools.ocr_routing import detect_format
+from tools.pattern_tools import AnomalyDetectionTool, SequenceClusteringTool
+from tools.roi_calculator import ROICalculatorTool
+from tools.sector_pool import DEFAULT_ROI_PARAMS, sector_pool
+from tools.step_extraction import extract_steps, step_key
+from tools.step_features import MANUAL_KEYWORDS
+from tools.step_library import step_library
+from tools.tracing import record, tracer
+
+# —————————————————————————————
+# Deterministic fast-path pipeline
+# Runs the tool-only stages (ingestion, clustering, anomaly detection, ROI)
+# directly in code and calls LLM sub-agents only where reasoning is needed
+# (role assignment and IDP benchmarking). Produces the same report schema
+# as the BusinessProcessAgent orchestrator.
+#
+# Stages run as a dependency graph rather than a fixed sequence:
+#
+#   sector_prefetch ─────────────────────> idp_retrieval ──┐
+#   ingestion ─┬─────────────────────────> idp_retrieval   │
+#              └─> process_mining ─┬─────> benchmarking <──┘
+#                                  └─> pattern_detection ─┬──> benchmarking ──> roi_estimation
+#                                                         └───────────────────> roi_estimation
+#
+# IDP retrieval works on the ingested steps, so it overlaps with the
+# process-mining LLM call; pattern detection runs on the mined process map,
+# so issue steps match the process_map text benchmarking joins on and the
+# anomaly detector sees roles. Sector resources (IDP index, step/anomaly
+# models) are prefetched as soon as the request arrives.
+# Sector resources come from the shared warm pool (tools/sector_pool.py):
+# pattern detection also uses the sector's step model and the compliance
+# rules of the tenant's regimes, ROI estimation the sector's ROI defaults.
+# Steps that near-duplicate a canonical step of the step library
+# (tools/step_library.py) take the role, sector benchmark and task time the
+# tenant's earlier runs learned for it; only new steps are sent to the LLM
+# agents. Pattern detection
+# stays per document, since clusters and anomalies depend on the whole SOP.
+# —————————————————————————————
+
+MAX_PROCESS_STEPS = 50
+MAX_PATTERN_STEPS = 20
+MAX_ISSUES = 10
+MAX_BENCHMARKS = 10
+MAX_ROI_ITEMS = 10
+
+PRIORITY_FEASIBILITY = {"High": 0.9, "Medium": 0.7, "Low": 0.5}
+PRIORITY_RANK = {"High": 0, "Medium": 1, "Low": 2}
+# Rule-based issue kinds, most severe first; compliance issues rank 2
+ISSUE_RANK = {"High manual repetition": 0, "Rare one-off step": 1, "Manual process": 3}
+
+
+class FastPipeline:
+    def __init__(
+        self, process_mining_agent=None, benchmarking_agent=None, limiter=None, map_reduce=None, pool=None,
+        library=None,
+    ):
+        """
+        Args:
+          map_reduce: Mine steps per chunk concurrently (True), in one call
+            (False), or only when the SOP exceeds one prompt's step limit (None).
+          pool: Sector warm pool (defaults to the shared one).
+          library: Canonical step library (defaults to the shared one).
+        """
+        if process_mining_agent is None:
+            from business_process_agent.process_mining_agent import process_mining_agent
+        if benchmarking_agent is None:
+            from business_process_agent.benchmarking_agent import benchmarking_agent
+        self.process_mining_agent = process_mining_agent
+        self.benchmarking_agent = benchmarking_agent
+        self.limiter = limiter
+        self.map_reduce = map_reduce
+        self.ocr = OCRTool()
+        self.parser = LangChainParserTool()
+        self.clustering = SequenceClusteringTool()
+        self.anomaly = AnomalyDetectionTool()
+        self.roi_calculator = ROICalculatorTool()
+        self.idp_retrieval = IDPRetrievalTool()
+        self.sector_pool = pool or sector_pool
+        self.step_library = library or step_library
+
+    def _stage(self, stage: str):
+        # Rate-limit, then open a trace span for the stage
+        if self.limiter is not None:
+            self.limiter.acquire(stage)
+        return tracer.span(stage, kind="stage")
+
+    # 1) Document ingestion — tools only
+    def ingest(self, file_path: str) -> IngestionResult:
+        if detect_format(file_path) == "image":
+            raw_text, chunks = self.ocr.run(file_path), []
+        else:
+            # Scanned PDF pages are OCR'd by the parser's page router
+            parsed = self.parser.parse(file_path)
+            raw_text, chunks = parsed["text"], parsed["chunks"]
+        if not raw_text.strip():
+            raise ValueError(f"No text could be extracted from {file_path}")
+        # Interned so every later record refers to the same step string objects
+        return IngestionResult(raw_text=raw_text, chunks=chunks, steps=[sys.intern(s) for s in extract_steps(raw_text)])
+
+    # 2) Process mining — LLM role assignment
+    def mine(self, ingestion: IngestionResult, tenant: str = DEFAULT_TENANT) -> list:
+        """
+        Assigns the roles the tenant's step library holds to known steps and
+        mines the rest.
+        """
+        map_reduce = self.map_reduce
+        if map_reduce is None:
+            map_reduce = len(ingestion.steps) > BATCH_MAX_STEPS
+        canonical = self.step_library.match(ingestion.steps, tenant)
+        self.step_library.record_hits(canonical)
+        pending = [s for s, c in zip(ingestion.steps, canonical) if c is None or not c.role]
+        record(library_steps=len(ingestion.steps) - len(pending), steps_new=len(pending))
+        if len(pending) == len(ingestion.steps):
+            process_map = self._mine_steps(ingestion, map_reduce)
+            self.step_library.learn_roles(tenant, process_map)
+            return process_map
+
+        mined = []
+        if pending:
+            mined = self.mine_aligned(
+                pending,
+                lambda subset: self._mine_steps(IngestionResult(ingestion.raw_text, ingestion.chunks, subset), map_reduce),
+            )
+            self.step_library.learn_roles(tenant, [p for p in mined if p is not None])
+        mined_by_step = dict(zip(pending, mined))
+        process_map = []
+        for step, c in zip(ingestion.steps, canonical):
+            role = c.role if step not in mined_by_step else getattr(mined_by_step[step], "role", None)
+            if role is not None:
+                process_map.append(ProcessStep(order=len(process_map) + 1, step=step, role=sys.intern(role)))
+        return process_map if map_reduce else process_map[:MAX_PROCESS_STEPS]
+
+    def mine_aligned(self, steps: list, mine_steps) -> list:
+        """
+        Mines `steps` with `mine_steps(steps) -> [ProcessStep]` and returns one
+        ProcessStep (or None) per step. Steps the agent paraphrased, so that no
+        entry matches their text, are mined once more on their own; any still
+        missing are counted as `steps_dropped` on the stage span.
+        """
+        aligned = align_process_map(steps, mine_steps(steps))
+        missing = [s for s, p in zip(steps, aligned) if p is None]
+        if missing:
+            retried = dict(zip(missing, align_process_map(missing, mine_steps(missing))))
+            aligned = [p if p is not None else retried[s] for s, p in zip(steps, aligned)]
+        record(steps_remined=len(missing), steps_dropped=sum(p is None for p in aligned))
+        return aligned
+
+    def _mine_steps(self, ingestion: IngestionResult, map_reduce: bool) -> list:
+        if map_reduce:
+            # Long SOPs: every step is covered, in chunk-sized prompts
+            return mine_chunked(self.process_mining_agent, ingestion.steps, ingestion.chunks, self.limiter)
+        output = call_agent(self.process_mining_agent, {"steps": ingestion.steps})
+        return [
+            ProcessStep(order=int(p.get("order", i + 1)), step=sys.intern(p["step"]), role=sys.intern(p.get("role", "staff")))
+            for i, p in enumerate(output.get("process_map", [])[:MAX_PROCESS_STEPS])
+        ]
+
+    # Prefetch — warm sector resources while ingestion runs
+    def prefetch_sector(self, sector: str):
+        get_anomaly_detector()
+        return self.sector_pool.get(sector)
+
+    # 3) Pattern detection — clustering + anomaly tools, rule-based issues
+    def detect_patterns(self, process_map: list, step_model=None, compliance_rules=()) -> list:
+        """
+        Args:
+          process_map: Mined ProcessStep records.
+          step_model: Sector step model (defaults to the shared corpus model).
+          compliance_rules: (regime, pattern, issue, impact) tuples of the
+            tenant's compliance regimes; matching steps are flagged.
+        Long process maps are analysed in windows of MAX_PATTERN_STEPS steps,
+        each contributing up to MAX_ISSUES issues, so the whole manual is covered.
+        """
+        if len(process_map) < 2:
+            return []
+        # Anomalies are scored over the whole map in one pass, clusters per window
+        anomalies = set(self.anomaly.run([p.to_dict() for p in process_map])["anomalies"])
+        issues = []
+        for window in pattern_windows(process_map):
+            issues.extend(self._detect_window(window, anomalies, step_model, compliance_rules))
+        return issues
+
+    def _detect_window(self, process_map: list, anomalies: set, step_model=None, compliance_rules=()) -> list:
+        steps = [p.step for p in process_map]
+        clusters = self.clustering.run(steps, num_clusters=min(5, len(steps)), model=step_model)["clusters"]
+
+        repeated_manual = set()
+        for cluster in clusters:
+            manual = [s for s in cluster["steps"] if MANUAL_KEYWORDS.search(s)]
+            if len(manual) >= 2:
+                repeated_manual.update(manual)
+
+        issues = []
+        for step in steps:
+            rule = next((r for r in compliance_rules if r[1].search(step)), None)
+            if step in repeated_manual:
+                issues.append(Issue(step, "High manual repetition", "Time-consuming and error-prone"))
+            elif step in anomalies:
+                issues.append(Issue(step, "Rare one-off step", "Prone to human error"))
+            elif rule is not None:
+                issues.append(Issue(step, rule[2], rule[3]))
+            elif MANUAL_KEYWORDS.search(step):
+                issues.append(Issue(step, "Manual process", "Slows down the workflow"))
+        return issues[:MAX_ISSUES]
+
+    # 4) Benchmarking — LLM comparison against the sector IDP
+    def retrieve_idp(self, sector: str, steps: list) -> list:
+        # A few relevant IDP passages per step instead of the full document
+        index = self.sector_pool.get(sector).idp_index
+        if index is None:
+            return []
+        return self.idp_retrieval.run(sector, steps, top_k=2, index=index)["passages"]
+
+    def benchmark(
+        self, sector: str, process_map: list, issues: list, passages: list = None, tenant: str = DEFAULT_TENANT
+    ) -> list:
+        """
+        Re-uses the tenant's library benchmarks of this sector for known issue
+        steps, as long as the sector's IDP index hasn't been rebuilt since;
+        the agent only sees the remaining issues, or isn't called at all.
+        """
+        idp_version = self.idp_retrieval.store.version(sector)
+        canonical = self.step_library.match([i.step for i in issues], tenant)
+        known = {}
+        for i, c in zip(issues, canonical):
+            found = c.benchmark(sector, idp_version) if c is not None else None
+            if found is not None:
+                known[step_key(i.step)] = Benchmark(i.step, *found)
+        record(benchmarks_reused=len(known))
+        if not known:
+            benchmarks = self._benchmark(sector, process_map, issues, passages)
+            self.step_library.learn_benchmarks(tenant, sector, benchmarks, issues, idp_version)
+            return benchmarks
+
+        pending = [i for i in issues if step_key(i.step) not in known]
+        fresh = []
+        if pending:
+            pending_keys = {step_key(i.step) for i in pending}
+            process_map = [p for p in process_map if step_key(p.step) in pending_keys]
+            if passages is not None:
+                passages = [p for p in passages if step_key(p["step"]) in pending_keys]
+            fresh = self._benchmark(sector, process_map, pending, passages)
+            self.step_library.learn_benchmarks(tenant, sector, fresh, pending, idp_version)
+        fresh_by_key = {step_key(b.step): b for b in fresh}
+        benchmarks = [known.get(step_key(i.step)) or fresh_by_key.pop(step_key(i.step), None) for i in issues]
+        benchmarks = [b for b in benchmarks if b is not None] + list(fresh_by_key.values())
+        return benchmarks[:MAX_BENCHMARKS]
+
+    def _benchmark(self, sector: str, process_map: list, issues: list, passages: list = None) -> list:
+        if len(issues) > MAX_ISSUES:
+            # Issues from every window of a long manual: the most severe fit one prompt
+            issues = rank_issues(issues)[:MAX_ISSUES]
+        if len(process_map) > MAX_PROCESS_STEPS:
+            # Map-reduced long SOP: send the flagged steps, not the whole manual
+            issue_keys = {step_key(i.step) for i in issues}
+            process_map = [p for p in process_map if step_key(p.step) in issue_keys] or process_map[:MAX_PROCESS_STEPS]
+            if passages is not None:
+                sent = {step_key(p.step) for p in process_map}
+                passages = [p for p in passages if step_key(p["step"]) in sent]
+        payload = {
+            "sector": sector,
+            "process_map": [p.to_dict() for p in process_map],
+            "issues": [i.to_dict() for i in issues],
+        }
+        if passages is None:
+            passages = self.retrieve_idp(sector, payload["process_map"])
+        if passages:
+            payload["idp_passages"] = passages
+        output = call_agent(self.benchmarking_agent, payload)
+        return [
+            Benchmark(step=b["step"], idp_suggestion=b.get("idp_suggestion", ""), priority=b.get("priority", "Medium"))
+            for b in output.get("benchmarks", [])[:MAX_BENCHMARKS]
+        ]
+
+    # 5) ROI estimation — rule-based item construction + ROICalculatorTool
+    def estimate_roi(
+        self, issues: list, benchmarks: list, roi_params: dict = None, tenant: str = DEFAULT_TENANT
+    ) -> tuple:
+        roi_params = roi_params or DEFAULT_ROI_PARAMS
+        steps = [b.step for b in benchmarks] + [i.step for i in issues]
+        task_minutes = {
+            step_key(step): c.time_per_task_min
+            for step, c in zip(steps, self.step_library.match(steps, tenant))
+            if c is not None and c.time_per_task_min is not None
+        }
+        items = build_roi_items(issues, benchmarks, roi_params, task_minutes)
+        if not items:
+            return [], 0.0
+        self.step_library.learn_roi(tenant, items)
+        result = self.roi_calculator.run(items, hourly_cost=roi_params["hourly_cost"])
+        roi = sorted(result["roi"], key=lambda r: r["estimated_savings_SGD"], reverse=True)[:MAX_ROI_ITEMS]
+        total = round(sum(r["estimated_savings_SGD"] for r in roi), 2)
+        return [ROIEntry(**r) for r in roi], total
+
+    def run(self, params: dict, on_event=None) -> dict:
+        """
+        Args:
+          params: { "file_path": str, "sector": str, "business_context": dict }
+          on_event: Optional callback receiving per-stage progress events.
+        Returns:
+          Final report dict with process_map, issues, benchmarks, roi,
+          total_monthly_savings and idp_alignment_summary.
+        """
+        return asyncio.run(self.run_async(params, on_event))
+
+    async def run_async(self, params: dict, on_event=None) -> dict:
+        sector = params.get("sector") or "Retail"
+        file_path = params["file_path"]
+        business_context = params.get("business_context") or {}
+        tenant = tenant_of(business_context)
+
+        def staged(stage, fn):
+            def node(**inputs):
+                with self._stage(stage):
+                    return fn(**inputs)
+            return node
+
+        dag = DAGExecutor(on_event)
+        dag.add("sector_prefetch", staged("sector_prefetch", lambda: self.prefetch_sector(sector)))
+        dag.add("ingestion", staged("ingestion", lambda: self.ingest(file_path)))
+        dag.add("process_mining", staged("process_mining", lambda ingestion: self.mine(ingestion, tenant)), ["ingestion"])
+        dag.add(
+            "pattern_detection",
+            staged("pattern_detection", lambda process_mining, sector_prefetch: self.detect_patterns(
+                process_mining, sector_prefetch.step_model, sector_prefetch.rules_for(business_context)
+            )),
+            ["process_mining", "sector_prefetch"],
+        )
+        dag.add(
+            "idp_retrieval",
+            staged("idp_retrieval", lambda ingestion, sector_prefetch: self.retrieve_idp(sector, ingestion.steps)),
+            ["ingestion", "sector_prefetch"],
+        )
+        dag.add(
+            "benchmarking",
+            staged("benchmarking", lambda process_mining, pattern_detection, idp_retrieval: self.benchmark(
+                sector, process_mining, pattern_detection, idp_retrieval, tenant
+            )),
+            ["process_mining", "pattern_detection", "idp_retrieval"],
+        )
+        dag.add(
+            "roi_estimation",
+            staged("roi_estimation", lambda sector_prefetch, pattern_detection, benchmarking: self.estimate_roi(
+                pattern_detection, benchmarking, sector_prefetch.roi_for(business_context), tenant
+            )),
+            ["sector_prefetch", "pattern_detection", "benchmarking"],
+        )
+
+        with tracer.run(file_path=file_path, sector=sector, pipeline="fast"):
+            results = await dag.run()
+
+        roi, total = results["roi_estimation"]
+        report = PipelineReport(
+            process_map=results["process_mining"],
+            issues=results["pattern_detection"],
+            benchmarks=results["benchmarking"],
+            roi=roi,
+            total_monthly_savings=total,
+            idp_alignment_summary=summarize_alignment(sector, results["benchmarking"]),
+        )
+        return report.to_dict()
+
+
+def align_process_map(steps: list, process_map: list) -> list:
+    """
+    Returns one ProcessStep (or None) per extracted step.
+    """
+    if len(process_map) == len(steps):
+        return list(process_map)
+    by_key = {step_key(p.step): p for p in process_map}
+    return [by_key.get(step_key(s)) for s in steps]
+
+
+def pattern_windows(process_map: list) -> list:
+    """
+    Splits a process map into consecutive windows of MAX_PATTERN_STEPS steps;
+    a trailing single step joins the previous window.
+    """
+    windows = [process_map[i:i + MAX_PATTERN_STEPS] for i in range(0, len(process_map), MAX_PATTERN_STEPS)]
+    if len(windows) > 1 and len(windows[-1]) < 2:
+        windows[-2] = windows[-2] + windows.pop()
+    return windows
+
+
+def rank_issues(issues: list) -> list:
+    # Stable: equally severe issues keep their document order
+    return sorted(issues, key=lambda i: ISSUE_RANK.get(i.issue, 2))
+
+
+def estimate_task_minutes(step: str) -> float:
+    text = step.lower()
+    if re.search(r"\b(count|walk|inspect|audit)\b", text):
+        return 30.0
+    if re.search(r"\b(e-?mail|upload|save|submit|click)\b", text):
+        return 10.0
+    return 15.0
+
+
+def estimate_frequency(step: str, roi_params: dict = DEFAULT_ROI_PARAMS) -> int:
+    text = step.lower()
+    for keyword, per_month in roi_params["frequencies"]:
+        if keyword in text:
+            return per_month
+    return roi_params["default_frequency"]
+
+
+def build_roi_items(
+    issues: list, benchmarks: list, roi_params: dict = DEFAULT_ROI_PARAMS, task_minutes: dict = None
+) -> list:
+    """
+    Merges issues and benchmarks into ROICalculatorTool items, one per step,
+    with task frequencies from the sector's ROI defaults.
+    Args:
+      task_minutes: Known task times by step_key (from the step library);
+        frequencies are always read from the step itself, since near-duplicate
+        steps often differ only in "daily" / "weekly".
+    """
+    task_minutes = task_minutes or {}
+    priority = {step_key(b.step): b.priority for b in benchmarks}
+    issue_by_step = {step_key(i.step): i for i in issues}
+    items = []
+    seen = set()
+    for step in [b.step for b in benchmarks] + [i.step for i in issues]:
+        key = step_key(step)
+        if key in seen:
+            continue
+        seen.add(key)
+        issue = issue_by_step.get(key)
+        error_prone = issue is not None and re.search(r"manual|error", f"{issue.issue} {issue.impact}", re.I)
+        items.append({
+            "step": step,
+            "time_per_task_min": task_minutes.get(key) or estimate_task_minutes(step),
+            "frequency_per_month": estimate_frequency(step, roi_params),
+            "effort_multiplier": 1.0,
+            "feasibility_multiplier": PRIORITY_FEASIBILITY.get(priority.get(key, "Medium"), 0.7),
+            "error_multiplier": 1.2 if error_prone else 1.0,
+            "tool_multiplier": 1.0,
+        })
+    return items
+
+
+def summarize_alignment(sector: str, benchmarks: list) -> str:
+    suggestions = []
+    for b in sorted(benchmarks, key=lambda b: PRIORITY_RANK.get(b.priority, 3)):
+        if b.idp_suggestion and b.idp_suggestion not in suggestions:
+            suggestions.append(b.idp_suggestion)
+    if not suggestions:
+        return f"No {sector} IDP recommendations matched the workflow."
+    return f"{sector} IDP recommends: " + "; ".join(suggestions[:3])
+
+
+def run_fast_pipeline(params: dict, limiter=None) -> dict:
+    """
+    Analysis function for BatchRunner: runs the fast-path pipeline with per-stage rate limits.
+    """
+    return FastPipeline(limiter=limiter).run(params)
@@ -0,0 +1,355 @@
+import difflib
+import re
+from array import array
+from pathlib import Path
+from typing import Optional
+
+from orchestrators.artifacts import SUFFIX, CompactReport, StringTable, dumps, loads, pack_column, unpack_column
+from orchestrators.dag import DAGExecutor
+from orchestrators.fast_pipeline import (
+    MAX_BENCHMARKS,
+    FastPipeline,
+    summarize_alignment,
+)
+from orchestrators.pipeline_types import (
+    DEFAULT_TENANT,
+    Benchmark,
+    IngestionResult,
+    Issue,
+    PipelineReport,
+    ProcessStep,
+    ROIEntry,
+    tenant_of,
+)
+from tools.idp_store import sector_key
+from tools.step_extraction import step_key
+from tools.storage import DATA_DIR, atomic_write_bytes
+from tools.tracing import record, tracer
+
+# —————————————————————————————
+# Incremental re-analysis of revised SOP versions
+# Each run stores its per-step artifacts (steps, chunks, process_map entries,
+# issues, benchmarks, ROI rows) under
+# <BPA_DATA_DIR>/runs/<tenant>/<sector>/<document no.>/.
+# A later version of the same document is diffed step by step against the
+# stored run (difflib over normalized step text): ProcessMiningAgent only
+# sees changed or new steps, and BenchmarkingAgent only sees issues on
+# changed steps or issues it has not been asked about before. Pattern
+# detection and ROI are tool-only and re-run on the merged result, since
+# clusters and totals depend on the whole step set.
+# —————————————————————————————
+
+DOCUMENT_NO = re.compile(r"^\s*Document\s+No\.?\s*:\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+VERSION = re.compile(r"^\s*Version\s*:\s*(\S+)", re.IGNORECASE | re.MULTILINE)
+
+
+def document_id(raw_text: str, file_path: str) -> str:
+    """
+    The SOP's "Document No." when present, otherwise the file name stem.
+    """
+    m = DOCUMENT_NO.search(raw_text)
+    return m.group(1) if m else Path(file_path).stem
+
+
+def document_version(raw_text: str) -> Optional[str]:
+    m = VERSION.search(raw_text)
+    return m.group(1) if m else None
+
+
+def numbered(step_process: list) -> list:
+    """
+    The process map of a run: its mined entries (one or None per step), renumbered.
+    """
+    return [
+        ProcessStep(order=n + 1, step=p.step, role=p.role)
+        for n, p in enumerate(p for p in step_process if p is not None)
+    ]
+
+
+def diff_steps(old_steps: list, new_steps: list) -> tuple:
+    """
+    Args:
+      old_steps: Steps of the stored run.
+      new_steps: Steps of the new version.
+    Returns:
+      (reuse, stats): reuse[i] is the index of the unchanged old step matching
+      new step i, or None if the step is changed or new.
+    """
+    matcher = difflib.SequenceMatcher(
+        a=[step_key(s) for s in old_steps], b=[step_key(s) for s in new_steps], autojunk=False
+    )
+    reuse = [None] * len(new_steps)
+    stats = {"unchanged": 0, "changed": 0, "added": 0, "removed": 0}
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            for offset in range(j2 - j1):
+                reuse[j1 + offset] = i1 + offset
+            stats["unchanged"] += j2 - j1
+        elif tag == "replace":
+            stats["changed"] += j2 - j1
+            stats["removed"] += max(0, (i2 - i1) - (j2 - j1))
+        elif tag == "insert":
+            stats["added"] += j2 - j1
+        elif tag == "delete":
+            stats["removed"] += i2 - i1
+    return reuse, stats
+
+
+def _safe_name(name: str) -> str:
+    # One path component: no separators, no "." / ".."
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(name)).lstrip(".") or "_"
+
+
+RECORD_KEYS = ("step_process", "issues", "benchmarks", "roi")
+
+
+def pack_run(run: dict) -> dict:
+    """
+    The stored form of a run: its steps and per-step records share one
+    CompactReport string table. Mined entries are kept with the index of
+    their step (1-based) as `order`, so unmined steps need no placeholder.
+    """
+    table = StringTable()
+    steps = array("i", (table.id(s) for s in run["steps"]))
+    report = PipelineReport(
+        process_map=[ProcessStep(i + 1, p["step"], p["role"]) for i, p in enumerate(run["step_process"]) if p],
+        issues=[Issue(**i) for i in run["issues"]],
+        benchmarks=[Benchmark(**b) for b in run["benchmarks"]],
+        roi=[ROIEntry(**r) for r in run["roi"]],
+    )
+    compact = CompactReport.from_report(report, table)
+    packed = {k: v for k, v in run.items() if k != "steps" and k not in RECORD_KEYS}
+    packed.update(steps=pack_column(steps), records=compact.to_obj())
+    return packed
+
+
+def unpack_run(packed: dict) -> dict:
+    """
+    Inverse of pack_run(); runs stored before the compact form load as they are.
+    """
+    if "records" not in packed:
+        return packed
+    compact = CompactReport.from_obj(packed.pop("records"))
+    steps = [compact.strings[i] for i in unpack_column(packed.pop("steps"), "i")]
+    report = compact.to_report()
+    step_process = [None] * len(steps)
+    for p in report.process_map:
+        step_process[p.order - 1] = p.to_dict()
+    return {
+        **packed,
+        "steps": steps,
+        "step_process": step_process,
+        "issues": [i.to_dict() for i in report.issues],
+        "benchmarks": [b.to_dict() for b in report.benchmarks],
+        "roi": [r.to_dict() for r in report.roi],
+    }
+
+
+class RunStore:
+    """
+    Stores the latest run of each document, plus one copy per version, in the
+    compact artifact format (see pack_run; msgpack when installed, JSON
+    otherwise). Runs are
+    kept per tenant and sector: two tenants' documents with the same number
+    never share a run.
+    Layout: <BPA_DATA_DIR>/runs/<tenant>/<sector>/<document id>/latest.msgpack
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else DATA_DIR / "runs"
+
+    def _dir(self, tenant: str, sector: str, doc_id: str) -> Path:
+        return self.root / _safe_name(tenant) / sector_key(sector) / _safe_name(doc_id)
+
+    def load(self, tenant: str, sector: str, doc_id: str) -> Optional[dict]:
+        for suffix in dict.fromkeys((SUFFIX, ".json", ".msgpack")):
+            try:
+                with open(self._dir(tenant, sector, doc_id) / f"latest{suffix}", "rb") as fh:
+                    return unpack_run(loads(fh.read()))
+            except FileNotFoundError:
+                continue
+            except (ValueError, RuntimeError, KeyError, TypeError, IndexError):
+                return None
+        return None
+
+    def save(self, tenant: str, sector: str, doc_id: str, run: dict) -> None:
+        directory = self._dir(tenant, sector, doc_id)
+        payload = dumps(pack_run(run))
+        if run.get("version"):
+            atomic_write_bytes(directory / f"version-{_safe_name(run['version'])}{SUFFIX}", payload)
+        atomic_write_bytes(directory / f"latest{SUFFIX}", payload)
+
+
+# Shared instance
+run_store = RunStore()
+
+
+class IncrementalPipeline(FastPipeline):
+    def __init__(self, *args, store: Optional[RunStore] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.store = store or run_store
+
+    def load_previous(self, ingestion: IngestionResult, file_path: str, sector: str, tenant: str) -> Optional[dict]:
+        return self.store.load(tenant, sector, document_id(ingestion.raw_text, file_path))
+
+    def mine_delta(
+        self, ingestion: IngestionResult, previous: Optional[dict], reuse: list, tenant: str = DEFAULT_TENANT
+    ) -> list:
+        """
+        Re-uses stored process_map entries for unchanged steps and mines the rest.
+        """
+        steps = ingestion.steps
+        old_entries = []
+        if previous is not None:
+            old_entries = [ProcessStep(**p) if p else None for p in previous["step_process"]]
+        records = [old_entries[j] if j is not None and old_entries[j] else None for j in reuse]
+        pending = [i for i, rec in enumerate(records) if rec is None]
+        record(steps_reused=len(steps) - len(pending), steps_mined=len(pending))
+        if pending:
+            mined = self.mine_aligned(
+                [steps[i] for i in pending],
+                lambda subset: self.mine(IngestionResult(ingestion.raw_text, ingestion.chunks, subset), tenant),
+            )
+            for i, rec in zip(pending, mined):
+                records[i] = rec
+        return records
+
+    def benchmark_delta(
+        self, sector: str, step_process: list, issues: list, passages: list,
+        previous: Optional[dict], reuse: list, steps: list, tenant: str = DEFAULT_TENANT,
+    ) -> tuple:
+        """
+        Returns (benchmarks, benchmarked_keys): stored benchmarks are kept for
+        issues on unchanged steps that were already sent to the agent, unless
+        the sector's IDP index has been rebuilt since the stored run.
+        """
+        unchanged = {step_key(steps[i]) for i, j in enumerate(reuse) if j is not None}
+        old_sent, old_benchmarks = set(), {}
+        if previous is not None and previous.get("idp_version") == self.idp_retrieval.store.version(sector):
+            old_sent = set(previous["benchmarked"])
+            old_benchmarks = {step_key(b["step"]): Benchmark(**b) for b in previous["benchmarks"]}
+
+        pending = [i for i in issues if not (step_key(i.step) in unchanged and step_key(i.step) in old_sent)]
+        record(issues_reused=len(issues) - len(pending), issues_benchmarked=len(pending))
+        fresh = {}
+        if pending:
+            pending_keys = {step_key(i.step) for i in pending}
+            process_map = [p for p in step_process if p is not None and step_key(p.step) in pending_keys]
+            pending_passages = [p for p in passages if step_key(p["step"]) in pending_keys]
+            for b in self.benchmark(sector, process_map, pending, pending_passages, tenant):
+                fresh[step_key(b.step)] = b
+
+        benchmarks = []
+        for issue in issues:
+            key = step_key(issue.step)
+            b = fresh.get(key) or (old_benchmarks.get(key) if key in old_sent else None)
+            if b is not None and b not in benchmarks:
+                benchmarks.append(b)
+        return benchmarks[:MAX_BENCHMARKS], sorted(old_sent | {step_key(i.step) for i in issues})
+
+    async def run_async(self, params: dict, on_event=None) -> dict:
+        sector = params.get("sector") or "Retail"
+        file_path = params["file_path"]
+        business_context = params.get("business_context") or {}
+        tenant = tenant_of(business_context)
+
+        def staged(stage, fn):
+            def node(**inputs):
+                with self._stage(stage):
+                    return fn(**inputs)
+            return node
+
+        def load_previous(ingestion):
+            previous = self.load_previous(ingestion, file_path, sector, tenant)
+            old_steps = previous["steps"] if previous else []
+            reuse, stats = diff_steps(old_steps, ingestion.steps)
+            record(**stats)
+            return previous, reuse, stats
+
+        dag = DAGExecutor(on_event)
+        dag.add("sector_prefetch", staged("sector_prefetch", lambda: self.prefetch_sector(sector)))
+        dag.add("ingestion", staged("ingestion", lambda: self.ingest(file_path)))
+        dag.add("step_diff", staged("step_diff", load_previous), ["ingestion"])
+        dag.add(
+            "process_mining",
+            staged("process_mining", lambda ingestion, step_diff: self.mine_delta(ingestion, step_diff[0], step_diff[1], tenant)),
+            ["ingestion", "step_diff"],
+        )
+        dag.add(
+            "pattern_detection",
+            staged("pattern_detection", lambda process_mining, sector_prefetch: self.detect_patterns(
+                numbered(process_mining), sector_prefetch.step_model, sector_prefetch.rules_for(business_context)
+            )),
+            ["process_mining", "sector_prefetch"],
+        )
+        dag.add(
+            "idp_retrieval",
+            staged("idp_retrieval", lambda ingestion, sector_prefetch: self.retrieve_idp(sector, ingestion.steps)),
+            ["ingestion", "sector_prefetch"],
+        )
+        dag.add(
+            "benchmarking",
+            staged("benchmarking", lambda ingestion, step_diff, process_mining, pattern_detection, idp_retrieval: self.benchmark_delta(
+                sector, process_mining, pattern_detection, idp_retrieval, step_diff[0], step_diff[1], ingestion.steps,
+                tenant,
+            )),
+            ["ingestion", "step_diff", "process_mining", "pattern_detection", "idp_retrieval"],
+        )
+        dag.add(
+            "roi_estimation",
+            staged("roi_estimation", lambda sector_prefetch, pattern_detection, benchmarking: self.estimate_roi(
+                pattern_detection, benchmarking[0], sector_prefetch.roi_for(business_context), tenant
+            )),
+            ["sector_prefetch", "pattern_detection", "benchmarking"],
+        )
+
+        with tracer.run(file_path=file_path, sector=sector, pipeline="incremental"):
+            results = await dag.run()
+
+        ingestion = results["ingestion"]
+        previous, _, stats = results["step_diff"]
+        step_process = results["process_mining"]
+        benchmarks, benchmarked = results["benchmarking"]
+        roi, total = results["roi_estimation"]
+        process_map = numbered(step_process)
+        report = PipelineReport(
+            process_map=process_map,
+            issues=results["pattern_detection"],
+            benchmarks=benchmarks,
+            roi=roi,
+            total_monthly_savings=total,
+            idp_alignment_summary=summarize_alignment(sector, benchmarks),
+        )
+
+        doc_id = document_id(ingestion.raw_text, file_path)
+        version = document_version(ingestion.raw_text)
+        self.store.save(tenant, sector, doc_id, {
+            "document_id": doc_id,
+            "version": version,
+            "sector": sector,
+            "steps": ingestion.steps,
+            "chunks": ingestion.chunks,
+            "step_process": [p.to_dict() if p is not None else None for p in step_process],
+            "issues": [i.to_dict() for i in report.issues],
+            "benchmarks": [b.to_dict() for b in benchmarks],
+            "benchmarked": benchmarked,
+            "idp_version": self.idp_retrieval.store.version(sector),
+            "roi": [r.to_dict() for r in roi],
+        })
+
+        result = report.to_dict()
+        result["revision"] = {
+            "document_id": doc_id,
+            "version": version,
+            "previous_version": previous.get("version") if previous else None,
+            **stats,
+        }
+        return result
+
+
+def run_incremental_pipeline(params: dict, limiter=None) -> dict:
+    """
+    Analysis function for BatchRunner: fast-path pipeline that re-uses the
+    stored run of an earlier version of the same SOP.
+    """
+    return IncrementalPipeline(limiter=limiter).run(params)
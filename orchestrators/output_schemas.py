@@ -0,0 +1,269 @@
+import json
+import os
+import re
+import threading
+
+# —————————————————————————————
+# Output schemas, validation and local repair for sub-agent responses
+# Each LLM agent must answer with a fixed JSON shape. Responses are checked
+# against the schema below and common faults are repaired in code instead
+# of re-prompting:
+#   - JSON inside a ```json fence or surrounded by prose, trailing commas
+#   - a bare list instead of {"<key>": [...]}
+#   - missing or non-numeric `order` numbers (renumbered in sequence)
+#   - money / months given as strings or unrounded (parsed and rounded)
+#   - priority in the wrong case, missing optional fields (defaults)
+#   - more entries than allowed (truncated, best first where ranked)
+# Only faults that can't be repaired (unparseable JSON, missing required
+# fields) cost a targeted retry; see call_agent. Repair and retry counts
+# are kept per agent in `output_stats`.
+# —————————————————————————————
+
+MAX_OUTPUT_RETRIES = int(os.environ.get("BPA_OUTPUT_RETRIES", 1))
+
+FENCED_JSON = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+NUMBER = re.compile(r"-?\d+(?:,\d{3})*(?:\.\d+)?")
+PRIORITIES = ("High", "Medium", "Low")
+REQUIRED = object()
+
+# field kinds: "str", "order" (1-based position), "money" (2 dp), "months" (1 dp), "priority"
+STEP_FIELDS = {"order": ("order", REQUIRED), "step": ("str", REQUIRED), "role": ("str", "staff")}
+ISSUE_FIELDS = {"step": ("str", REQUIRED), "issue": ("str", REQUIRED), "impact": ("str", "")}
+BENCHMARK_FIELDS = {"step": ("str", REQUIRED), "idp_suggestion": ("str", REQUIRED), "priority": ("priority", "Medium")}
+ROI_FIELDS = {"step": ("str", REQUIRED), "estimated_savings_SGD": ("money", REQUIRED), "payback_months": ("months", REQUIRED)}
+
+
+def _by_priority(record: dict):
+    return PRIORITIES.index(record["priority"])
+
+
+def _by_savings(record: dict):
+    return -record["estimated_savings_SGD"]
+
+
+# list field -> (record fields, max entries, rank used when truncating or None)
+LISTS = {
+    "process_map": (STEP_FIELDS, 50, None),
+    "issues": (ISSUE_FIELDS, 10, None),
+    "benchmarks": (BENCHMARK_FIELDS, 10, _by_priority),
+    "roi": (ROI_FIELDS, 10, _by_savings),
+}
+
+# agent -> top-level fields: a LISTS key, or a scalar kind
+OUTPUT_SCHEMAS = {
+    "ProcessMiningAgent": {"process_map": "list"},
+    "PatternDetectionAgent": {"issues": "list"},
+    "BenchmarkingAgent": {"benchmarks": "list"},
+    "ROIEstimationAgent": {"roi": "list", "total_monthly_savings": "money"},
+    "BusinessProcessAgent": {
+        "process_map": "list",
+        "issues": "list",
+        "benchmarks": "list",
+        "roi": "list",
+        "total_monthly_savings": "money",
+        "idp_alignment_summary": "str",
+    },
+}
+
+
+class OutputValidationError(ValueError):
+    def __init__(self, agent_name: str, errors: list):
+        super().__init__(f"{agent_name} returned invalid output: {'; '.join(errors[:5])}")
+        self.agent_name = agent_name
+        self.errors = errors
+
+
+def parse_json(content, repairs: list):
+    """
+    Parses an agent response, repairing fences, surrounding prose and
+    trailing commas. Appends the repairs made to `repairs`.
+    """
+    if isinstance(content, (dict, list)):
+        return content
+    text = str(content).strip()
+    m = FENCED_JSON.search(text)
+    if m:
+        text = m.group(1).strip()
+        repairs.append("fenced_json")
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        pass
+    start, end = text.find("{"), text.rfind("}")
+    if not text.startswith("[") and start != -1 and end > start and (start, end) != (0, len(text) - 1):
+        text = text[start:end + 1]
+        repairs.append("surrounding_text")
+    fixed = TRAILING_COMMA.sub(r"\1", text)
+    if fixed != text:
+        repairs.append("trailing_commas")
+    return json.loads(fixed)  # still invalid: caller reports it
+
+
+def _number(value, places: int):
+    """
+    Returns (rounded float, repaired) or (None, False) if `value` isn't numeric.
+    """
+    repaired = False
+    if isinstance(value, str):
+        m = NUMBER.search(value)
+        if m is None:
+            return None, False
+        value, repaired = float(m.group().replace(",", "")), True
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return None, False
+    rounded = round(float(value), places)
+    return rounded, repaired or rounded != value
+
+
+def _check_scalar(kind: str, value, where: str, repairs: list, errors: list):
+    if kind in ("money", "months"):
+        number, repaired = _number(value, 2 if kind == "money" else 1)
+        if number is None:
+            errors.append(f"{where}: expected a number, got {value!r}")
+            return value
+        if repaired:
+            repairs.append("numbers")
+        return number
+    if kind == "priority":
+        match = next((p for p in PRIORITIES if str(value).strip().lower() == p.lower()), None)
+        if match is None:
+            errors.append(f"{where}: expected one of {PRIORITIES}, got {value!r}")
+            return value
+        if match != value:
+            repairs.append("priority")
+        return match
+    if not isinstance(value, str):
+        if isinstance(value, (int, float)):
+            repairs.append("strings")
+            return str(value)
+        errors.append(f"{where}: expected a string")
+    return value
+
+
+def _check_list(name: str, items, repairs: list, errors: list) -> list:
+    fields, max_items, rank = LISTS[name]
+    if not isinstance(items, list):
+        errors.append(f"{name}: expected a list")
+        return items
+    out = []
+    renumber = False
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            errors.append(f"{name}[{i}]: expected an object")
+            continue
+        record = {}
+        for field, (kind, default) in fields.items():
+            where = f"{name}[{i}].{field}"
+            if kind == "order":
+                value = item.get(field)
+                number, _ = _number(value, 6)
+                if number is None or number != int(number):
+                    renumber = True
+                else:
+                    record[field] = int(number)
+                continue
+            if item.get(field) in (None, ""):
+                if default is REQUIRED:
+                    errors.append(f"{where}: missing")
+                    continue
+                record[field] = default
+                repairs.append("defaults")
+                continue
+            record[field] = _check_scalar(kind, item[field], where, repairs, errors)
+        out.append(record)
+    if "order" in fields and out:
+        orders = [r.get("order") for r in out]
+        if renumber or len(set(orders)) != len(orders):
+            out = [{"order": n + 1, **{k: v for k, v in r.items() if k != "order"}} for n, r in enumerate(out)]
+            repairs.append("order_numbers")
+    if len(out) > max_items:
+        if rank is not None:
+            try:
+                out = sorted(out, key=rank)
+            except (KeyError, TypeError, ValueError):
+                pass  # unrepaired records: keep the agent's order
+        out = out[:max_items]
+        repairs.append("truncated")
+    return out
+
+
+def check_output(agent_name: str, content) -> tuple:
+    """
+    Args:
+      agent_name: Agent whose schema applies (unknown agents are only parsed).
+      content: The agent's raw response (JSON string, fenced JSON or dict).
+    Returns:
+      (output, repairs, errors): the repaired output, the names of the
+      repairs applied, and the faults left (empty when the output is valid).
+    """
+    repairs, errors = [], []
+    try:
+        obj = parse_json(content, repairs)
+    except json.JSONDecodeError as e:
+        return None, repairs, [f"invalid JSON: {e}"]
+    schema = OUTPUT_SCHEMAS.get(agent_name)
+    if schema is None:
+        return obj, repairs, errors
+
+    lists = [name for name, kind in schema.items() if kind == "list"]
+    if isinstance(obj, list) and len(lists) == 1:
+        obj = {lists[0]: obj}
+        repairs.append("bare_list")
+    if not isinstance(obj, dict):
+        return obj, repairs, ["expected a JSON object"]
+
+    out = dict(obj)
+    for name, kind in schema.items():
+        if kind == "list":
+            if name not in obj:
+                errors.append(f"{name}: missing")
+                continue
+            out[name] = _check_list(name, obj[name], repairs, errors)
+        elif name == "total_monthly_savings" and obj.get(name) is None and isinstance(out.get("roi"), list):
+            savings = [r.get("estimated_savings_SGD") for r in out["roi"]]
+            if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in savings):
+                out[name] = round(sum(savings), 2)
+                repairs.append("total")
+            # else: the unrepaired roi rows are already reported as errors
+        elif name not in obj:
+            errors.append(f"{name}: missing")
+        else:
+            out[name] = _check_scalar(kind, obj[name], name, repairs, errors)
+    return out, sorted(set(repairs)), errors
+
+
+class OutputStats:
+    """
+    Per-agent counts of checked, repaired, retried and failed responses.
+    """
+
+    def __init__(self):
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def add(self, agent_name: str, repaired: bool = False, retried: bool = False, failed: bool = False) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(agent_name, {"checked": 0, "repaired": 0, "retried": 0, "failed": 0})
+            counts["checked"] += 1
+            counts["repaired"] += int(repaired)
+            counts["retried"] += int(retried)
+            counts["failed"] += int(failed)
+
+    def stats(self) -> dict:
+        """
+        Returns { agent: {"checked", "repaired", "retried", "failed", "repair_rate", "retry_rate"} }.
+        """
+        with self._lock:
+            return {
+                name: {
+                    **c,
+                    "repair_rate": round(c["repaired"] / c["checked"], 4),
+                    "retry_rate": round(c["retried"] / c["checked"], 4),
+                }
+                for name, c in self._counts.items()
+            }
+
+
+# Shared counters reported by the batch CLI
+output_stats = OutputStats()
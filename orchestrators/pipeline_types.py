@@ -0,0 +1,86 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# —————————————————————————————
+# Typed intermediate results passed between pipeline stages.
+# Field names match the JSON shapes in the sub-agent prompts. Per-step
+# records use __slots__ (no per-instance __dict__), so batches of large
+# SOPs stay small in memory; see orchestrators/artifacts.py for the
+# compact, ID-referenced form used for persistence.
+# —————————————————————————————
+
+DEFAULT_TENANT = "default"
+
+
+def tenant_of(business_context: Optional[dict]) -> str:
+    """
+    Tenant a run belongs to: business_context["tenant"], else its company_name.
+    """
+    context = business_context or {}
+    return str(context.get("tenant") or context.get("company_name") or DEFAULT_TENANT)
+
+
+class _Record:
+    __slots__ = ()
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass
+class IngestionResult:
+    raw_text: str
+    chunks: List[str]
+    steps: List[str]
+
+
+@dataclass
+class ProcessStep(_Record):
+    __slots__ = ("order", "step", "role")
+    order: int
+    step: str
+    role: str
+
+
+@dataclass
+class Issue(_Record):
+    __slots__ = ("step", "issue", "impact")
+    step: str
+    issue: str
+    impact: str
+
+
+@dataclass
+class Benchmark(_Record):
+    __slots__ = ("step", "idp_suggestion", "priority")
+    step: str
+    idp_suggestion: str
+    priority: str
+
+
+@dataclass
+class ROIEntry(_Record):
+    __slots__ = ("step", "estimated_savings_SGD", "payback_months")
+    step: str
+    estimated_savings_SGD: float
+    payback_months: float
+
+
+@dataclass
+class PipelineReport:
+    process_map: List[ProcessStep] = field(default_factory=list)
+    issues: List[Issue] = field(default_factory=list)
+    benchmarks: List[Benchmark] = field(default_factory=list)
+    roi: List[ROIEntry] = field(default_factory=list)
+    total_monthly_savings: float = 0.0
+    idp_alignment_summary: str = ""
+
+    def to_dict(self) -> dict:
+        return {
+            "process_map": [p.to_dict() for p in self.process_map],
+            "issues": [i.to_dict() for i in self.issues],
+            "benchmarks": [b.to_dict() for b in self.benchmarks],
+            "roi": [r.to_dict() for r in self.roi],
+            "total_monthly_savings": self.total_monthly_savings,
+            "idp_alignment_summary": self.idp_alignment_summary,
+        }
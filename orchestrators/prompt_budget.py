@@ -0,0 +1,207 @@
+import json
+import os
+from typing import Callable, Optional
+
+from tools.step_extraction import step_key
+from tools.tracing import payload_size
+
+# —————————————————————————————
+# Token-budget-aware prompt assembly for sub-agent inputs
+# Before a payload reaches a sub-agent it is:
+#   1. reduced to the fields that agent reads (top-level and per record),
+#   2. de-duplicated: repeated records are dropped and an IDP passage that
+#      matches several steps keeps its text only at its first occurrence
+#      (moved to the next copy if trimming later drops that one),
+#   3. trimmed to the agent's token budget, least relevant items first
+#      (IDP matches by retrieval score, then process_map entries without
+#      an issue). Required inputs such as the steps to map are never trimmed.
+# Token counts before and after are recorded on the agent span.
+# Budgets: AGENT_BUDGETS, overridden for all agents by BPA_PROMPT_BUDGET.
+# —————————————————————————————
+
+CHARS_PER_TOKEN = 4  # rough estimate when no tokenizer is available
+
+# agent -> {top-level field: record fields kept (None = keep as is)}
+AGENT_FIELDS = {
+    "ProcessMiningAgent": {"steps": None, "chunk": None},
+    "PatternDetectionAgent": {"process_map": ("order", "step", "role")},
+    "BenchmarkingAgent": {
+        "sector": None,
+        "process_map": ("order", "step", "role"),
+        "issues": ("step", "issue", "impact"),
+        "idp_passages": None,
+    },
+    "ROIEstimationAgent": {
+        "issues": ("step", "issue", "impact"),
+        "benchmarks": ("step", "idp_suggestion", "priority"),
+    },
+}
+AGENT_BUDGETS = {
+    "PatternDetectionAgent": 4000,
+    "BenchmarkingAgent": 3000,
+    "ROIEstimationAgent": 2000,
+}
+DEDUPE_FIELDS = ("issues", "benchmarks")
+
+
+def estimate_tokens(obj) -> int:
+    return payload_size(obj) // CHARS_PER_TOKEN
+
+
+def _dedupe_records(records: list) -> list:
+    seen, out = set(), []
+    for record in records:
+        key = json.dumps(record, sort_keys=True, default=str)
+        if key not in seen:
+            seen.add(key)
+            out.append(record)
+    return out
+
+
+def _passage_key(match: dict) -> tuple:
+    return match.get("source"), match.get("page"), match.get("title")
+
+
+def _without_text(match: dict) -> dict:
+    return {k: v for k, v in match.items() if k != "text"}
+
+
+def _dedupe_passages(passages: list, texts: Optional[dict] = None) -> list:
+    # A section matched for several steps carries its text once, on its
+    # first copy. `texts` (passage key -> text) restores text that an
+    # earlier dedupe moved off copies that have since been trimmed.
+    seen, out = set(), []
+    for entry in passages:
+        matches = []
+        for match in entry.get("matches", []):
+            key = _passage_key(match)
+            if key in seen:
+                match = _without_text(match)
+            else:
+                seen.add(key)
+                if texts and key in texts and "text" not in match:
+                    match = {**match, "text": texts[key]}
+            matches.append(match)
+        out.append({**entry, "matches": matches})
+    return out
+
+
+class PromptCompactor:
+    def __init__(
+        self,
+        fields: Optional[dict] = None,
+        budgets: Optional[dict] = None,
+        count_tokens: Callable[[object], int] = estimate_tokens,
+    ):
+        self.fields = AGENT_FIELDS if fields is None else fields
+        override = os.environ.get("BPA_PROMPT_BUDGET")
+        if budgets is None:
+            budgets = {name: int(override) for name in self.fields} if override else AGENT_BUDGETS
+        self.budgets = budgets
+        self.count_tokens = count_tokens
+
+    def _select_fields(self, agent_name: str, payload: dict) -> dict:
+        allowed = self.fields.get(agent_name)
+        if allowed is None:
+            return dict(payload)  # unknown agent: pass through
+        out = {}
+        for name, record_fields in allowed.items():
+            if name not in payload:
+                continue
+            value = payload[name]
+            if record_fields is not None and isinstance(value, list):
+                value = [
+                    {k: r[k] for k in record_fields if k in r} if isinstance(r, dict) else r
+                    for r in value
+                ]
+            out[name] = value
+        return out
+
+    def _trim(self, payload: dict, budget: int) -> int:
+        """
+        Removes the least relevant trimmable items until `payload` fits
+        `budget`. Returns the number of items removed.
+        """
+        removed = 0
+        tokens = self.count_tokens(payload)
+        if tokens <= budget:
+            return 0
+
+        # 1) IDP matches, lowest retrieval score first. A passage's text is
+        # only saved once its last copy goes; until then it moves to the
+        # first surviving copy.
+        passages = payload.get("idp_passages", [])
+        texts, copies = {}, {}
+        for entry in passages:
+            for m in entry.get("matches", []):
+                key = _passage_key(m)
+                copies[key] = copies.get(key, 0) + 1
+                if "text" in m:
+                    texts.setdefault(key, m["text"])
+        candidates = [
+            (m.get("score", 0.0), i, j)
+            for i, entry in enumerate(passages)
+            for j, m in enumerate(entry.get("matches", []))
+        ]
+        drop = set()
+        for _, i, j in sorted(candidates):
+            if tokens <= budget:
+                break
+            match = passages[i]["matches"][j]
+            key = _passage_key(match)
+            tokens -= self.count_tokens(_without_text(match)) + 1
+            copies[key] -= 1
+            if not copies[key] and key in texts:
+                tokens -= self.count_tokens(texts[key])
+            drop.add((i, j))
+        if drop:
+            kept = [
+                {**entry, "matches": [m for j, m in enumerate(entry["matches"]) if (i, j) not in drop]}
+                for i, entry in enumerate(passages)
+            ]
+            payload["idp_passages"] = _dedupe_passages(kept, texts)
+            removed += len(drop)
+
+        # 2) process_map entries no issue refers to, from the end
+        if tokens > budget and "process_map" in payload and "issues" in payload:
+            flagged = {step_key(i.get("step", "")) for i in payload["issues"]}
+            keep = list(payload["process_map"])
+            for idx in range(len(keep) - 1, -1, -1):
+                if tokens <= budget:
+                    break
+                if step_key(keep[idx].get("step", "")) not in flagged:
+                    tokens -= self.count_tokens(keep[idx]) + 1
+                    del keep[idx]
+                    removed += 1
+            payload["process_map"] = keep
+        return removed
+
+    def compact(self, agent_name: str, payload: dict) -> tuple:
+        """
+        Args:
+          agent_name: Receiving sub-agent (selects field allowlist and budget).
+          payload: JSON-serializable agent input.
+        Returns:
+          (compacted_payload, stats) with stats
+          { "prompt_tokens_before", "prompt_tokens_after", "dropped_fields", "trimmed_items" }.
+        """
+        before = self.count_tokens(payload)
+        compacted = self._select_fields(agent_name, payload)
+        for name in DEDUPE_FIELDS:
+            if isinstance(compacted.get(name), list):
+                compacted[name] = _dedupe_records(compacted[name])
+        if isinstance(compacted.get("idp_passages"), list):
+            compacted["idp_passages"] = _dedupe_passages(compacted["idp_passages"])
+        budget = self.budgets.get(agent_name)
+        trimmed = self._trim(compacted, budget) if budget else 0
+        stats = {
+            "prompt_tokens_before": before,
+            "prompt_tokens_after": self.count_tokens(compacted),
+            "dropped_fields": sorted(set(payload) - set(compacted)),
+            "trimmed_items": trimmed,
+        }
+        return compacted, stats
+
+
+# Shared instance used by call_agent
+prompt_compactor = PromptCompactor()
@@ -0,0 +1,8 @@
+import os
+import tempfile
+
+# Keep caches, indexes and models of test runs away from the real data dir.
+# Must happen before any `tools` import reads BPA_DATA_DIR.
+os.environ["BPA_DATA_DIR"] = tempfile.mkdtemp(prefix="bpa-test-")
+os.environ["BPA_LLM_CACHE"] = "bypass"
+os.environ["BPA_STEP_LIBRARY"] = "off"
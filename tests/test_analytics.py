@@ -0,0 +1,101 @@
+import json
+
+import pytest
+
+from orchestrators.analytics import AnalyticsStore, index_batch_results, step_facts
+from orchestrators.pipeline_types import DEFAULT_TENANT, tenant_of
+
+
+def report(rows: list) -> dict:
+    # rows: (step, role, priority, savings, payback)
+    return {
+        "process_map": [{"order": n + 1, "step": s, "role": role} for n, (s, role, _, _, _) in enumerate(rows)],
+        "issues": [{"step": s, "issue": "Manual process", "impact": "Slow"} for s, *_ in rows],
+        "benchmarks": [{"step": s, "idp_suggestion": f"Automate: {s}", "priority": p} for s, _, p, _, _ in rows],
+        "roi": [{"step": s, "estimated_savings_SGD": v, "payback_months": m} for s, _, _, v, m in rows],
+        "total_monthly_savings": round(sum(r[3] for r in rows), 2),
+        "idp_alignment_summary": "",
+    }
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = AnalyticsStore(tmp_path / "analytics.sqlite3")
+    store.add_report(report([
+        ("Count the inventory in the stockroom", "staff", "High", 300.0, 3.0),
+        ("Key in supplier invoices", "finance", "Medium", 120.0, 8.0),
+    ]), "Retail", "acme", "acme/stock.txt")
+    store.add_report(report([("Reconcile the inventory ledger", "finance", "High", 200.0, 5.0)]), "F&B", "acme", "acme/fnb.txt")
+    store.add_report(report([("Count the inventory at the depot", "staff", "High", 500.0, 2.0)]), "Retail", "globex", "g.txt")
+    return store
+
+
+def test_tenant_of():
+    assert tenant_of({"tenant": "acme", "company_name": "Acme Pte Ltd"}) == "acme"
+    assert tenant_of({"company_name": "Acme Pte Ltd"}) == "Acme Pte Ltd"
+    assert tenant_of(None) == tenant_of({}) == DEFAULT_TENANT
+
+
+def test_step_facts_join_by_step():
+    facts = step_facts({
+        "process_map": [{"order": 1, "step": "Count the float.", "role": "cashier"}],
+        "roi": [{"step": "count the float", "estimated_savings_SGD": 50.0, "payback_months": 4.0},
+                {"step": "File the report", "estimated_savings_SGD": 10.0, "payback_months": 9.0}],
+    })
+    assert [(f["step"], f.get("role"), f["savings_sgd"]) for f in facts] == [
+        ("Count the float.", "cashier", 50.0), ("File the report", None, 10.0),
+    ]
+
+
+def test_find_steps_filters_and_orders(store):
+    rows = store.find_steps(sector="Retail", priority="High", keyword="Inventory")
+    assert [(r["tenant"], r["savings_sgd"]) for r in rows] == [("globex", 500.0), ("acme", 300.0)]
+    assert rows[1]["file_path"] == "acme/stock.txt" and rows[1]["idp_suggestion"].startswith("Automate")
+
+    rows = store.find_steps(tenant="acme", max_payback_months=5.0)
+    assert [r["step"] for r in rows] == ["Count the inventory in the stockroom", "Reconcile the inventory ledger"]
+    assert [r["step"] for r in store.find_steps(tenant="acme", role="finance", min_savings=150)] == [
+        "Reconcile the inventory ledger"
+    ]
+    assert len(store.find_steps(limit=2)) == 2
+    assert store.find_steps(keyword="100%") == []
+
+
+def test_savings_by(store):
+    assert store.savings_by("tenant") == [
+        {"tenant": "acme", "reports": 2, "total_monthly_savings": 620.0},
+        {"tenant": "globex", "reports": 1, "total_monthly_savings": 500.0},
+    ]
+    assert store.savings_by("sector", tenant="acme") == [
+        {"sector": "Retail", "reports": 1, "total_monthly_savings": 420.0},
+        {"sector": "F&B", "reports": 1, "total_monthly_savings": 200.0},
+    ]
+    assert store.savings_by("tenant", sector="F&B") == [{"tenant": "acme", "reports": 1, "total_monthly_savings": 200.0}]
+    with pytest.raises(ValueError):
+        store.savings_by("file_path")
+
+
+def test_reanalysis_replaces_a_reports_rows(store):
+    store.add_report(report([("Count the inventory at the depot", "staff", "Low", 50.0, 20.0)]), "Retail", "globex", "g.txt")
+    assert store.stats()["reports"] == 3
+    assert [(r["priority"], r["savings_sgd"]) for r in store.find_steps(tenant="globex")] == [("Low", 50.0)]
+
+
+def test_query_is_read_only(store):
+    assert store.query("SELECT COUNT(*) AS n FROM step_facts")[0]["n"] == 4
+    with pytest.raises(Exception):
+        store.query("DELETE FROM reports")
+    assert store.stats()["reports"] == 3
+
+
+def test_index_batch_results(tmp_path):
+    results = tmp_path / "results.jsonl"
+    ok = report([("Count the float", "cashier", "High", 100.0, 2.0)])
+    results.write_text(
+        json.dumps({"id": "a", "status": "ok", "result": ok, "sector": "Retail", "tenant": "acme", "file_path": "a.txt"})
+        + "\n" + json.dumps({"id": "b", "status": "error", "error": "ValueError"}) + "\n" + '{"id": "c", "sta',
+        encoding="utf-8",
+    )
+    store = AnalyticsStore(tmp_path / "analytics.sqlite3")
+    assert index_batch_results(store, str(results)) == 1
+    assert store.find_steps(tenant="acme")[0]["step"] == "Count the float"
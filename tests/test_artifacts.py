@@ -0,0 +1,94 @@
+import pytest
+
+from orchestrators.artifacts import CompactReport, dumps, loads, pack_result, report_from_dict, unpack_result
+from orchestrators.pipeline_types import Benchmark, Issue, PipelineReport, ProcessStep, ROIEntry
+
+STEP = "Cashier counts the float manually"
+
+
+def sample_report() -> PipelineReport:
+    return PipelineReport(
+        process_map=[ProcessStep(1, STEP, "cashier"), ProcessStep(2, "Manager approves the count", "manager")],
+        issues=[Issue(STEP, "Manual process", "Slows down the workflow")],
+        benchmarks=[Benchmark(STEP, "Use a cash counting machine", "High")],
+        roi=[ROIEntry(STEP, 120.5, 3.0)],
+        total_monthly_savings=120.5,
+        idp_alignment_summary="1 of 1 issues map to an IDP solution",
+    )
+
+
+def test_compact_report_round_trip():
+    report = sample_report()
+    compact = CompactReport.from_report(report)
+    assert compact.strings.strings.count(STEP) == 1
+    assert CompactReport.from_bytes(compact.to_bytes()).to_dict() == report.to_dict()
+
+
+def test_report_from_dict():
+    report = sample_report()
+    assert report_from_dict(report.to_dict()) == report
+
+
+def test_pack_result_round_trip():
+    result = sample_report().to_dict()
+    result["revision"] = {"document_id": "SOP-1", "version": "2"}
+    result["trace_summary"] = {"spans": 4}
+    unpacked = unpack_result(pack_result(result))
+    assert unpacked == result
+    assert list(unpacked) == list(result)
+
+
+def test_pack_result_is_smaller_than_plain():
+    result = sample_report().to_dict()
+    result["process_map"] *= 20
+    assert len(pack_result(result)) < len(dumps(result))
+
+
+@pytest.mark.parametrize("result", [{"error": "no steps"}, {**sample_report().to_dict(), "roi": [{"step": STEP}]}])
+def test_pack_result_keeps_other_shapes(result):
+    assert unpack_result(pack_result(result)) == result
+
+
+def test_unpack_result_reads_plain_payloads():
+    result = sample_report().to_dict()
+    assert unpack_result(dumps(result)) == result
+    assert loads(dumps(result)) == result
+
+
+def test_run_store_round_trip(tmp_path):
+    pytest.importorskip("google.adk.tools")
+    from orchestrators.incremental import RunStore, pack_run
+
+    run = {
+        "document_id": "SOP-1",
+        "version": "3",
+        "sector": "Retail",
+        "steps": [STEP, "Manager approves the count", "File the report"],
+        "chunks": ["chunk one"],
+        "step_process": [
+            {"order": 1, "step": STEP, "role": "cashier"},
+            None,
+            {"order": 3, "step": "File the report", "role": "staff"},
+        ],
+        "issues": [i.to_dict() for i in sample_report().issues],
+        "benchmarks": [b.to_dict() for b in sample_report().benchmarks],
+        "benchmarked": ["cashier counts the float manually"],
+        "roi": [r.to_dict() for r in sample_report().roi],
+    }
+    store = RunStore(tmp_path)
+    store.save("acme", "Retail", "SOP-1", run)
+    assert store.load("acme", "Retail", "SOP-1") == run
+    assert store.load("other", "Retail", "SOP-1") is None
+    assert pack_run(run)["records"]["strings"].count(STEP) == 1
+
+
+def test_run_store_reads_plain_runs(tmp_path):
+    pytest.importorskip("google.adk.tools")
+    from orchestrators.incremental import SUFFIX, RunStore
+
+    run = {"steps": [STEP], "step_process": [None], "issues": [], "benchmarks": [], "roi": [], "benchmarked": []}
+    store = RunStore(tmp_path)
+    path = store._dir("acme", "Retail", "SOP-1") / f"latest{SUFFIX}"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(dumps(run))
+    assert store.load("acme", "Retail", "SOP-1") == run
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from orchestrators import batch_runner
+from orchestrators.batch_runner import BatchRunner, StageRateLimiter, completed_job_ids, load_jobs
+
+
+def job(n: int, tenant: str = "acme") -> dict:
+    return {"id": f"sop-{n}", "file_path": f"sop-{n}.txt", "sector": "Retail", "business_context": {"tenant": tenant}}
+
+
+def ok_report(params: dict) -> dict:
+    return {"file": params["file_path"]}
+
+
+def read_records(path) -> list:
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class RecordingAnalytics:
+    def __init__(self, fail_on=()):
+        self.added = []
+        self.fail_on = set(fail_on)
+
+    def add_report(self, report, sector, tenant, file_path):
+        if file_path in self.fail_on:
+            raise RuntimeError("index locked")
+        self.added.append((file_path, sector, tenant))
+
+
+def test_load_jobs_from_directory_and_manifest(tmp_path):
+    (tmp_path / "a.txt").write_text("1. Count the float\n")
+    (tmp_path / "notes.md").write_text("ignored")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.pdf").write_bytes(b"%PDF-1.4")
+    jobs = load_jobs(str(tmp_path), sector="Retail")
+    assert [j["id"] for j in jobs] == ["a.txt", "sub/b.pdf"]
+    assert all(j["sector"] == "Retail" and j["business_context"] == {} for j in jobs)
+
+    manifest = tmp_path / "jobs.jsonl"
+    manifest.write_text(
+        json.dumps({"file_path": "a.txt", "sector": "F&B"}) + "\n"
+        + json.dumps({"id": "abs", "file_path": "/srv/sops/c.txt", "business_context": {"tenant": "globex"}}) + "\n"
+    )
+    jobs = load_jobs(str(manifest), sector="Retail", business_context={"tenant": "acme"})
+    assert jobs[0] == {"id": "a.txt", "file_path": str(tmp_path / "a.txt"), "sector": "F&B",
+                       "business_context": {"tenant": "acme"}}
+    assert jobs[1]["file_path"] == "/srv/sops/c.txt" and jobs[1]["sector"] == "Retail"
+    assert jobs[1]["business_context"] == {"tenant": "globex"}
+
+
+def test_one_failing_job_does_not_stop_the_batch(tmp_path):
+    def analyse(params, limiter):
+        if params["file_path"] == "sop-2.txt":
+            raise ValueError("unreadable PDF")
+        return ok_report(params)
+
+    analytics = RecordingAnalytics(fail_on={"sop-3.txt"})
+    out = tmp_path / "results.jsonl"
+    summary = asyncio.run(BatchRunner(analyse, concurrency=2, analytics=analytics).run([job(n) for n in range(5)], str(out)))
+    assert summary["submitted"] == 5 and summary["ok"] == 4 and summary["error"] == 1
+
+    records = {r["id"]: r for r in read_records(out)}
+    assert records["sop-2"]["status"] == "error"
+    assert records["sop-2"]["error"] == "ValueError: unreadable PDF"
+    # Indexing failures are reported but keep the analysis result
+    assert records["sop-3"]["status"] == "ok" and "index locked" in records["sop-3"]["analytics_error"]
+    assert records["sop-0"]["result"] == {"file": "sop-0.txt"} and records["sop-0"]["tenant"] == "acme"
+    assert sorted(f for f, _, _ in analytics.added) == ["sop-0.txt", "sop-1.txt", "sop-4.txt"]
+
+
+def test_resume_reruns_only_unfinished_jobs(tmp_path):
+    out = tmp_path / "results.jsonl"
+    out.write_text(
+        json.dumps({"id": "sop-0", "status": "ok"}) + "\n"
+        + json.dumps({"id": "sop-1", "status": "error"}) + "\n"
+        + '{"id": "sop-2", "stat'  # torn record from an interrupted run
+    )
+    seen = []
+
+    def analyse(params, limiter):
+        seen.append(params["file_path"])
+        return ok_report(params)
+
+    summary = asyncio.run(BatchRunner(analyse, concurrency=1).run([job(n) for n in range(3)], str(out), resume=True))
+    assert sorted(seen) == ["sop-1.txt", "sop-2.txt"]
+    assert summary["skipped"] == 1 and summary["submitted"] == 2 and summary["ok"] == 2
+    assert completed_job_ids(str(out)) == {"sop-0", "sop-1", "sop-2"}
+    lines = out.read_text(encoding="utf-8").splitlines()
+    assert lines[2] == '{"id": "sop-2", "stat' and len(lines) == 5
+
+
+def test_concurrency_is_bounded(tmp_path):
+    lock, active, peak = threading.Lock(), [0], [0]
+
+    def analyse(params, limiter):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return ok_report(params)
+
+    summary = asyncio.run(BatchRunner(analyse, concurrency=3).run([job(n) for n in range(12)], str(tmp_path / "r.jsonl")))
+    assert summary["ok"] == 12
+    assert 1 < peak[0] <= 3
+
+
+def test_rate_limiter_spaces_calls_per_stage(monkeypatch):
+    clock = SimpleNamespace(now=100.0, slept=[])
+    fake_time = SimpleNamespace(
+        monotonic=lambda: clock.now,
+        sleep=lambda s: clock.slept.append(round(s, 6)),
+    )
+    monkeypatch.setattr(batch_runner, "time", fake_time)
+    limiter = StageRateLimiter({"orchestrator": 4})
+    for _ in range(3):
+        limiter.acquire("orchestrator")
+    limiter.acquire("parse")  # no limit
+    assert clock.slept == [0.25, 0.5]
+    clock.now += 1.0  # idle long enough: the next call goes straight through
+    limiter.acquire("orchestrator")
+    assert clock.slept == [0.25, 0.5]
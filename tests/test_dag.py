@@ -0,0 +1,80 @@
+import asyncio
+import contextvars
+import threading
+
+import pytest
+
+from orchestrators.dag import DAGExecutor
+
+REQUEST = contextvars.ContextVar("request", default=None)
+
+
+def test_passes_dependency_results_by_name():
+    async def double(parse):
+        return parse * 2
+
+    dag = DAGExecutor()
+    dag.add("parse", lambda: 3)
+    dag.add("mine", double, deps=["parse"])
+    dag.add("report", lambda parse, mine: (parse, mine), deps=["parse", "mine"])
+    assert asyncio.run(dag.run()) == {"parse": 3, "mine": 6, "report": (3, 6)}
+
+
+def test_independent_nodes_overlap():
+    # Each node waits for the other: only passes if both run at once
+    barrier = threading.Barrier(2, timeout=5)
+    dag = DAGExecutor()
+    dag.add("idp_prefetch", lambda: barrier.wait() is not None)
+    dag.add("parse", lambda: barrier.wait() is not None)
+    assert asyncio.run(dag.run()) == {"idp_prefetch": True, "parse": True}
+
+
+def test_sync_nodes_see_the_callers_context():
+    async def main():
+        REQUEST.set("sop-1")
+        return await DAGExecutor().add("read", REQUEST.get).run()
+
+    assert asyncio.run(main()) == {"read": "sop-1"}
+
+
+def test_failure_cancels_running_nodes_and_is_reraised():
+    events = []
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(5)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    def fail():
+        raise ValueError("unreadable PDF")
+
+    dag = DAGExecutor(on_event=events.append)
+    dag.add("slow", slow)
+    dag.add("parse", fail)
+    dag.add("mine", lambda parse: parse, deps=["parse"])
+    with pytest.raises(ValueError, match="unreadable PDF"):
+        asyncio.run(dag.run())
+    assert cancelled == ["slow"]
+    assert {"stage": "parse", "status": "failed", "error": "ValueError: unreadable PDF"} in events
+    assert not any(e["stage"] == "mine" for e in events)
+
+
+def test_emits_start_and_finish_events():
+    events = []
+    asyncio.run(DAGExecutor(on_event=events.append).add("parse", lambda: 1).run())
+    assert [(e["stage"], e["status"]) for e in events] == [("parse", "started"), ("parse", "finished")]
+    assert events[1]["elapsed_s"] >= 0
+
+
+def test_rejects_invalid_graphs():
+    with pytest.raises(ValueError, match="Duplicate"):
+        DAGExecutor().add("parse", lambda: 1).add("parse", lambda: 2)
+    with pytest.raises(ValueError, match="unknown nodes"):
+        asyncio.run(DAGExecutor().add("mine", lambda parse: parse, deps=["parse"]).run())
+    dag = DAGExecutor()
+    dag.add("a", lambda b: b, deps=["b"]).add("b", lambda a: a, deps=["a"])
+    with pytest.raises(ValueError, match="Cycle"):
+        asyncio.run(dag.run())
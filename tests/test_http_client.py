@@ -0,0 +1,98 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from tools.http_client import BlobStore, HTTPClient
+
+SAMPLE_PDF = Path(__file__).resolve().parent.parent / "sample-data" / "StyleHive SOP.pdf"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        forced = server.force_304 and self.headers.get("Cache-Control") != "no-cache"
+        if forced or self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Content-Length", str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def stub_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.body, server.etag, server.force_304, server.requests = b"version one", '"v1"', False, []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(tmp_path):
+    return HTTPClient(retries=0, store=BlobStore(tmp_path))
+
+
+def test_download_then_fresh_copy_without_request(stub_server, client):
+    path = client.download(f"{stub_server.url}/doc.pdf")
+    assert path.read_bytes() == b"version one"
+    assert client.download(f"{stub_server.url}/doc.pdf").read_bytes() == b"version one"
+    assert len(stub_server.requests) == 1
+
+
+def test_revalidates_with_etag(stub_server, client):
+    url = f"{stub_server.url}/doc.pdf"
+    client.download(url)
+    assert client.download(url, max_age_s=0).read_bytes() == b"version one"
+    assert stub_server.requests[-1]["If-None-Match"] == '"v1"'
+
+    stub_server.body, stub_server.etag = b"version two", '"v2"'
+    assert client.download(url, max_age_s=0).read_bytes() == b"version two"
+
+
+def test_304_without_stored_copy_refetches(stub_server, client):
+    stub_server.force_304 = True
+    path = client.download(f"{stub_server.url}/doc.pdf")
+    assert path.read_bytes() == b"version one"
+    assert len(stub_server.requests) == 2
+    assert stub_server.requests[-1]["Cache-Control"] == "no-cache"
+
+
+def test_replaced_body_drops_derived_text(stub_server, client):
+    url = f"{stub_server.url}/doc.pdf"
+    client.download(url)
+    text_path = client.store.derived_path(url, client.store.meta(url))
+    text_path.write_text("extracted")
+    stub_server.body, stub_server.etag = b"version two", '"v2"'
+    client.download(url, max_age_s=0)
+    assert not text_path.exists()
+    assert client.store.derived_path(url, client.store.meta(url)) != text_path
+
+
+def test_idp_fetcher_extracts_text_once_per_version(stub_server, monkeypatch):
+    pytest.importorskip("google.adk.tools")
+    pytest.importorskip("pdfplumber")
+    import tools.idp_fetcher_tool as fetcher
+
+    stub_server.body = SAMPLE_PDF.read_bytes()
+    monkeypatch.setattr(fetcher, "IDP_BASE_URL", stub_server.url)
+    tool = fetcher.IDPFetcherTool()
+    text = tool.run("StubSector")
+    assert text.strip()
+
+    def no_extraction(*args, **kwargs):
+        raise AssertionError("cached IDP text was extracted again")
+
+    monkeypatch.setattr(fetcher, "iter_pdf_pages", no_extraction)
+    assert tool.run("StubSector") == text
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("google.adk.tools")
+
+from benchmarks.stubs import StubBenchmarkingAgent, StubProcessMiningAgent  # noqa: E402
+from benchmarks.synthetic import synthetic_sop  # noqa: E402
+from orchestrators.artifacts import SUFFIX  # noqa: E402
+from orchestrators.incremental import (  # noqa: E402
+    IncrementalPipeline,
+    RunStore,
+    diff_steps,
+    document_id,
+    document_version,
+)
+from tools.step_library import StepLibrary  # noqa: E402
+
+
+class RecordingMiningAgent(StubProcessMiningAgent):
+    def __init__(self):
+        self.sent = []
+
+    def run(self, payload):
+        self.sent.extend(payload.get("steps", []))
+        return super().run(payload)
+
+
+class TextParser:
+    def parse(self, file_path):
+        text = Path(file_path).read_text(encoding="utf-8")
+        return {"text": text, "chunks": [text]}
+
+
+def run_of(steps: list) -> dict:
+    return {
+        "document_id": "SOP-1", "version": "1", "sector": "Retail", "steps": steps, "chunks": [],
+        "step_process": [{"order": i + 1, "step": s, "role": "staff"} for i, s in enumerate(steps)],
+        "issues": [], "benchmarks": [], "benchmarked": [], "roi": [],
+    }
+
+
+def test_diff_steps():
+    old = ["Unlock the store.", "Count the float.", "Print the sales report.", "Lock the store."]
+    new = ["unlock the store", "Count the float twice.", "Lock the store.", "Email the report to HQ."]
+    reuse, stats = diff_steps(old, new)
+    assert reuse == [0, None, 3, None]
+    assert stats == {"unchanged": 2, "changed": 1, "added": 1, "removed": 1}
+    assert diff_steps([], new)[1]["added"] == 4
+
+
+def test_document_id_and_version():
+    text = "Document No.: SOP-7\nVersion: 2.1\n1. Count the float at the till.\n"
+    assert (document_id(text, "/sops/a.txt"), document_version(text)) == ("SOP-7", "2.1")
+    assert (document_id("1. Count the float.", "/sops/a.txt"), document_version("")) == ("a", None)
+
+
+def test_run_store_scopes_runs_and_keeps_versions(tmp_path):
+    store = RunStore(tmp_path)
+    run = run_of(["Count the float at the till."])
+    store.save("acme", "Retail", "SOP-1", run)
+    assert store.load("acme", "retail", "SOP-1") == run  # sector_key folds case
+    assert store.load("globex", "Retail", "SOP-1") is None
+    assert store.load("acme", "F&B", "SOP-1") is None
+    assert (tmp_path / "acme" / "retail" / "SOP-1" / f"version-1{SUFFIX}").exists()
+
+    store.save("../acme", "Retail", "../../SOP-1", run)
+    assert all(tmp_path in p.resolve().parents for p in tmp_path.rglob("*"))
+
+
+def test_run_store_ignores_corrupt_runs(tmp_path):
+    store = RunStore(tmp_path)
+    store.save("acme", "Retail", "SOP-1", run_of(["Count the float at the till."]))
+    (tmp_path / "acme" / "retail" / "SOP-1" / f"latest{SUFFIX}").write_bytes(b"{not a run")
+    assert store.load("acme", "Retail", "SOP-1") is None
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    pipeline = IncrementalPipeline(
+        RecordingMiningAgent(), StubBenchmarkingAgent(), store=RunStore(tmp_path / "runs"),
+        library=StepLibrary(tmp_path / "library.sqlite3", mode="off"),
+    )
+    pipeline.parser = TextParser()
+    return pipeline
+
+
+def analyse(pipeline, path: Path, text: str, tenant: str = "acme") -> dict:
+    path.write_text(text, encoding="utf-8")
+    return pipeline.run({"file_path": str(path), "sector": "Retail", "business_context": {"tenant": tenant}})
+
+
+def test_revision_only_mines_changed_steps(pipeline, tmp_path):
+    sop = tmp_path / "sop.txt"
+    v1 = synthetic_sop(12)
+    first = analyse(pipeline, sop, v1)
+    assert len(pipeline.process_mining_agent.sent) == 12 and first["revision"]["added"] == 12
+
+    changed = "1.2. Count daily sales totals in the spreadsheet before closing."
+    v2 = v1.replace("Version: 1.0", "Version: 1.1").replace(changed, "1.2. Reconcile daily sales totals with the POS export.")
+    pipeline.process_mining_agent.sent.clear()
+    second = analyse(pipeline, sop, v2)
+    assert pipeline.process_mining_agent.sent == ["Reconcile daily sales totals with the POS export."]
+    assert second["revision"]["previous_version"] == "1.0"
+    assert (second["revision"]["unchanged"], second["revision"]["changed"]) == (11, 1)
+    assert [p["step"] for p in second["process_map"]] == [p["step"] for p in first["process_map"][:1]] + [
+        "Reconcile daily sales totals with the POS export."
+    ] + [p["step"] for p in first["process_map"][2:]]
+
+    pipeline.process_mining_agent.sent.clear()
+    assert analyse(pipeline, sop, v2)["revision"]["unchanged"] == 12
+    assert pipeline.process_mining_agent.sent == []
+
+
+def test_tenants_do_not_share_runs(pipeline, tmp_path):
+    text = synthetic_sop(8)
+    analyse(pipeline, tmp_path / "a.txt", text, tenant="acme")
+    pipeline.process_mining_agent.sent.clear()
+    assert analyse(pipeline, tmp_path / "b.txt", text, tenant="globex")["revision"]["added"] == 8
+    assert len(pipeline.process_mining_agent.sent) == 8
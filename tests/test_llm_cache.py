@@ -0,0 +1,122 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from orchestrators.agent_calls import call_agent
+from tools.llm_cache import LLMResponseCache
+
+PAYLOAD = {"steps": ["Count the float at the till"]}
+
+
+class FakeAgent:
+    name = "PatternDetectionAgent"
+    model = "test-model"
+    instruction = "Find issues."
+
+    def __init__(self, issue="Manual process"):
+        self.issue = issue
+        self.calls = 0
+
+    def run(self, payload):
+        self.calls += 1
+        issues = [{"step": s, "issue": self.issue, "impact": "Slow"} for s in payload["steps"]]
+        return SimpleNamespace(content=json.dumps({"issues": issues}))
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(tmp_path / "llm.sqlite3", mode="use")
+
+
+def ask(agent, cache, payload=PAYLOAD):
+    return call_agent(agent, payload, cache=cache, compactor=None)
+
+
+def test_use_serves_repeated_calls_from_cache(cache):
+    agent = FakeAgent()
+    first = ask(agent, cache)
+    assert ask(agent, cache) == first and agent.calls == 1
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+    ask(agent, cache, {"steps": ["Restock the shelves"]})
+    assert agent.calls == 2
+
+
+def test_key_covers_model_and_instruction(cache):
+    agent = FakeAgent()
+    key = cache.key(agent, PAYLOAD)
+    assert key == cache.key(agent, {"steps": list(PAYLOAD["steps"])})
+    agent.instruction = "Find issues and risks."
+    assert cache.key(agent, PAYLOAD) != key
+
+
+def test_refresh_recalls_and_overwrites(cache):
+    ask(FakeAgent("Manual process"), cache)
+    cache.mode = "refresh"
+    fresh = FakeAgent("Duplicate data entry")
+    assert ask(fresh, cache)["issues"][0]["issue"] == "Duplicate data entry"
+    assert ask(fresh, cache) and fresh.calls == 2  # never read in refresh mode
+    cache.mode = "use"
+    later = FakeAgent("Manual process")
+    assert ask(later, cache)["issues"][0]["issue"] == "Duplicate data entry" and later.calls == 0
+
+
+def test_bypass_neither_reads_nor_writes(cache):
+    agent = FakeAgent()
+    cache.mode = "bypass"
+    ask(agent, cache)
+    ask(agent, cache)
+    assert agent.calls == 2 and cache.stats()["entries"] == 0
+
+
+def test_rejects_unknown_mode(tmp_path):
+    with pytest.raises(ValueError, match="mode"):
+        LLMResponseCache(tmp_path / "llm.sqlite3", mode="readonly")
+
+
+def test_invalid_output_is_not_cached(cache):
+    agent = FakeAgent()
+    agent.run = lambda payload: SimpleNamespace(content="not json")
+    with pytest.raises(ValueError):
+        ask(agent, cache)
+    assert cache.stats()["entries"] == 0
+
+
+def test_expired_entries_are_misses(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3", ttl_s=0, mode="use")
+    cache.put("k", FakeAgent(), {"issues": []})
+    assert cache.get("k") is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = LLMResponseCache(tmp_path / "llm.sqlite3", max_bytes=100, mode="use")
+    agent = FakeAgent()
+    cache.put("a", agent, "x" * 40)
+    cache.put("b", agent, "y" * 40)
+    assert cache.get("a") == "x" * 40  # "b" is now the least recently used
+    cache.put("c", agent, "z" * 40)
+    assert cache.get("b") is None and cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_shared_across_threads_and_instances(tmp_path):
+    path = tmp_path / "llm.sqlite3"
+    writer, reader = LLMResponseCache(path, mode="use"), LLMResponseCache(path, mode="use")
+    errors = []
+
+    def work(n):
+        try:
+            for i in range(20):
+                writer.put(f"{n}-{i}", FakeAgent(), {"n": n, "i": i})
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert reader.get("3-19") == {"n": 3, "i": 19}
+    assert reader.stats()["entries"] == 80
@@ -0,0 +1,120 @@
+from pathlib import Path
+
+import pytest
+
+from tools import ocr_routing
+from tools.ocr_routing import OCRBackend, StubOCRBackend, classify_page, detect_format, iter_routed_pages
+from tools.tracing import tracer
+
+ROOT = Path(__file__).resolve().parent.parent
+SAMPLE_PDF = ROOT / "sample-data" / "StyleHive SOP.pdf"
+SCANNED_PDF = ROOT / "benchmarks" / "fixtures" / "pdf" / "scanned_sop.pdf"
+TEXT = "Cashier counts the float and records it in the till log."
+
+
+@pytest.fixture
+def fake_pdf(monkeypatch):
+    """
+    Replaces page extraction and rendering with an in-memory page list;
+    `pulled` records how far the page iterator has been consumed.
+    """
+    state = {"pages": [], "pulled": 0, "rendered": []}
+
+    def page_info(file_path, workers=None):
+        for page_no, (text, n_images) in enumerate(state["pages"], 1):
+            state["pulled"] = page_no
+            yield page_no, text, n_images
+
+    def render(file_path, page_numbers, dpi=ocr_routing.OCR_DPI):
+        state["rendered"].append(list(page_numbers))
+        return [f"page {n}".encode() for n in page_numbers]
+
+    monkeypatch.setattr(ocr_routing, "iter_pdf_page_info", page_info)
+    monkeypatch.setattr(ocr_routing, "render_pages", render)
+    return state
+
+
+def test_backend_must_implement_recognize():
+    with pytest.raises(TypeError):
+        OCRBackend()
+
+
+def test_classify_page():
+    assert classify_page(TEXT, 0) == "text"
+    assert classify_page(TEXT, 2) == "text"
+    assert classify_page("", 1) == "image"
+    assert classify_page("  ", 0) == "empty"
+    assert classify_page("p. 3", 0) == "text"
+
+
+def test_detect_format(tmp_path):
+    png = tmp_path / "scan.dat"
+    png.write_bytes(b"\x89PNG\r\n\x1a\n....")
+    txt = tmp_path / "sop.txt"
+    txt.write_text(TEXT)
+    assert detect_format(str(SAMPLE_PDF)) == "pdf"
+    assert detect_format(str(png)) == "image"
+    assert detect_format(str(txt)) == "text"
+
+
+def test_routes_only_scanned_pages_to_ocr(fake_pdf):
+    fake_pdf["pages"] = [(TEXT, 0), ("", 1), (TEXT, 1), ("", 2), ("", 0)]
+    backend = StubOCRBackend()
+    with tracer.run(), tracer.span("ocr") as span:
+        pages = list(iter_routed_pages("doc.pdf", backend, workers=2))
+    assert [n for n, _ in pages] == [1, 2, 3, 4, 5]
+    assert pages[0][1] == TEXT and pages[2][1] == TEXT and pages[4][1] == ""
+    assert pages[1][1] == backend.recognize([b"page 2"])[0]
+    assert pages[3][1] == backend.recognize([b"page 4"])[0]
+    assert sorted(n for batch in fake_pdf["rendered"] for n in batch) == [2, 4]
+    assert span.attrs["pages"] == 5 and span.attrs["text_pages"] == 2 and span.attrs["ocr_pages"] == 2
+
+
+def test_text_pages_do_not_need_a_backend(fake_pdf, monkeypatch):
+    fake_pdf["pages"] = [(TEXT, 0)] * 3
+    monkeypatch.setattr(ocr_routing, "get_ocr_backend", lambda name=None: pytest.fail("backend instantiated"))
+    assert [t for _, t in iter_routed_pages("doc.pdf")] == [TEXT] * 3
+    assert fake_pdf["rendered"] == []
+
+
+def test_streams_in_bounded_windows(fake_pdf):
+    fake_pdf["pages"] = [("", 1)] * 40
+    backend = StubOCRBackend()  # batch_size 4
+    pages = iter_routed_pages("doc.pdf", backend, workers=2)
+    assert next(pages)[0] == 1
+    # One window is 2 workers x 4 images: nothing beyond it has been read or OCRed
+    assert fake_pdf["pulled"] == 8
+    assert backend.calls == 2
+    assert [n for n, _ in pages] == list(range(2, 41))
+    assert all(len(batch) <= backend.batch_size for batch in fake_pdf["rendered"])
+
+
+def test_window_is_bounded_by_page_count(fake_pdf, monkeypatch):
+    monkeypatch.setattr(ocr_routing, "OCR_WINDOW_PAGES", 5)
+    fake_pdf["pages"] = [("", 1)] + [(TEXT, 0)] * 20
+    pages = iter_routed_pages("doc.pdf", StubOCRBackend(), workers=4)
+    next(pages)
+    assert fake_pdf["pulled"] == 5
+    assert len(list(pages)) == 20
+
+
+def test_stub_backend_is_registered():
+    assert isinstance(ocr_routing.get_ocr_backend("stub"), StubOCRBackend)
+
+
+def test_sample_pdf_text_layer(monkeypatch):
+    monkeypatch.setattr(ocr_routing, "get_ocr_backend", lambda name=None: pytest.fail("backend instantiated"))
+    pages = list(iter_routed_pages(str(SAMPLE_PDF), workers=1))
+    assert len(pages) == 3 and all(text.strip() for _, text in pages)
+
+
+def test_scanned_fixture_routes_image_pages_to_ocr():
+    # Page 1 keeps its text layer; pages 2-3 are image-only (benchmarks/synthetic.py)
+    backend = StubOCRBackend()
+    with tracer.run(), tracer.span("ocr") as span:
+        pages = list(iter_routed_pages(str(SCANNED_PDF), backend, workers=2))
+    assert [n for n, _ in pages] == [1, 2, 3]
+    assert pages[0][1].strip() and not pages[0][1].startswith("[ocr ")
+    assert all(text.startswith("[ocr ") for _, text in pages[1:])
+    assert backend.calls >= 1
+    assert span.attrs["text_pages"] == 1 and span.attrs["ocr_pages"] == 2
@@ -0,0 +1,89 @@
+import json
+
+import pytest
+
+from orchestrators.output_schemas import OutputStats, check_output, parse_json
+
+ROI_ROW = {"step": "Count the float", "estimated_savings_SGD": 120.0, "payback_months": 3.0}
+
+
+def test_valid_output_needs_no_repair():
+    out, repairs, errors = check_output("ROIEstimationAgent", {"roi": [ROI_ROW], "total_monthly_savings": 120.0})
+    assert (out, repairs, errors) == ({"roi": [ROI_ROW], "total_monthly_savings": 120.0}, [], [])
+
+
+@pytest.mark.parametrize("content, repair", [
+    ('```json\n{"issues": []}\n```', "fenced_json"),
+    ('Here is the result: {"issues": []} Hope this helps.', "surrounding_text"),
+    ('{"issues": [{"step": "a", "issue": "b", "impact": "c"},]}', "trailing_commas"),
+])
+def test_parse_repairs(content, repair):
+    repairs = []
+    obj = parse_json(content, repairs)
+    assert isinstance(obj["issues"], list)
+    assert repair in repairs
+
+
+def test_unparseable_json_is_an_error():
+    out, _, errors = check_output("PatternDetectionAgent", "not json at all")
+    assert out is None and errors[0].startswith("invalid JSON")
+
+
+def test_bare_list_is_wrapped():
+    out, repairs, errors = check_output("PatternDetectionAgent", [{"step": "a", "issue": "Manual", "impact": "Slow"}])
+    assert out == {"issues": [{"step": "a", "issue": "Manual", "impact": "Slow"}]}
+    assert repairs == ["bare_list"] and errors == []
+
+
+def test_order_numbers_are_renumbered():
+    content = {"process_map": [{"order": "first", "step": "a"}, {"order": 1, "step": "b", "role": "cashier"}]}
+    out, repairs, errors = check_output("ProcessMiningAgent", content)
+    assert [(p["order"], p["step"]) for p in out["process_map"]] == [(1, "a"), (2, "b")]
+    assert out["process_map"][0]["role"] == "staff"
+    assert "order_numbers" in repairs and "defaults" in repairs and errors == []
+
+
+def test_numbers_and_priority_are_repaired():
+    content = {
+        "benchmarks": [{"step": "a", "idp_suggestion": "Use POS", "priority": "high"}],
+    }
+    out, repairs, errors = check_output("BenchmarkingAgent", content)
+    assert out["benchmarks"][0]["priority"] == "High"
+    assert repairs == ["priority"] and errors == []
+
+    content = {"roi": [{"step": "a", "estimated_savings_SGD": "SGD 1,234.567", "payback_months": 2.26}]}
+    out, repairs, errors = check_output("ROIEstimationAgent", content)
+    assert out["roi"][0]["estimated_savings_SGD"] == 1234.57
+    assert out["roi"][0]["payback_months"] == 2.3
+    assert out["total_monthly_savings"] == 1234.57
+    assert repairs == ["numbers", "total"] and errors == []
+
+
+def test_missing_required_fields_are_errors():
+    out, _, errors = check_output("BenchmarkingAgent", {"benchmarks": [{"step": "a"}]})
+    assert errors == ["benchmarks[0].idp_suggestion: missing"]
+    _, _, errors = check_output("BenchmarkingAgent", {"other": []})
+    assert errors == ["benchmarks: missing"]
+
+
+def test_truncation_keeps_the_best_ranked():
+    rows = [{"step": f"s{i}", "estimated_savings_SGD": i, "payback_months": 1} for i in range(15)]
+    out, repairs, errors = check_output("ROIEstimationAgent", json.dumps({"roi": rows}))
+    assert [r["step"] for r in out["roi"]] == [f"s{i}" for i in range(14, 4, -1)]
+    assert "truncated" in repairs and errors == []
+
+
+def test_total_is_not_summed_over_unrepaired_values():
+    content = {"roi": [{"step": "a", "estimated_savings_SGD": "-", "payback_months": 1}]}
+    out, repairs, errors = check_output("ROIEstimationAgent", content)
+    assert "total_monthly_savings" not in out and "total" not in repairs
+    assert errors == ["roi[0].estimated_savings_SGD: expected a number, got '-'"]
+
+
+def test_output_stats_rates():
+    stats = OutputStats()
+    stats.add("ROIEstimationAgent", repaired=True)
+    stats.add("ROIEstimationAgent", retried=True, failed=True)
+    assert stats.stats()["ROIEstimationAgent"] == {
+        "checked": 2, "repaired": 1, "retried": 1, "failed": 1, "repair_rate": 0.5, "retry_rate": 0.5,
+    }
@@ -0,0 +1,51 @@
+from orchestrators.prompt_budget import PromptCompactor, estimate_tokens
+
+TEXT = "Retailers can adopt cloud POS systems that reconcile the float automatically. " * 5
+
+
+def match(score, title="Cloud POS", text=TEXT):
+    return {"source": "IDP Retail", "page": 3, "title": title, "score": score, "text": text}
+
+
+def passages_payload():
+    # The same section matched for two steps; its first copy scores lowest
+    return {
+        "sector": "Retail",
+        "issues": [{"step": "Count the float", "issue": "Manual process", "impact": "Slow"}],
+        "idp_passages": [
+            {"step": "Count the float", "matches": [match(0.1)]},
+            {"step": "Reconcile the till", "matches": [match(0.9)]},
+        ],
+    }
+
+
+def surviving_matches(payload):
+    return [m for entry in payload["idp_passages"] for m in entry["matches"]]
+
+
+def test_dedupe_keeps_text_once():
+    compacted, _ = PromptCompactor(budgets={}).compact("BenchmarkingAgent", passages_payload())
+    matches = surviving_matches(compacted)
+    assert len(matches) == 2
+    assert matches[0]["text"] == TEXT and "text" not in matches[1]
+
+
+def test_trimming_moves_text_to_surviving_copy():
+    untrimmed, _ = PromptCompactor(budgets={}).compact("BenchmarkingAgent", passages_payload())
+    budget = estimate_tokens(untrimmed) - 5  # forces one match out
+    compacted, stats = PromptCompactor(budgets={"BenchmarkingAgent": budget}).compact(
+        "BenchmarkingAgent", passages_payload()
+    )
+    matches = surviving_matches(compacted)
+    assert stats["trimmed_items"] == 1
+    assert [m["score"] for m in matches] == [0.9]
+    assert matches[0]["text"] == TEXT
+    assert stats["prompt_tokens_after"] <= budget
+
+
+def test_trimming_every_copy_drops_the_text():
+    compacted, stats = PromptCompactor(budgets={"BenchmarkingAgent": 1}).compact(
+        "BenchmarkingAgent", passages_payload()
+    )
+    assert surviving_matches(compacted) == []
+    assert stats["trimmed_items"] == 2
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from tools.roi_engine import DEFAULT_IMPLEMENTATION_COST, evaluate, items_to_columns, summarize, sweep
+
+ITEMS = [
+    {"step": "Reconcile the till float", "time_per_task_min": 30, "frequency_per_month": 22},
+    {"step": "Key in supplier invoices", "time_per_task_min": 60, "frequency_per_month": 4,
+     "error_multiplier": 1.5, "implementation_cost": 500},
+]
+
+
+def test_items_to_columns_defaults():
+    columns = items_to_columns(ITEMS)
+    assert columns["step"] == [item["step"] for item in ITEMS]
+    assert columns["implementation_cost"].tolist() == [DEFAULT_IMPLEMENTATION_COST, 500.0]
+    assert columns["effort_multiplier"].tolist() == [1.0, 1.0]
+    assert columns["error_multiplier"].tolist() == [1.0, 1.5]
+
+
+def test_evaluate():
+    result = evaluate(items_to_columns(ITEMS), hourly_cost=18.0)
+    # 0.5 h x 18 x 22 = 198; 1 h x 18 x 4 x 1.5 = 108
+    assert result["savings"].tolist() == pytest.approx([198.0, 108.0])
+    assert result["payback_months"].tolist() == pytest.approx([1000 / 198, 500 / 108])
+    assert result["total_monthly_savings"] == pytest.approx(306.0)
+
+
+def test_sweep_matches_evaluate():
+    columns = items_to_columns(ITEMS)
+    grid = sweep(columns, [12.0, 18.0, 24.0], {"error_multiplier": [0.8, 1.0]}, implementation_costs=[500, 1000])
+    assert [name for name, _ in grid["axes"]] == ["hourly_cost", "error_multiplier", "implementation_cost"]
+    assert grid["savings"].shape == (3, 2, 2, 2)
+    assert grid["total_monthly_savings"].shape == (3, 2, 2)
+    # hourly cost 18, error scale 1.0: same savings as a single evaluation
+    np.testing.assert_allclose(grid["savings"][1, 1, 0], evaluate(columns, 18.0)["savings"])
+    np.testing.assert_allclose(grid["payback_months"][1, 1, 1], 1000 / (evaluate(columns, 18.0)["savings"] + 1e-6))
+
+
+def test_sweep_keeps_per_step_costs():
+    columns = items_to_columns(ITEMS)
+    grid = sweep(columns, [18.0])
+    np.testing.assert_allclose(grid["payback_months"][0], evaluate(columns, 18.0)["payback_months"])
+    assert grid["portfolio_payback_months"][0] == pytest.approx(1500 / 306, rel=1e-6)
+
+
+def test_sweep_rejects_unknown_multiplier():
+    with pytest.raises(ValueError, match="speed_multiplier"):
+        sweep(items_to_columns(ITEMS), [18.0], {"speed_multiplier": [1.0]})
+
+
+def test_summarize():
+    grid = sweep(items_to_columns(ITEMS), [12.0, 18.0, 24.0], {"error_multiplier": [0.8, 1.0, 1.2]})
+    summary = summarize(grid)
+    assert summary["scenarios"] == 9
+    assert set(summary["total_monthly_savings"]) == {"p5", "p25", "p50", "p75", "p95"}
+    assert summary["total_monthly_savings"]["p50"] == pytest.approx(306.0)
+    swings = [s["savings_swing"] for s in summary["sensitivity"]]
+    assert swings == sorted(swings, reverse=True)
+    assert {s["axis"] for s in summary["sensitivity"]} == {"hourly_cost", "error_multiplier"}
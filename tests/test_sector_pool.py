@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+pytest.importorskip("google.adk.tools")
+
+from tools import step_model  # noqa: E402
+from tools.idp_store import idp_store  # noqa: E402
+from tools.sector_pool import SectorPool, footprint  # noqa: E402
+from tools.step_model import DEFAULT_MODEL_PATH, StepFeatureModel  # noqa: E402
+
+CORPUS = [
+    "Cashier counts the float", "Manager approves the refund", "Staff restock the shelves",
+    "Cashier records the sale", "Manager signs the report", "Staff clean the counter",
+]
+
+
+def test_refresh_reloads_a_refitted_corpus_model():
+    StepFeatureModel(n_clusters=2).fit(CORPUS).save(DEFAULT_MODEL_PATH)
+    pool = SectorPool(root=DEFAULT_MODEL_PATH.parent.parent)
+    first = pool.get("Logistics").step_model
+    assert first.clusterer.n_clusters == 2
+
+    StepFeatureModel(n_clusters=3).fit(CORPUS).save(DEFAULT_MODEL_PATH)
+    stat = DEFAULT_MODEL_PATH.stat()
+    os.utime(DEFAULT_MODEL_PATH, (stat.st_atime, stat.st_mtime + 10))
+    assert pool.refresh() == ["Logistics"]
+    assert pool.get("Logistics").step_model.clusterer.n_clusters == 3
+    assert step_model.get_step_model() is pool.get("Logistics").step_model
+
+
+def test_nbytes_measures_the_loaded_index(tmp_path):
+    small = tmp_path / "small.txt"
+    small.write_text("Retail IDP\n\nAdopt cloud POS systems.\n", encoding="utf-8")
+    idp_store.ingest("Sizing", str(small))
+    pool = SectorPool(root=tmp_path)
+    before = pool.get("Sizing").nbytes
+    assert before >= footprint(idp_store.read("Sizing"))
+
+    large = tmp_path / "large.txt"
+    large.write_text("\n\n".join(f"Section {i}\nInventory tracking with RFID tag {i}." for i in range(200)), encoding="utf-8")
+    idp_store.ingest("Sizing", str(large))
+    pool.refresh(force=True)
+    after = pool.get("Sizing").nbytes
+    assert after > before
+    # In memory, the index is larger than its JSON file
+    assert after > idp_store.index_path("Sizing").stat().st_size
+
+
+def test_footprint_counts_shared_objects_once():
+    text = "x" * 10_000
+    assert footprint([text, text]) < 2 * footprint(text)
+
+
+def test_failed_refresh_keeps_the_entry_and_is_reported(tmp_path, capsys):
+    pool = SectorPool(root=tmp_path)
+    entry = pool.get("Broken")
+    config = tmp_path / "sectors" / "broken.json"
+    config.parent.mkdir()
+    config.write_text("{not json", encoding="utf-8")
+
+    assert pool.refresh() == []
+    assert pool.get("Broken") is entry
+    described = pool.describe()
+    assert described["refresh_errors"] == 1
+    assert described["last_refresh_error"]["sector"] == "Broken"
+    assert described["last_refresh_error"]["error"].startswith("JSONDecodeError")
+    assert "sector_pool_refresh_error" in capsys.readouterr().err
+
+    config.write_text('{"roi": {"hourly_cost": 25}}', encoding="utf-8")
+    assert pool.refresh() == ["Broken"]
+    assert pool.get("Broken").roi_for()["hourly_cost"] == 25
@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from api.server import JobManager, load_tenant_keys, make_server
+from orchestrators.analytics import AnalyticsStore
+
+
+def report(step: str, savings: float) -> dict:
+    return {
+        "process_map": [{"order": 1, "step": step, "role": "cashier"}],
+        "issues": [{"step": step, "issue": "Manual process", "impact": "Slow"}],
+        "benchmarks": [{"step": step, "idp_suggestion": "Use a cloud POS", "priority": "High"}],
+        "roi": [{"step": step, "estimated_savings_SGD": savings, "payback_months": 2.0}],
+        "total_monthly_savings": savings,
+        "idp_alignment_summary": "1 of 1 issues map to an IDP solution",
+    }
+
+
+KEYS = {"acme": "acme-key", "globex": "globex-key"}
+
+
+class StubPipeline:
+    def run(self, params, on_event=None):
+        return report("Count the float", 100.0)
+
+
+@pytest.fixture
+def api(tmp_path):
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    (uploads / "sop.txt").write_text("1. Count the float\n", encoding="utf-8")
+    store = AnalyticsStore(tmp_path / "analytics.sqlite3")
+    store.add_report(report("Count the float", 100.0), "Retail", "acme", "a.txt")
+    store.add_report(report("Restock the shelves", 50.0), "Retail", "globex", "b.txt")
+    server = make_server(
+        "127.0.0.1", 0, JobManager(StubPipeline(), workers=1, analytics=store), upload_root=uploads, tenant_keys=KEYS,
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def request(url: str, body=None, key=None) -> tuple:
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    headers = {"Authorization": f"Bearer {key}"} if key else {}
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data, headers=headers)) as resp:
+            return resp.status, json.loads(resp.read())
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_analytics_are_scoped_to_the_tenant_in_the_path(api):
+    status, body = request(f"{api}/tenants/acme/analytics/steps", key="acme-key")
+    assert status == 200 and body["tenant"] == "acme"
+    assert [r["step"] for r in body["rows"]] == ["Count the float"]
+
+    status, body = request(f"{api}/tenants/acme/analytics/steps?tenant=globex", key="acme-key")
+    assert {r["tenant"] for r in body["rows"]} == {"acme"}
+
+    status, body = request(f"{api}/tenants/globex/analytics/savings", key="globex-key")
+    assert body["rows"] == [{"sector": "Retail", "reports": 1, "total_monthly_savings": 50.0}]
+    status, body = request(f"{api}/tenants/globex/analytics/savings?by=tenant", key="globex-key")
+    assert [r["tenant"] for r in body["rows"]] == ["globex"]
+
+
+def test_analytics_need_the_tenants_key(api):
+    assert request(f"{api}/tenants/acme/analytics/steps")[0] == 401
+    assert request(f"{api}/tenants/acme/analytics/steps", key="globex-key")[0] == 403
+    assert request(f"{api}/tenants/initech/analytics/savings", key="acme-key")[0] == 403
+    assert request(f"{api}/tenants/acme/analytics/savings", key="acme-key ")[0] == 200
+
+
+def test_analytics_are_off_without_tenant_keys(tmp_path):
+    store = AnalyticsStore(tmp_path / "analytics.sqlite3")
+    server = make_server("127.0.0.1", 0, JobManager(StubPipeline(), workers=1, analytics=store), upload_root=tmp_path)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/tenants/acme/analytics/steps"
+        assert request(url, key="anything")[0] == 403
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_load_tenant_keys(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps(KEYS), encoding="utf-8")
+    assert load_tenant_keys(str(path)) == KEYS
+    assert load_tenant_keys(None) == {}
+    path.write_text(json.dumps({"acme": ""}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_tenant_keys(str(path))
+
+
+def test_unscoped_analytics_are_not_served(api):
+    assert request(f"{api}/analytics/steps")[0] == 404
+    assert request(f"{api}/analytics/savings?by=tenant")[0] == 404
+
+
+def test_job_result_round_trip(api):
+    status, job = request(f"{api}/jobs", {"file_path": "sop.txt", "sector": "Retail"})
+    assert status == 202
+    for _ in range(100):
+        status, body = request(f"{api}{job['result_url']}")
+        if status != 202:
+            break
+        time.sleep(0.05)
+    assert status == 200
+    result = body["result"]
+    assert {k: result[k] for k in report("Count the float", 100.0)} == report("Count the float", 100.0)
+    assert "trace_summary" in result
+
+
+@pytest.mark.parametrize("file_path", ["../analytics.sqlite3", "/etc/passwd", "missing.txt"])
+def test_jobs_only_read_the_upload_root(api, file_path):
+    assert request(f"{api}/jobs", {"file_path": file_path})[0] == 400
+
+
+class FlakyPipeline:
+    """Fails the analysis, then returns an unserializable result, then succeeds."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def run(self, params, on_event=None):
+        self.calls += 1
+        if self.calls == 1:
+            raise ValueError("unreadable PDF")
+        if self.calls == 2:
+            return {"unserializable": object()}
+        return report("Count the float", 100.0)
+
+
+def test_worker_survives_failing_jobs():
+    manager = JobManager(FlakyPipeline(), workers=1)
+    jobs = [manager.submit({"file_path": f"sop-{n}.txt"}) for n in range(3)]
+    manager.queue.join()
+    assert [j.status for j in jobs] == ["error", "error", "ok"]
+    assert jobs[0].error == "ValueError: unreadable PDF"
+    assert jobs[1].error.startswith("TypeError") and jobs[1].result is None
+    assert jobs[1].events[-1]["status"] == "failed"
+    assert jobs[2].to_dict(with_result=True)["result"]["total_monthly_savings"] == 100.0
@@ -0,0 +1,36 @@
+from tools.step_extraction import extract_steps, step_key
+
+
+def test_keeps_numbered_leaves():
+    text = "\n".join([
+        "1. Roles & Responsibilities",
+        "2. Opening Procedure",
+        "2.1. Unlock the store and disarm the alarm.",
+        "2.2. Count the cash float at the till.",
+        "3. Record the opening time in the log.",
+    ])
+    assert extract_steps(text) == [
+        "Unlock the store and disarm the alarm.",
+        "Count the cash float at the till.",
+        "Record the opening time in the log.",
+    ]
+
+
+def test_skips_headings_and_short_lines():
+    text = "\n".join([
+        "Step 1: Define Task & Format",
+        "Step 2: Check stock",
+        "Step 3: Email the supplier with the reorder list.",
+        "4) Update the stock sheet",
+    ])
+    assert extract_steps(text) == ["Email the supplier with the reorder list.", "Update the stock sheet"]
+
+
+def test_falls_back_to_lines():
+    text = "Opening checklist\n- Unlock the front door\n* Switch on the POS terminal\n\nDone"
+    assert extract_steps(text) == ["Unlock the front door", "Switch on the POS terminal"]
+
+
+def test_step_key():
+    assert step_key("  Count the Cash-Float (till #2). ") == "count the cash float till 2"
+    assert step_key("Count the cash float, till 2") == step_key("count the CASH float: till 2")
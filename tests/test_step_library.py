@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+from orchestrators.pipeline_types import Benchmark, Issue, ProcessStep
+from tools.step_library import SCHEMA_VERSION, StepLibrary, match_key
+
+STEP = "Count the cash float at the till before opening"
+
+
+@pytest.fixture
+def library(tmp_path):
+    return StepLibrary(tmp_path / "library.sqlite3", mode="use")
+
+
+def test_near_duplicates_share_a_canonical_step(library):
+    library.learn_roles("acme", [ProcessStep(1, STEP, "cashier")])
+    near, other_verb, new = library.match(
+        ["3. Counts the cash float at the till before opening.", "Check the cash float at the till before opening",
+         "Mop the floor"],
+        "acme",
+    )
+    assert near.role == "cashier"
+    assert other_verb is None and new is None
+    assert match_key("Step 3 Count the float") == "count the float"
+
+
+def test_answers_are_scoped_by_tenant(library):
+    library.learn_roles("acme", [ProcessStep(1, STEP, "cashier")])
+    library.learn_roles("globex", [ProcessStep(1, STEP, "manager")])
+    assert library.match([STEP], "acme")[0].role == "cashier"
+    assert library.match([STEP], "globex")[0].role == "manager"
+    assert library.match([STEP], "initech") == [None]
+    assert library.stats()["canonical_steps"] == 1
+
+
+def test_newer_answers_replace_older_ones(library, tmp_path):
+    library.learn_roles("acme", [ProcessStep(1, STEP, "cashier")])
+    library.learn_roles("acme", [ProcessStep(1, STEP, "supervisor")])
+    library.learn_roi("acme", [{"step": STEP, "time_per_task_min": 30.0}])
+    library.learn_roi("acme", [{"step": STEP, "time_per_task_min": 12.0}])
+    reopened = StepLibrary(tmp_path / "library.sqlite3", mode="use")
+    facts = reopened.match([STEP], "acme")[0]
+    assert (facts.role, facts.time_per_task_min) == ("supervisor", 12.0)
+
+
+def test_benchmarks_follow_the_idp_index_version(library, tmp_path):
+    issue = Issue(STEP, "Manual process", "Slows down the workflow")
+    library.learn_benchmarks("acme", "Retail", [Benchmark(STEP, "Use a cash counter", "High")], [issue], "v1")
+    facts = library.match([STEP], "acme")[0]
+    assert facts.benchmark("Retail", "v1") == ("Use a cash counter", "High")
+    assert facts.benchmark("Retail", "v2") is None  # index rebuilt since
+    assert facts.benchmark("F&B", "v1") is None
+    assert (facts.issue, facts.impact) == ("Manual process", "Slows down the workflow")
+
+    library.learn_benchmarks("acme", "Retail", [Benchmark(STEP, "Adopt a cloud POS", "Medium")], [issue], "v2")
+    reopened = StepLibrary(tmp_path / "library.sqlite3", mode="use")
+    assert reopened.match([STEP], "acme")[0].benchmark("Retail", "v2") == ("Adopt a cloud POS", "Medium")
+
+
+def test_refresh_mode_learns_but_serves_nothing(tmp_path):
+    path = tmp_path / "library.sqlite3"
+    StepLibrary(path, mode="use").learn_roles("acme", [ProcessStep(1, STEP, "cashier")])
+    refreshing = StepLibrary(path, mode="refresh")
+    assert refreshing.match([STEP], "acme") == [None]
+    refreshing.learn_roles("acme", [ProcessStep(1, STEP, "supervisor")])
+    assert StepLibrary(path, mode="use").match([STEP], "acme")[0].role == "supervisor"
+
+
+def test_off_mode_does_nothing(tmp_path):
+    library = StepLibrary(tmp_path / "library.sqlite3", mode="off")
+    library.learn_roles("acme", [ProcessStep(1, STEP, "cashier")])
+    assert library.match([STEP], "acme") == [None]
+    assert not (tmp_path / "library.sqlite3").exists()
+
+
+def test_add_reuses_a_step_another_process_inserted(tmp_path):
+    path = tmp_path / "library.sqlite3"
+    first, second = StepLibrary(path, mode="use"), StepLibrary(path, mode="use")
+    second.stats()  # loaded before `first` inserts
+    first.learn_roles("acme", [ProcessStep(1, STEP, "cashier")])
+    entry = second.add(STEP)
+    assert entry.id == first.add(STEP).id
+    assert entry.tenants["acme"].role == "cashier"
+
+
+def test_old_global_libraries_are_dropped(tmp_path):
+    path = tmp_path / "library.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        "CREATE TABLE canonical_steps (id INTEGER PRIMARY KEY, step TEXT, step_key TEXT UNIQUE, role TEXT, "
+        "issue TEXT, impact TEXT, time_per_task_min REAL, hits INTEGER, created REAL);"
+        "CREATE TABLE canonical_benchmarks (canonical_id INTEGER, sector TEXT, idp_suggestion TEXT, priority TEXT);"
+        "INSERT INTO canonical_steps VALUES (1, 'Count the float', 'count the float', 'cashier', NULL, NULL, NULL, 0, 0);"
+    )
+    conn.close()
+    library = StepLibrary(path, mode="use")
+    assert library.match(["Count the float"], "acme") == [None]
+    assert library.stats()["canonical_steps"] == 0
+    assert sqlite3.connect(path).execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
@@ -0,0 +1,52 @@
+import threading
+from pathlib import Path
+
+import pytest
+
+from tools.step_extraction import extract_steps
+from tools.step_model import StepFeatureModel
+
+SAMPLE_SOP = Path(__file__).resolve().parent.parent / "sample-data" / "StyleHiveSOP.txt"
+
+
+@pytest.fixture(scope="module")
+def steps():
+    return extract_steps(SAMPLE_SOP.read_text(encoding="utf-8-sig"))
+
+
+def test_fit_is_deterministic(steps):
+    assert StepFeatureModel(n_clusters=4).fit(steps).predict(steps) == StepFeatureModel(n_clusters=4).fit(steps).predict(steps)
+
+
+def test_predict_during_partial_fit(steps):
+    model = StepFeatureModel(n_clusters=4).fit(steps)
+    errors = []
+
+    def update():
+        for _ in range(20):
+            model.partial_fit(steps, save=False)
+
+    def predict():
+        for _ in range(20):
+            try:
+                labels = model.predict(steps)
+                assert len(labels) == len(steps) and all(0 <= label < 4 for label in labels)
+            except Exception as exc:
+                errors.append(exc)
+
+    threads = [threading.Thread(target=update)] + [threading.Thread(target=predict) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+
+
+def test_unfitted_clustering_is_stable_across_runs(steps, monkeypatch):
+    pytest.importorskip("google.adk.tools")
+    from tools import pattern_tools
+
+    monkeypatch.setattr(pattern_tools, "get_step_model", lambda: None)
+    tool = pattern_tools.SequenceClusteringTool()
+    first = tool.run(steps, num_clusters=3)
+    assert all(tool.run(steps, num_clusters=3) == first for _ in range(5))
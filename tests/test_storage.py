@@ -0,0 +1,42 @@
+import threading
+
+import pytest
+
+from tools import storage
+from tools.storage import atomic_write_bytes
+
+
+def test_concurrent_writers_of_one_path(tmp_path):
+    target = tmp_path / "entry.json"
+    errors = []
+
+    def write(n):
+        for i in range(100):
+            try:
+                atomic_write_bytes(target, f"{n}:{i}".encode())
+            except OSError as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(n,)) for n in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    n, i = target.read_text().split(":")
+    assert 0 <= int(n) < 8 and 0 <= int(i) < 100
+    assert [p.name for p in tmp_path.iterdir()] == ["entry.json"]
+
+
+def test_failed_write_leaves_no_temp_file(tmp_path, monkeypatch):
+    target = tmp_path / "entry.json"
+    atomic_write_bytes(target, b"old")
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(storage.os, "replace", fail)
+    with pytest.raises(OSError):
+        atomic_write_bytes(target, b"new")
+    assert target.read_bytes() == b"old"
+    assert [p.name for p in tmp_path.iterdir()] == ["entry.json"]
@@ -0,0 +1,28 @@
+import importlib
+
+# —————————————————————————————
+# Lazy tool exports
+# Maps each Tool's `name` to the module and class implementing it. Importing
+# `tools` imports no tool module; `from tools import OCRTool` imports only
+# that tool's module, and heavy dependencies (sklearn, langchain, pdfplumber,
+# requests, google-cloud-vision) are only imported inside the tool methods
+# that need them.
+# —————————————————————————————
+
+TOOL_REGISTRY = {
+    "ocr_tool": ("tools.document_tools", "OCRTool"),
+    "lc_pdf_parser": ("tools.document_tools", "LangChainParserTool"),
+    "sequence_clustering": ("tools.pattern_tools", "SequenceClusteringTool"),
+    "anomaly_detection": ("tools.pattern_tools", "AnomalyDetectionTool"),
+    "roi_calculator": ("tools.roi_calculator", "ROICalculatorTool"),
+    "idp_fetcher": ("tools.idp_fetcher_tool", "IDPFetcherTool"),
+    "idp_retrieval": ("tools.idp_store", "IDPRetrievalTool"),
+}
+_CLASS_MODULES = {cls: module for module, cls in TOOL_REGISTRY.values()}
+
+
+def __getattr__(name):
+    # `from tools import OCRTool` without importing every tool module
+    if name in _CLASS_MODULES:
+        return getattr(importlib.import_module(_CLASS_MODULES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
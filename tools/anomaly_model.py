@@ -0,0 +1,164 @@
+import sys
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from tools.step_features import build_step_features, corpus_idf
+from tools.step_model import get_step_model
+from tools.storage import DATA_DIR
+
+# —————————————————————————————
+# Pre-fitted step anomaly detector
+# A scaled IsolationForest fitted once over the multi-feature vectors of the
+# whole SOP corpus and persisted with joblib. At runtime it only scores:
+# whole batches of steps (across many SOPs) go through one predict call.
+# —————————————————————————————
+
+DEFAULT_MODEL_PATH = DATA_DIR / "models" / "anomaly_model.joblib"
+
+
+_idf_cache = (None, None)
+
+
+def _idf() -> Optional[dict]:
+    # Corpus IDF from the shared step model, recomputed only when the model changes
+    global _idf_cache
+    model = get_step_model()
+    if model is None:
+        return None
+    if _idf_cache[0] is not model:
+        _idf_cache = (model, corpus_idf(model.vectorizer))
+    return _idf_cache[1]
+
+
+class StepAnomalyDetector:
+    def __init__(self, contamination: float = 0.1):
+        self.contamination = contamination
+        self.pipeline = None
+
+    def fit(self, process_maps: list) -> "StepAnomalyDetector":
+        """
+        Args:
+          process_maps: One mined process_map (dicts with "order", "step",
+            "role") per SOP. Plain step strings are accepted but leave the
+            role features constant.
+        """
+        from sklearn.ensemble import IsolationForest
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+
+        idf = _idf()
+        X = np.vstack([build_step_features(pm, idf) for pm in process_maps if pm])
+        self.pipeline = make_pipeline(
+            StandardScaler(),
+            IsolationForest(contamination=self.contamination, random_state=42),
+        )
+        self.pipeline.fit(X)
+        return self
+
+    def score_batch(self, process_maps: list) -> list:
+        """
+        Scores many SOPs in a single vectorized pass.
+        Returns:
+          One list per SOP of (step_text, anomaly_score, is_anomaly); lower scores are more anomalous.
+        """
+        idf = _idf()
+        blocks = [build_step_features(pm, idf) for pm in process_maps]
+        sizes = [len(b) for b in blocks]
+        if not sum(sizes):
+            return [[] for _ in process_maps]
+        X = np.vstack([b for b in blocks if len(b)])
+        scores = self.pipeline.decision_function(X)
+        flags = scores < 0  # IsolationForest.predict() == -1, without a second pass
+
+        results, offset = [], 0
+        for pm, size in zip(process_maps, sizes):
+            texts = [s["step"] if isinstance(s, dict) else s for s in pm]
+            results.append([
+                (text, float(scores[offset + i]), bool(flags[offset + i])) for i, text in enumerate(texts)
+            ])
+            offset += size
+        return results
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        import joblib
+
+        path = Path(path or DEFAULT_MODEL_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        joblib.dump({"contamination": self.contamination, "pipeline": self.pipeline}, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> Optional["StepAnomalyDetector"]:
+        import joblib
+
+        path = Path(path or DEFAULT_MODEL_PATH)
+        if not path.exists():
+            return None
+        state = joblib.load(path)
+        detector = cls(contamination=state["contamination"])
+        detector.pipeline = state["pipeline"]
+        return detector
+
+
+_shared_detector = None
+_shared_lock = threading.Lock()
+
+
+def get_anomaly_detector() -> Optional[StepAnomalyDetector]:
+    """
+    Returns the process-wide detector, loading it from disk on first use.
+    Returns None if no detector has been fitted yet.
+    """
+    global _shared_detector
+    with _shared_lock:
+        if _shared_detector is None:
+            _shared_detector = StepAnomalyDetector.load()
+        return _shared_detector
+
+
+def load_process_maps(paths: list) -> list:
+    """
+    Reads mined process maps (with roles) from report JSON files and
+    BatchRunner JSONL output files: one process_map list per report.
+    """
+    import json
+
+    process_maps = []
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as fh:
+            text = fh.read()
+        if path.endswith(".jsonl"):
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            records = [json.loads(text)]
+        for record in records:
+            report = record.get("result", record) if isinstance(record, dict) else None
+            if isinstance(report, dict) and report.get("process_map"):
+                process_maps.append(report["process_map"])
+    return process_maps
+
+
+if __name__ == "__main__":
+    # Fitted on mined process maps, so the role and position features carry signal:
+    # python -m tools.anomaly_model                         (every report in the analytics index)
+    # python -m tools.anomaly_model <report.json | batch_results.jsonl ...>
+    if sys.argv[1:]:
+        process_maps = load_process_maps(sys.argv[1:])
+    else:
+        from orchestrators.analytics import analytics_store
+
+        rows = analytics_store.query(
+            "SELECT report_id, ord, step, role FROM step_facts WHERE ord IS NOT NULL ORDER BY report_id, ord"
+        )
+        by_report = {}
+        for row in rows:
+            entry = {"order": row["ord"], "step": row["step"], "role": row["role"] or ""}
+            by_report.setdefault(row["report_id"], []).append(entry)
+        process_maps = list(by_report.values())
+    if not process_maps:
+        sys.exit("No mined process maps found; analyse some SOPs first.")
+    detector = StepAnomalyDetector().fit(process_maps)
+    print(f"Saved anomaly detector ({sum(map(len, process_maps))} steps, {len(process_maps)} SOPs) to {detector.save()}")
@@ -1,30 +1,102 @@
 from google.adk.tools import Tool
 import io
-from langchain.document_loaders import PyPDFPlumberLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
+import os
 from google.adk.tools import Tool
+from tools.ingestion_cache import ingestion_cache
+from tools.ocr_routing import default_backend_name, detect_format, get_ocr_backend, iter_routed_pages, ocr_images
+from tools.pdf_stream import iter_chunks
+from tools.tracing import traced_tool
 
+@traced_tool
 class OCRTool(Tool):
     name = "ocr_tool"
-    description = "Extracts text from scanned images or image-based PDFs using Google Vision OCR"
+    description = "Extracts text from scanned images or image-based PDFs with the configured OCR backend"
+    cache = ingestion_cache
 
     def run(self, file_path: str) -> str:
-        from google.cloud import vision
-        client = vision.ImageAnnotatorClient()
-        with io.open(file_path, 'rb') as image_file:
-            content = image_file.read()
-        image = vision.Image(content=content)
-        response = client.document_text_detection(image=image)
-        if response.error.message:
-            raise RuntimeError(f"OCR error: {response.error.message}")
-        return response.full_text_annotation.text or ""
+        backend = get_ocr_backend()
+        key = self.cache.key(file_path, self.name, {"feature": "document_text_detection", "backend": backend.name})
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached["text"]
 
+        if detect_format(file_path) == "pdf":
+            # Only pages without a text layer are rendered and OCR'd
+            text = "\n".join(t for _, t in iter_routed_pages(file_path, backend) if t)
+        else:
+            with io.open(file_path, 'rb') as image_file:
+                text = ocr_images([image_file.read()], backend)[0]
+        self.cache.put(key, {"text": text})
+        return text
+
+@traced_tool(methods=('run', 'parse'))
 class LangChainParserTool(Tool):
     name = "lc_pdf_parser"
+    chunk_size = 1000
+    chunk_overlap = 200
+    cache = ingestion_cache
+
     def run(self, file_path):
-        loader = PyPDFPlumberLoader(file_path)
-        docs = loader.load()
-        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-        chunks = splitter.split_documents(docs)
-        # flatten and return text or list of chunks
-        return [c.page_content for c in chunks]
+        return self._parse(file_path)["chunks"]
+
+    def parse(self, file_path: str) -> dict:
+        """
+        Returns:
+          { "text": str, "chunks": [str, ...] }  # full text and split chunks
+        """
+        return self._parse(file_path)
+
+    def _parse(self, file_path: str) -> dict:
+        # Shared by run() and parse(); untraced, so each call records one tool span
+        key = self._cache_key(file_path)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        texts = []
+        chunks = list(self._extract(file_path, key, texts))
+        return {"text": "\n".join(texts), "chunks": chunks}
+
+    def stream(self, file_path: str):
+        """
+        Yields chunks as soon as their page has been extracted, so downstream
+        stages can start before the whole document is parsed. Cached
+        documents replay their chunks without touching the file.
+        """
+        key = self._cache_key(file_path)
+        cached = self.cache.get(key)
+        if cached is not None:
+            yield from cached["chunks"]
+            return
+        yield from self._extract(file_path, key, [])
+
+    def _extract(self, file_path: str, key: str, texts: list):
+        ext = os.path.splitext(file_path)[1].lower()
+        if ext == ".txt":
+            with open(file_path, "r", encoding="utf-8-sig") as fh:
+                pages = [(1, fh.read())]
+        elif ext == ".docx":
+            import docx
+            pages = [(1, "\n".join(p.text for p in docx.Document(file_path).paragraphs))]
+        else:
+            pages = iter_routed_pages(file_path)  # text layer, OCR for scanned pages only
+
+        def collect(pages):
+            for page_no, text in pages:
+                texts.append(text)
+                yield page_no, text
+
+        chunks = []
+        for chunk in iter_chunks(collect(pages), self.chunk_size, self.chunk_overlap):
+            chunks.append(chunk)
+            yield chunk
+        self.cache.put(key, {"text": "\n".join(texts), "chunks": chunks})
+
+    def _cache_key(self, file_path: str) -> str:
+        settings = {
+            "loader": "pdf_stream+ocr_routing",
+            "ocr_backend": default_backend_name(),
+            "splitter": "RecursiveCharacterTextSplitter",
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+        }
+        return self.cache.key(file_path, self.name, settings)
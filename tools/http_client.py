@@ -0,0 +1,193 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from tools.storage import DATA_DIR, atomic_write_bytes
+from tools.tracing import record, record_cache
+
+# —————————————————————————————
+# Shared HTTP layer for tools that download documents
+# One pooled keep-alive requests.Session with bounded retries (exponential
+# backoff on connection errors, 429 and 5xx, honouring Retry-After) and
+# connect/read timeouts. Downloads go through a local blob store and use
+# conditional GET (If-None-Match / If-Modified-Since): an unchanged document
+# costs one small 304 request, or none while it is younger than `max_age_s`.
+# Text extracted from a stored body is kept next to it, keyed by the body's
+# ETag and digest, so an unchanged document is never re-extracted.
+# Layout: <BPA_DATA_DIR>/http_cache/<sha256(url)>.{bin,json}
+#         <BPA_DATA_DIR>/http_cache/<sha256(url)>.<validator tag>.txt
+# —————————————————————————————
+
+CONNECT_TIMEOUT_S = float(os.environ.get("BPA_HTTP_CONNECT_TIMEOUT_S", 5))
+READ_TIMEOUT_S = float(os.environ.get("BPA_HTTP_READ_TIMEOUT_S", 60))
+MAX_RETRIES = int(os.environ.get("BPA_HTTP_RETRIES", 3))
+BACKOFF_FACTOR = 0.5  # 0.5s, 1s, 2s, ...
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+POOL_SIZE = 10
+DEFAULT_MAX_AGE_S = float(os.environ.get("BPA_HTTP_MAX_AGE_S", 24 * 3600))
+
+
+class BlobStore:
+    """
+    Stores downloaded bodies with their validators (ETag, Last-Modified).
+    """
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else DATA_DIR / "http_cache"
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def body_path(self, url: str) -> Path:
+        return self.root / f"{self._key(url)}.bin"
+
+    def meta(self, url: str) -> Optional[dict]:
+        try:
+            with open(self.root / f"{self._key(url)}.json", "r", encoding="utf-8") as fh:
+                meta = json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        return meta if self.body_path(url).exists() else None
+
+    def save_meta(self, url: str, meta: dict) -> None:
+        atomic_write_bytes(self.root / f"{self._key(url)}.json", json.dumps(meta).encode("utf-8"))
+
+    def derived_path(self, url: str, meta: dict, suffix: str = ".txt") -> Path:
+        """
+        Path for data derived from the stored body (e.g. extracted text),
+        unique to the body's ETag and digest.
+        """
+        validator = f"{meta.get('etag') or ''}|{meta['sha256']}"
+        tag = hashlib.sha256(validator.encode("utf-8")).hexdigest()[:16]
+        return self.root / f"{self._key(url)}.{tag}{suffix}"
+
+    def drop_derived(self, url: str) -> None:
+        # Derived data of a replaced body is stale
+        for path in self.root.glob(f"{self._key(url)}.*"):
+            if path.suffix not in (".bin", ".json"):
+                path.unlink(missing_ok=True)
+
+    def temp_body_path(self, url: str) -> Path:
+        self.root.mkdir(parents=True, exist_ok=True)
+        return self.root / f".{self._key(url)}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+class HTTPClient:
+    def __init__(
+        self,
+        timeout: tuple = (CONNECT_TIMEOUT_S, READ_TIMEOUT_S),
+        retries: int = MAX_RETRIES,
+        backoff_factor: float = BACKOFF_FACTOR,
+        pool_size: int = POOL_SIZE,
+        store: Optional[BlobStore] = None,
+    ):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.pool_size = pool_size
+        self.store = store or BlobStore()
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # Built on first use so importing this module doesn't import requests
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=self.retries,
+                    backoff_factor=self.backoff_factor,
+                    status_forcelist=RETRY_STATUSES,
+                    allowed_methods=frozenset({"GET", "HEAD"}),
+                    respect_retry_after_header=True,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def get(self, url: str, **kwargs):
+        """
+        GET through the pooled session with the client's timeouts and retries.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def download(self, url: str, max_age_s: float = DEFAULT_MAX_AGE_S) -> Path:
+        """
+        Args:
+          url: Document to download.
+          max_age_s: Serve the stored copy without any request while it is
+            younger than this; older copies are revalidated with a conditional GET.
+        Returns:
+          Path of the local copy in the blob store.
+        """
+        meta = self.store.meta(url)
+        path = self.store.body_path(url)
+        if meta is not None and time.time() - meta["checked_at"] < max_age_s:
+            record_cache(hit=True)
+            record(http="fresh")
+            return path
+
+        headers = {}
+        if meta is not None:
+            if meta.get("etag"):
+                headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                headers["If-Modified-Since"] = meta["last_modified"]
+
+        resp = self.get(url, headers=headers, stream=True)
+        if resp.status_code == 304:
+            resp.close()
+            if meta is not None and path.exists():
+                meta["checked_at"] = time.time()
+                self.store.save_meta(url, meta)
+                record_cache(hit=True)
+                record(http="not_modified")
+                return path
+            # Nothing stored to fall back on: fetch the document unconditionally
+            resp = self.get(url, headers={"Cache-Control": "no-cache"}, stream=True)
+            if resp.status_code == 304:
+                resp.close()
+                raise RuntimeError(f"{url} answered 304 Not Modified to an unconditional GET")
+
+        with resp:
+            resp.raise_for_status()
+            record_cache(hit=False)
+            tmp = self.store.temp_body_path(url)
+            digest, size = hashlib.sha256(), 0
+            try:
+                with open(tmp, "wb") as fh:
+                    for block in resp.iter_content(chunk_size=1 << 16):
+                        fh.write(block)
+                        digest.update(block)
+                        size += len(block)
+                os.replace(tmp, path)
+            finally:
+                tmp.unlink(missing_ok=True)
+            self.store.drop_derived(url)
+            self.store.save_meta(url, {
+                "url": url,
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+                "sha256": digest.hexdigest(),
+                "size": size,
+                "checked_at": time.time(),
+            })
+            record(http="downloaded", downloaded_bytes=size)
+        return path
+
+
+# Shared client used by the download tools
+http_client = HTTPClient()
@@ -1,8 +1,17 @@
 from google.adk.tools import Tool
-import requests
-import io
-import pdfplumber
+import os
+from tools.http_client import http_client
+from tools.idp_store import idp_store
+from tools.pdf_stream import iter_pdf_pages
+from tools.storage import atomic_write_bytes
+from tools.tracing import record, traced_tool
 
+# IMDA by default; point at a mirror or a local stub server with IDP_BASE_URL
+IDP_BASE_URL = os.environ.get(
+    "IDP_BASE_URL", "https://www.imda.gov.sg/-/media/Imda/Files/Industry-Development/IDP"
+)
+
+@traced_tool
 class IDPFetcherTool(Tool):
     name = "idp_fetcher"
     description = (
@@ -10,22 +19,29 @@ class IDPFetcherTool(Tool):
     )
 
     def run(self, sector: str) -> str:
+        # 0. Prefer the locally indexed IDP corpus (works offline, no re-extraction)
+        local_text = idp_store.full_text(sector)
+        if local_text:
+            return local_text
+
         # 1. Search for the IDP PDF URL (could integrate with google_search tool instead)
         query = f"site:imda.gov.sg idp {sector} PDF"
         # Here you might call google_search or a custom search API
         # For simplicity, assume we have a direct mapping or fixed URL
-        pdf_url = f"https://www.imda.gov.sg/-/media/Imda/Files/Industry-Development/IDP/{sector}-IDP.pdf"
+        pdf_url = f"{IDP_BASE_URL.rstrip('/')}/{sector}-IDP.pdf"
 
-        # 2. Download the PDF
-        resp = requests.get(pdf_url)
-        resp.raise_for_status()
-        fp = io.BytesIO(resp.content)
+        # 2. Download through the shared client: pooled, retried, and a
+        #    conditional GET against the local blob store
+        pdf_path = http_client.download(pdf_url)
 
-        # 3. Extract text using pdfplumber
-        text = []
-        with pdfplumber.open(fp) as pdf:
-            for page in pdf.pages:
-                txt = page.extract_text()
-                if txt:
-                    text.append(txt)
-        return "\n".join(text)
\ No newline at end of file
+        # 3. Extract text page by page across worker processes, once per
+        #    version of the document
+        meta = http_client.store.meta(pdf_url)
+        text_path = http_client.store.derived_path(pdf_url, meta) if meta is not None else None
+        if text_path is not None and text_path.exists():
+            record(idp_text="cached")
+            return text_path.read_text(encoding="utf-8")
+        text = "\n".join(txt for _, txt in iter_pdf_pages(str(pdf_path)) if txt)
+        if text_path is not None:
+            atomic_write_bytes(text_path, text.encode("utf-8"))
+        return text
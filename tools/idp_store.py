@@ -0,0 +1,235 @@
+import json
+import math
+import re
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+from google.adk.tools import Tool
+from tools.pdf_stream import iter_pdf_pages
+from tools.storage import DATA_DIR, atomic_write_bytes
+from tools.tracing import traced_tool
+
+# —————————————————————————————
+# Local IDP corpus store
+# Sector IDP documents (PDF or text) are ingested once, split into sections
+# and indexed with BM25. The index is persisted next to the sections so the
+# BenchmarkingAgent can retrieve a few relevant passages per workflow step
+# offline, in milliseconds, instead of keyword-searching the full IDP.
+# Layout: <BPA_DATA_DIR>/idp/<sector>/index.json
+# —————————————————————————————
+
+TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has in into is it of on or the to with "
+    "this that these those their its our your all any each every".split()
+)
+SECTION_WORDS = 180
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> list:
+    return [t for t in TOKEN.findall(text.lower()) if t not in STOPWORDS and len(t) > 1]
+
+
+def sector_key(sector: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", sector.lower()).strip("-")
+
+
+def extract_pages(file_path: str):
+    """
+    Yields (page_number, text) for each page of a PDF, or the whole file as one page for text files.
+    """
+    if Path(file_path).suffix.lower() != ".pdf":
+        with open(file_path, "r", encoding="utf-8-sig") as fh:
+            yield 1, fh.read()
+        return
+    yield from iter_pdf_pages(file_path)
+
+
+def split_sections(pages, source: str) -> list:
+    """
+    Splits (page_number, text) pairs into sections of roughly SECTION_WORDS
+    words on paragraph boundaries. The first line of each section is its title.
+    """
+    sections = []
+    for page_no, text in pages:
+        buf = []
+        for para in re.split(r"\n\s*\n|\n(?=[A-Z0-9][^\n]{0,80}\n)", text):
+            para = para.strip()
+            if not para:
+                continue
+            buf.append(para)
+            if sum(len(p.split()) for p in buf) >= SECTION_WORDS:
+                sections.append(_section(buf, source, page_no))
+                buf = []
+        if buf:
+            sections.append(_section(buf, source, page_no))
+    return sections
+
+
+def _section(paragraphs: list, source: str, page: int) -> dict:
+    text = "\n".join(paragraphs)
+    return {"source": source, "page": page, "title": text.splitlines()[0][:120], "text": text}
+
+
+class BM25Index:
+    def __init__(self, sections: list, postings: dict, doc_lengths: list):
+        self.sections = sections
+        self.postings = postings  # term -> [[section_idx, term_freq], ...]
+        self.doc_lengths = doc_lengths
+        self.avg_len = (sum(doc_lengths) / len(doc_lengths)) if doc_lengths else 0.0
+
+    @classmethod
+    def build(cls, sections: list) -> "BM25Index":
+        postings = {}
+        doc_lengths = []
+        for idx, section in enumerate(sections):
+            tokens = tokenize(section["title"] + " " + section["text"])
+            doc_lengths.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                postings.setdefault(term, []).append([idx, tf])
+        return cls(sections, postings, doc_lengths)
+
+    def search(self, query: str, top_k: int = 3) -> list:
+        """
+        Returns up to `top_k` sections as { "title", "text", "source", "page", "score" }.
+        """
+        n = len(self.sections)
+        scores = {}
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n - len(posting) + 0.5) / (len(posting) + 0.5))
+            for idx, tf in posting:
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self.doc_lengths[idx] / (self.avg_len or 1))
+                scores[idx] = scores.get(idx, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+        best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+        return [dict(self.sections[idx], score=round(score, 3)) for idx, score in best]
+
+    def to_dict(self) -> dict:
+        return {"sections": self.sections, "postings": self.postings, "doc_lengths": self.doc_lengths}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "BM25Index":
+        return cls(data["sections"], data["postings"], data["doc_lengths"])
+
+
+class IDPStore:
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root) if root else DATA_DIR / "idp"
+        self._indexes = {}  # sector_key -> BM25Index
+        self._lock = threading.Lock()
+
+    def index_path(self, sector: str) -> Path:
+        return self.root / sector_key(sector) / "index.json"
+
+    def version(self, sector: str) -> Optional[str]:
+        """
+        Changes whenever the sector's index is rebuilt (ingest or IDP refresh);
+        None if the sector has no index.
+        """
+        try:
+            st = self.index_path(sector).stat()
+        except FileNotFoundError:
+            return None
+        return f"{st.st_mtime_ns:x}-{st.st_size:x}"
+
+    def has_sector(self, sector: str) -> bool:
+        return sector_key(sector) in self._indexes or self.index_path(sector).exists()
+
+    def ingest(self, sector: str, file_path: str) -> int:
+        """
+        Adds an IDP document to the sector corpus and rebuilds its index.
+        Re-ingesting the same source replaces its previous sections.
+        Returns the number of sections indexed for the sector.
+        """
+        source = Path(file_path).name
+        sections = split_sections(extract_pages(file_path), source)
+        with self._lock:
+            existing = self.load(sector)
+            kept = [s for s in existing.sections if s["source"] != source] if existing else []
+            index = BM25Index.build(kept + sections)
+            atomic_write_bytes(self.index_path(sector), json.dumps(index.to_dict()).encode("utf-8"))
+            self._indexes[sector_key(sector)] = index
+        return len(index.sections)
+
+    def read(self, sector: str) -> Optional[BM25Index]:
+        """
+        Loads the sector index from disk, bypassing the in-memory cache.
+        """
+        path = self.index_path(sector)
+        if not path.exists():
+            return None
+        with open(path, "r", encoding="utf-8") as fh:
+            return BM25Index.from_dict(json.load(fh))
+
+    def load(self, sector: str) -> Optional[BM25Index]:
+        key = sector_key(sector)
+        index = self._indexes.get(key)
+        if index is not None:
+            return index
+        index = self.read(sector)
+        if index is not None:
+            self._indexes[key] = index
+        return index
+
+    def evict(self, sector: str) -> None:
+        self._indexes.pop(sector_key(sector), None)
+
+    def full_text(self, sector: str) -> Optional[str]:
+        index = self.load(sector)
+        if index is None:
+            return None
+        return "\n\n".join(s["text"] for s in index.sections)
+
+    def search(self, sector: str, query: str, top_k: int = 3) -> list:
+        index = self.load(sector)
+        return index.search(query, top_k) if index else []
+
+
+# Shared instance used by the IDP tools
+idp_store = IDPStore()
+
+
+@traced_tool
+class IDPRetrievalTool(Tool):
+    name = "idp_retrieval"
+    description = (
+        "Retrieves the top-k most relevant Industry Digital Plan (IDP) passages for each "
+        "workflow step from the locally indexed IDP corpus."
+    )
+    store = idp_store
+
+    def run(self, sector: str, process_map: list, top_k: int = 3, index: Optional[BM25Index] = None) -> dict:
+        """
+        Args:
+          sector: Target sector (e.g. "Retail").
+          process_map: List of step strings or {"order","step","role"} dicts.
+          top_k: Passages to return per step.
+          index: Pre-loaded sector index (e.g. from the sector warm pool);
+            defaults to the store's.
+        Returns:
+          { "passages": [ {"step": str, "matches": [ {"title","text","source","page","score"}, ... ]}, ... ] }
+        """
+        if index is None:
+            if not self.store.has_sector(sector):
+                raise RuntimeError(f"No local IDP corpus indexed for sector '{sector}'")
+            index = self.store.load(sector)
+        passages = []
+        for entry in process_map:
+            step = entry["step"] if isinstance(entry, dict) else entry
+            passages.append({"step": step, "matches": index.search(step, top_k)})
+        return {"passages": passages}
+
+
+if __name__ == "__main__":
+    # python -m tools.idp_store <sector> <file> [<file> ...]
+    sector, files = sys.argv[1], sys.argv[2:]
+    for f in files:
+        count = idp_store.ingest(sector, f)
+        print(f"{sector}: indexed {f} ({count} sections in corpus)")
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from tools.storage import DATA_DIR, atomic_write_bytes
+from tools.tracing import record_cache
+
+# —————————————————————————————
+# Content-addressed cache for DocumentIngestionAgent tools.
+# Entries are keyed by the SHA-256 of the file bytes plus the tool's
+# parser/splitter settings, so an unchanged SOP skips PDF parsing and OCR.
+# Each entry is one JSON file; its mtime doubles as the LRU timestamp.
+# —————————————————————————————
+
+DEFAULT_MAX_BYTES = int(os.environ.get("BPA_INGESTION_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+class IngestionCache:
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else DATA_DIR / "ingestion_cache"
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def file_digest(file_path: str) -> str:
+        """
+        Streams the file through SHA-256 so large PDFs are never fully loaded.
+        """
+        h = hashlib.sha256()
+        with open(file_path, "rb") as fh:
+            for block in iter(lambda: fh.read(1 << 20), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def key(self, file_path: str, tool_name: str, settings: dict) -> str:
+        """
+        Args:
+          file_path: Document to be parsed.
+          tool_name: Name of the tool producing the entry (e.g. "ocr_tool").
+          settings: Parser/splitter settings that affect the output.
+        Returns:
+          Hex digest identifying (file content, tool, settings).
+        """
+        payload = json.dumps(
+            {"content": self.file_digest(file_path), "tool": tool_name, "settings": settings},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self._entry_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as fh:
+                value = json.load(fh)
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self._lock:
+                self.misses += 1
+            record_cache(hit=False)
+            return None
+        with self._lock:
+            self.hits += 1
+        record_cache(hit=True)
+        return value
+
+    def put(self, key: str, value: dict) -> None:
+        atomic_write_bytes(self._entry_path(key), json.dumps(value).encode("utf-8"))
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        total = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+        if total <= self.max_bytes:
+            return
+        entries.sort()  # oldest first
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def clear(self) -> None:
+        for path in self.root.glob("*/*.json"):
+            path.unlink(missing_ok=True)
+
+    def stats(self) -> dict:
+        entries = list(self.root.glob("*/*.json"))
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(entries),
+            "bytes": sum(p.stat().st_size for p in entries if p.exists()),
+            "max_bytes": self.max_bytes,
+        }
+
+
+# Shared instance used by the ingestion tools
+ingestion_cache = IngestionCache()
@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+from tools.storage import DATA_DIR
+
+# —————————————————————————————
+# Response cache for LlmAgent sub-agent calls.
+# Entries are keyed by model name, a hash of the agent instruction and the
+# canonical JSON of the input, so re-analysing the same SOP (or a shared
+# step list) skips the LLM round trip. Backed by one SQLite file in WAL mode
+# so several batch workers or processes can share it. Entries expire after
+# a TTL; the least recently used ones are evicted past a size bound.
+#
+# Modes: "use" (default), "refresh" (call the agent, overwrite the entry),
+# "bypass" (neither read nor write). Set BPA_LLM_CACHE or `llm_cache.mode`.
+# —————————————————————————————
+
+MODES = ("use", "refresh", "bypass")
+DEFAULT_TTL_S = float(os.environ.get("BPA_LLM_CACHE_TTL_S", 7 * 24 * 3600))
+DEFAULT_MAX_BYTES = int(os.environ.get("BPA_LLM_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    agent TEXT NOT NULL,
+    model TEXT,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed);
+"""
+
+
+def canonical_json(obj) -> str:
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl_s: float = DEFAULT_TTL_S,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        mode: Optional[str] = None,
+    ):
+        self.path = Path(path) if path else DATA_DIR / "llm_cache.sqlite3"
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.mode = mode or os.environ.get("BPA_LLM_CACHE", "use")
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown LLM cache mode '{self.mode}', expected one of {MODES}")
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def key(agent, payload) -> str:
+        """
+        Args:
+          agent: The LlmAgent being called (uses its `model` and `instruction`).
+          payload: JSON-serializable agent input.
+        Returns:
+          Hex digest identifying (model, instruction, input).
+        """
+        instruction = getattr(agent, "instruction", "") or ""
+        parts = {
+            "model": str(getattr(agent, "model", "") or ""),
+            "instruction": hashlib.sha256(str(instruction).encode("utf-8")).hexdigest(),
+            "input": canonical_json(payload),
+        }
+        return hashlib.sha256(canonical_json(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str):
+        if self.mode != "use":
+            return None
+        now = time.time()
+        row = self._conn().execute(
+            "SELECT value FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl_s)
+        ).fetchone()
+        with self._lock:
+            if row is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if row is None:
+            return None
+        self._conn().execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def put(self, key: str, agent, value) -> None:
+        if self.mode == "bypass":
+            return
+        text = json.dumps(value, default=str)
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO responses (key, agent, model, value, size, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                getattr(agent, "name", type(agent).__name__),
+                str(getattr(agent, "model", "") or ""),
+                text,
+                len(text),
+                now,
+                now,
+            ),
+        )
+        self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        conn = self._conn()
+        conn.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl_s,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        removed = 0
+        rows = conn.execute("SELECT key, size FROM responses ORDER BY accessed").fetchall()
+        for key, size in rows:  # least recently used first
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+        with self._lock:
+            self.evictions += removed
+
+    def clear(self) -> None:
+        self._conn().execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        entries, size = self._conn().execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        return {
+            "mode": self.mode,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+            "ttl_s": self.ttl_s,
+        }
+
+
+# Shared instance used by call_agent
+llm_cache = LLMResponseCache()
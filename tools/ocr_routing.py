@@ -0,0 +1,249 @@
+import contextvars
+import hashlib
+import io
+import os
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from tools.pdf_stream import iter_pdf_page_info
+from tools.tracing import record
+
+# —————————————————————————————
+# Deterministic format detection and page-level OCR routing
+# Each PDF page is classified by its text layer: pages with text are used
+# as-is and only image-only pages are rendered and sent to OCR, in batches
+# and concurrently, through a pluggable backend. OCR cost therefore scales
+# with the number of scanned pages, not the size of the document.
+#
+# Pages are routed in bounded windows as they are extracted, so at most
+# OCR_WINDOW_PAGES pages (and one round of OCR batches) are held at a time.
+#
+# Backends: "vision" (Google Cloud Vision batch annotate, default),
+# "tesseract" (local, needs pytesseract) and "stub" (offline, deterministic
+# placeholder text; for tests and benchmarks). Select with BPA_OCR_BACKEND
+# or register your own with register_ocr_backend().
+# —————————————————————————————
+
+MIN_TEXT_CHARS = 25  # fewer text-layer characters than this on a page with images -> scanned
+OCR_DPI = 200
+OCR_WORKERS = int(os.environ.get("BPA_OCR_WORKERS", 4))
+OCR_WINDOW_PAGES = 64  # pages buffered while their window's scanned pages are OCRed
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".tif", ".tiff", ".bmp", ".gif", ".webp"}
+MAGIC = (
+    (b"%PDF-", "pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image"),
+    (b"\xff\xd8\xff", "image"),
+    (b"II*\x00", "image"),
+    (b"MM\x00*", "image"),
+    (b"PK\x03\x04", "docx"),
+)
+
+
+def detect_format(file_path: str) -> str:
+    """
+    Returns "pdf", "image", "docx" or "text", from the file's magic bytes,
+    falling back to its extension.
+    """
+    with open(file_path, "rb") as fh:
+        head = fh.read(8)
+    for magic, fmt in MAGIC:
+        if head.startswith(magic):
+            return fmt
+    ext = Path(file_path).suffix.lower()
+    if ext in IMAGE_EXTENSIONS:
+        return "image"
+    return "docx" if ext == ".docx" else "text"
+
+
+def classify_page(text: str, n_images: int) -> str:
+    """
+    Returns "text" for pages with a usable text layer, "image" for scanned
+    pages, "empty" for blank pages.
+    """
+    stripped = text.strip()
+    if len(stripped) >= MIN_TEXT_CHARS:
+        return "text"
+    if n_images:
+        return "image"
+    return "text" if stripped else "empty"
+
+
+class OCRBackend(ABC):
+    name = "base"
+    batch_size = 1  # images per recognize() call
+
+    @abstractmethod
+    def recognize(self, images: list) -> list:
+        """
+        Args:
+          images: Encoded page images (PNG/JPEG bytes).
+        Returns:
+          Recognized text, one string per image.
+        """
+
+
+class VisionOCRBackend(OCRBackend):
+    name = "vision"
+    batch_size = 16  # Vision's limit for synchronous batch_annotate_images
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        with self._lock:
+            if self._client is None:
+                from google.cloud import vision
+                self._client = vision.ImageAnnotatorClient()
+            return self._client
+
+    def recognize(self, images: list) -> list:
+        from google.cloud import vision
+        feature = vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
+        requests = [vision.AnnotateImageRequest(image=vision.Image(content=c), features=[feature]) for c in images]
+        response = self.client.batch_annotate_images(requests=requests)
+        texts = []
+        for r in response.responses:
+            if r.error.message:
+                raise RuntimeError(f"OCR error: {r.error.message}")
+            texts.append(r.full_text_annotation.text or "")
+        return texts
+
+
+class TesseractOCRBackend(OCRBackend):
+    name = "tesseract"
+
+    def recognize(self, images: list) -> list:
+        import pytesseract
+        from PIL import Image
+        return [pytesseract.image_to_string(Image.open(io.BytesIO(c))) for c in images]
+
+
+class StubOCRBackend(OCRBackend):
+    """Offline stand-in: no OCR, a deterministic line per image."""
+
+    name = "stub"
+    batch_size = 4
+
+    def __init__(self):
+        self.calls = 0  # recognize() calls, i.e. batches
+        self._lock = threading.Lock()
+
+    def recognize(self, images: list) -> list:
+        with self._lock:
+            self.calls += 1
+        return [f"[ocr {hashlib.sha1(c).hexdigest()[:12]}]" for c in images]
+
+
+OCR_BACKENDS = {"vision": VisionOCRBackend, "tesseract": TesseractOCRBackend, "stub": StubOCRBackend}
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def register_ocr_backend(name: str, backend_cls) -> None:
+    OCR_BACKENDS[name] = backend_cls
+    with _backends_lock:
+        _backends.pop(name, None)
+
+
+def default_backend_name() -> str:
+    return os.environ.get("BPA_OCR_BACKEND", "vision")
+
+
+def get_ocr_backend(name: Optional[str] = None) -> OCRBackend:
+    """
+    Returns the shared instance of the named (or configured) backend.
+    """
+    name = name or default_backend_name()
+    with _backends_lock:
+        if name not in _backends:
+            try:
+                _backends[name] = OCR_BACKENDS[name]()
+            except KeyError:
+                raise KeyError(f"Unknown OCR backend '{name}', expected one of {sorted(OCR_BACKENDS)}") from None
+        return _backends[name]
+
+
+def render_pages(file_path: str, page_numbers: list, dpi: int = OCR_DPI) -> list:
+    """
+    Renders 1-based PDF pages to PNG bytes.
+    """
+    import pdfplumber
+    images = []
+    with pdfplumber.open(file_path) as pdf:
+        for page_no in page_numbers:
+            page = pdf.pages[page_no - 1]
+            buf = io.BytesIO()
+            page.to_image(resolution=dpi).original.save(buf, format="PNG")
+            images.append(buf.getvalue())
+            page.close()
+    return images
+
+
+def ocr_images(images: list, backend: OCRBackend, workers: int = OCR_WORKERS) -> list:
+    """
+    Runs `backend` over `images` in batches of backend.batch_size, concurrently.
+    """
+    batches = [images[i:i + backend.batch_size] for i in range(0, len(images), backend.batch_size)]
+    if len(batches) <= 1:
+        return [text for batch in batches for text in backend.recognize(batch)]
+    with ThreadPoolExecutor(max_workers=min(workers, len(batches))) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, backend.recognize, b) for b in batches]
+        return [text for f in futures for text in f.result()]
+
+
+def iter_routed_pages(
+    file_path: str, backend: Optional[OCRBackend] = None, workers: int = OCR_WORKERS
+) -> Iterator[Tuple[int, str]]:
+    """
+    Args:
+      file_path: Path to a PDF.
+      backend: OCR backend for image-only pages (defaults to the configured one,
+        only instantiated if the PDF has scanned pages).
+      workers: Concurrent OCR batches.
+    Yields:
+      (page_number, text) tuples in page order: text-layer pages as extracted,
+      scanned pages as recognized. Text-layer pages pass straight through
+      until a scanned page is seen; from then on pages are held in a window
+      that is flushed once it has `workers` full OCR batches or
+      OCR_WINDOW_PAGES pages, whichever comes first.
+    """
+    counts = {"text": 0, "image": 0, "empty": 0}
+    window = []  # (page_no, text, kind) awaiting the OCR of the window's scanned pages
+    scanned = []
+
+    def flush(pool):
+        step = backend.batch_size
+        batches = [scanned[i:i + step] for i in range(0, len(scanned), step)]
+        futures = [pool.submit(contextvars.copy_context().run, ocr_batch, b) for b in batches]
+        ocr_text = {}
+        for batch, future in zip(batches, futures):
+            ocr_text.update(zip(batch, future.result()))
+        pages = [(page_no, ocr_text[page_no] if kind == "image" else text) for page_no, text, kind in window]
+        window.clear()
+        scanned.clear()
+        return pages
+
+    def ocr_batch(page_numbers):
+        return backend.recognize(render_pages(file_path, page_numbers))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for page_no, text, n_images in iter_pdf_page_info(file_path):
+            kind = classify_page(text, n_images)
+            counts[kind] += 1
+            if kind == "image":
+                backend = backend or get_ocr_backend()
+                scanned.append(page_no)
+            elif not window:
+                yield page_no, text
+                continue
+            window.append((page_no, text, kind))
+            if len(scanned) >= backend.batch_size * max(1, workers) or len(window) >= OCR_WINDOW_PAGES:
+                yield from flush(pool)
+        if window:
+            yield from flush(pool)
+    record(pages=sum(counts.values()), text_pages=counts["text"], ocr_pages=counts["image"])
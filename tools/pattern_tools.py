@@ -1,10 +1,11 @@
 import numpy as np
 from google.adk.tools import Tool
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
-from sklearn.ensemble import IsolationForest
+from tools.anomaly_model import get_anomaly_detector
+from tools.step_model import get_step_model
+from tools.tracing import traced_tool
 
 
+@traced_tool
 class SequenceClusteringTool(Tool):
     name = "sequence_clustering"
     description = (
@@ -12,26 +13,40 @@ class SequenceClusteringTool(Tool):
         "using TF-IDF + KMeans clustering."
     )
 
-    def run(self, steps: list, num_clusters: int = 3) -> dict:
+    def run(self, steps: list, num_clusters: int = 3, update_model: bool = False, model=None) -> dict:
         """
         Args:
           steps: List of step descriptions (strings).
-          num_clusters: Desired number of clusters.
+          num_clusters: Desired number of clusters (only used without a fitted step model).
+          update_model: Incrementally update the step model with these steps.
+          model: Step model to use (e.g. a sector model from the warm pool);
+            defaults to the shared corpus model.
         Returns:
           { "clusters": [ {"cluster_id": int, "steps": [str, ...] }, ... ] }
         """
-        # Convert steps to TF-IDF vectors
-        vectorizer = TfidfVectorizer()
-        X = vectorizer.fit_transform(steps)
-        # KMeans clustering
-        km = KMeans(n_clusters=min(num_clusters, len(steps)))
-        labels = km.fit_predict(X)
+        model = model or get_step_model()
+        if model is not None:
+            # Corpus-level model: stable cluster IDs across SOPs, no refit
+            if update_model:
+                model.partial_fit(steps)
+            labels = model.predict(steps)
+        else:
+            from sklearn.cluster import KMeans
+            from sklearn.feature_extraction.text import TfidfVectorizer
+
+            # Convert steps to TF-IDF vectors
+            vectorizer = TfidfVectorizer()
+            X = vectorizer.fit_transform(steps)
+            # KMeans clustering, seeded so reruns of one SOP give the same clusters
+            km = KMeans(n_clusters=min(num_clusters, len(steps)), random_state=42, n_init=10)
+            labels = km.fit_predict(X)
         clusters = {}
         for step, label in zip(steps, labels):
-            clusters.setdefault(label, []).append(step)
+            clusters.setdefault(int(label), []).append(step)
         return {"clusters": [{"cluster_id": k, "steps": v} for k, v in clusters.items()]}
 
 
+@traced_tool
 class AnomalyDetectionTool(Tool):
     name = "anomaly_detection"
     description = (
@@ -41,15 +56,22 @@ class AnomalyDetectionTool(Tool):
     def run(self, steps: list) -> dict:
         """
         Args:
-          steps: List of step descriptions (strings).
+          steps: List of step descriptions (strings) or process_map dicts.
         Returns:
           { "anomalies": [str, ...] }  # steps flagged as unusual
         """
+        detector = get_anomaly_detector()
+        if detector is not None:
+            # Pre-fitted multi-feature detector: score only, no per-call fit
+            scored = detector.score_batch([steps])[0]
+            return {"anomalies": [step for step, _, flagged in scored if flagged]}
+
+        from sklearn.ensemble import IsolationForest
+
+        steps = [s["step"] if isinstance(s, dict) else s for s in steps]
         # Simple numeric encoding: length of each step
         lengths = np.array([len(s) for s in steps]).reshape(-1, 1)
         iso = IsolationForest(contamination=0.1, random_state=42)
         preds = iso.fit_predict(lengths)
         anomalies = [step for step, p in zip(steps, preds) if p == -1]
         return {"anomalies": anomalies}
-
-
@@ -0,0 +1,103 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, Optional, Tuple
+
+# —————————————————————————————
+# Streaming page-wise PDF extraction
+# Pages are extracted in batches by a process pool and yielded in page
+# order as soon as each batch is ready, so downstream chunking/step
+# extraction can start before the whole document has been parsed and the
+# full document is never held in memory at once.
+# —————————————————————————————
+
+PAGES_PER_TASK = 4
+PARALLEL_MIN_PAGES = 16  # below this, process start-up costs more than it saves
+
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> list:
+    # Runs in a worker process: each worker opens the PDF itself by path
+    import pdfplumber
+    texts = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            texts.append(page.extract_text() or "")
+            page.close()  # release the page's cached layout objects
+    return texts
+
+
+def _page_info_range(file_path: str, start: int, stop: int) -> list:
+    # Like _extract_page_range, plus the number of embedded images per page
+    import pdfplumber
+    info = []
+    with pdfplumber.open(file_path) as pdf:
+        for page in pdf.pages[start:stop]:
+            info.append((page.extract_text() or "", len(page.images)))
+            page.close()
+    return info
+
+
+def page_count(file_path: str) -> int:
+    import pdfplumber
+    with pdfplumber.open(file_path) as pdf:
+        return len(pdf.pages)
+
+
+def _iter_page_batches(file_path: str, extract, workers: Optional[int]) -> Iterator[Tuple[int, object]]:
+    # Runs `extract(file_path, start, stop)` over page batches, yielding
+    # (page_number, item) in page order
+    n_pages = page_count(file_path)
+    workers = workers or os.cpu_count() or 1
+    if workers <= 1 or n_pages < PARALLEL_MIN_PAGES:
+        for start in range(0, n_pages, PAGES_PER_TASK):
+            for offset, item in enumerate(extract(file_path, start, start + PAGES_PER_TASK)):
+                yield start + offset + 1, item
+        return
+
+    max_in_flight = workers * 2  # bounds memory held by finished-but-unconsumed batches
+    starts = iter(range(0, n_pages, PAGES_PER_TASK))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for start in starts:
+            pending.append((start, pool.submit(extract, file_path, start, start + PAGES_PER_TASK)))
+            if len(pending) >= max_in_flight:
+                break
+        while pending:
+            start, future = pending.popleft()
+            nxt = next(starts, None)
+            if nxt is not None:
+                pending.append((nxt, pool.submit(extract, file_path, nxt, nxt + PAGES_PER_TASK)))
+            for offset, item in enumerate(future.result()):
+                yield start + offset + 1, item
+
+
+def iter_pdf_pages(file_path: str, workers: Optional[int] = None) -> Iterator[Tuple[int, str]]:
+    """
+    Args:
+      file_path: Path to a PDF.
+      workers: Process pool size (defaults to the CPU count; 1 disables the pool).
+    Yields:
+      (page_number, text) tuples in page order, 1-based.
+    """
+    yield from _iter_page_batches(file_path, _extract_page_range, workers)
+
+
+def iter_pdf_page_info(file_path: str, workers: Optional[int] = None) -> Iterator[Tuple[int, str, int]]:
+    """
+    Yields:
+      (page_number, text_layer, image_count) tuples in page order, 1-based.
+    """
+    for page_no, (text, n_images) in _iter_page_batches(file_path, _page_info_range, workers):
+        yield page_no, text, n_images
+
+
+def iter_chunks(pages: Iterable[Tuple[int, str]], chunk_size: int = 1000, chunk_overlap: int = 200) -> Iterator[str]:
+    """
+    Splits each page into chunks as it arrives. Matches
+    RecursiveCharacterTextSplitter.split_documents over per-page documents.
+    """
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    for _, text in pages:
+        if text:
+            yield from splitter.split_text(text)
@@ -1,5 +1,8 @@
 from google.adk.tools import Tool
+from tools.roi_engine import evaluate, items_to_columns
+from tools.tracing import traced_tool
 
+@traced_tool
 class ROICalculatorTool(Tool):
     name = "roi_calculator"
     description = (
@@ -28,24 +31,12 @@ class ROICalculatorTool(Tool):
             "total_monthly_savings": float
           }
         """
-        results = []
-        total = 0.0
-        for item in items:
-            t_hours = item["time_per_task_min"] / 60.0
-            freq = item["frequency_per_month"]
-            mult = (
-                item.get("effort_multiplier", 1.0)
-                * item.get("feasibility_multiplier", 1.0)
-                * item.get("error_multiplier", 1.0)
-                * item.get("tool_multiplier", 1.0)
+        columns = items_to_columns(items)
+        result = evaluate(columns, hourly_cost)
+        roi = [
+            {"step": step, "estimated_savings_SGD": round(savings, 2), "payback_months": round(payback, 1)}
+            for step, savings, payback in zip(
+                columns["step"], result["savings"].tolist(), result["payback_months"].tolist()
             )
-            savings = t_hours * hourly_cost * freq * mult
-            total += savings
-            cost = item.get("implementation_cost", 1000)
-            payback = cost / (savings + 1e-6)
-            results.append({
-                "step": item["step"],
-                "estimated_savings_SGD": round(savings, 2),
-                "payback_months": round(payback, 1)
-            })
-        return {"roi": results, "total_monthly_savings": round(total, 2)}
\ No newline at end of file
+        ]
+        return {"roi": roi, "total_monthly_savings": round(result["total_monthly_savings"], 2)}
@@ -0,0 +1,150 @@
+import numpy as np
+
+# —————————————————————————————
+# Vectorized ROI engine
+# Holds automation items as NumPy columns and evaluates savings/payback for
+# one scenario or for a whole grid of what-if scenarios (hourly cost x
+# multiplier scales x implementation cost x step) in a single broadcast pass.
+# ROICalculatorTool is a thin wrapper around `evaluate`.
+# —————————————————————————————
+
+MULTIPLIERS = ("effort_multiplier", "feasibility_multiplier", "error_multiplier", "tool_multiplier")
+DEFAULT_IMPLEMENTATION_COST = 1000.0
+EPSILON = 1e-6
+
+
+def items_to_columns(items: list) -> dict:
+    """
+    Converts ROICalculatorTool item dicts into columnar arrays.
+    Returns:
+      { "step": [str], "time_per_task_min": ndarray, "frequency_per_month": ndarray,
+        <each multiplier>: ndarray, "implementation_cost": ndarray }
+    """
+    columns = {
+        "step": [item["step"] for item in items],
+        "time_per_task_min": np.array([item["time_per_task_min"] for item in items], dtype=float),
+        "frequency_per_month": np.array([item["frequency_per_month"] for item in items], dtype=float),
+        "implementation_cost": np.array(
+            [item.get("implementation_cost", DEFAULT_IMPLEMENTATION_COST) for item in items], dtype=float
+        ),
+    }
+    for name in MULTIPLIERS:
+        columns[name] = np.array([item.get(name, 1.0) for item in items], dtype=float)
+    return columns
+
+
+def _combined_multiplier(columns: dict) -> np.ndarray:
+    mult = columns[MULTIPLIERS[0]]
+    for name in MULTIPLIERS[1:]:
+        mult = mult * columns[name]
+    return mult
+
+
+def evaluate(columns: dict, hourly_cost: float = 18.0) -> dict:
+    """
+    Single-scenario evaluation.
+    Returns:
+      { "savings": ndarray, "payback_months": ndarray, "total_monthly_savings": float }
+    """
+    t_hours = columns["time_per_task_min"] / 60.0
+    savings = t_hours * hourly_cost * columns["frequency_per_month"] * _combined_multiplier(columns)
+    payback = columns["implementation_cost"] / (savings + EPSILON)
+    return {
+        "savings": savings,
+        "payback_months": payback,
+        "total_monthly_savings": float(sum(savings.tolist())),
+    }
+
+
+def sweep(columns: dict, hourly_costs, multiplier_scales: dict = None, implementation_costs=None) -> dict:
+    """
+    Evaluates every combination of scenario parameters for every step.
+
+    Args:
+      columns: Output of `items_to_columns`.
+      hourly_costs: Hourly staff costs (SGD) to sweep.
+      multiplier_scales: Optional { multiplier_name: [scale, ...] }; each scale
+        multiplies that column for every step (e.g. {"error_multiplier": [0.8, 1.0, 1.2]}).
+      implementation_costs: Optional implementation costs applied to every step;
+        when omitted, each step keeps its own `implementation_cost`.
+    Returns:
+      {
+        "axes": [(name, ndarray), ...],          # scenario axes, in array order
+        "savings": ndarray[*axes, steps],        # monthly savings per step
+        "payback_months": ndarray[*axes, steps],
+        "total_monthly_savings": ndarray[*axes],
+        "portfolio_payback_months": ndarray[*axes],
+      }
+    """
+    multiplier_scales = multiplier_scales or {}
+    unknown = set(multiplier_scales) - set(MULTIPLIERS)
+    if unknown:
+        raise ValueError(f"Unknown multipliers: {sorted(unknown)}")
+
+    axes = [("hourly_cost", np.asarray(hourly_costs, dtype=float))]
+    axes += [(name, np.asarray(values, dtype=float)) for name, values in multiplier_scales.items()]
+    if implementation_costs is not None:
+        axes.append(("implementation_cost", np.asarray(implementation_costs, dtype=float)))
+    ndim = len(axes) + 1  # trailing step axis
+
+    def along(axis_index: int, values: np.ndarray) -> np.ndarray:
+        shape = [1] * ndim
+        shape[axis_index] = values.size
+        return values.reshape(shape)
+
+    base = columns["time_per_task_min"] / 60.0 * columns["frequency_per_month"] * _combined_multiplier(columns)
+    savings = base.reshape([1] * (ndim - 1) + [-1])
+    for i, (name, values) in enumerate(axes):
+        if name != "implementation_cost":
+            savings = savings * along(i, values)
+
+    if implementation_costs is not None:
+        cost = along(len(axes) - 1, axes[-1][1])
+        shape = np.broadcast_shapes(savings.shape, cost.shape)
+        cost = np.broadcast_to(cost, shape)
+        savings = np.broadcast_to(savings, shape)
+    else:
+        cost = columns["implementation_cost"]
+
+    total = savings.sum(axis=-1)
+    return {
+        "axes": axes,
+        "savings": savings,
+        "payback_months": cost / (savings + EPSILON),
+        "total_monthly_savings": total,
+        "portfolio_payback_months": np.broadcast_to(cost, savings.shape).sum(axis=-1) / (total + EPSILON),
+    }
+
+
+def summarize(grid: dict, percentiles=(5, 25, 50, 75, 95)) -> dict:
+    """
+    Percentile and one-at-a-time sensitivity summaries of a `sweep` result.
+    Sensitivity reports, for each axis, the range of total monthly savings and
+    portfolio payback when that axis moves from its first to last value while
+    every other axis is held at its middle value.
+    """
+    total = grid["total_monthly_savings"]
+    payback = grid["portfolio_payback_months"]
+    summary = {
+        "scenarios": int(total.size),
+        "total_monthly_savings": {f"p{p}": float(v) for p, v in zip(percentiles, np.percentile(total, percentiles))},
+        "portfolio_payback_months": {f"p{p}": float(v) for p, v in zip(percentiles, np.percentile(payback, percentiles))},
+        "sensitivity": [],
+    }
+    middle = [values.size // 2 for _, values in grid["axes"]]
+    for i, (name, values) in enumerate(grid["axes"]):
+        low_idx, high_idx = list(middle), list(middle)
+        low_idx[i], high_idx[i] = 0, values.size - 1
+        low_idx, high_idx = tuple(low_idx), tuple(high_idx)
+        summary["sensitivity"].append({
+            "axis": name,
+            "low_value": float(values[0]),
+            "high_value": float(values[-1]),
+            "total_savings_low": float(total[low_idx]),
+            "total_savings_high": float(total[high_idx]),
+            "savings_swing": float(abs(total[high_idx] - total[low_idx])),
+            "payback_low": float(payback[low_idx]),
+            "payback_high": float(payback[high_idx]),
+        })
+    summary["sensitivity"].sort(key=lambda s: s["savings_swing"], reverse=True)
+    return summary
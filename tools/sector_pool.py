@@ -0,0 +1,342 @@
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from tools.idp_store import idp_store, sector_key
+from tools.step_model import DEFAULT_MODEL_PATH, StepFeatureModel, get_step_model
+from tools.storage import DATA_DIR
+from tools.tracing import record, record_cache
+
+# —————————————————————————————
+# Shared warm pool of per-sector resources
+# Every request in a sector reuses one SectorResources entry, built on first
+# use: the sector's IDP index, its step-cluster model (sector-specific when
+# one has been fitted, else the corpus model), default ROI parameters and
+# compiled compliance rule sets. Tenants only differ in `business_context`,
+# which selects from the entry (hourly cost override, compliance regimes)
+# without rebuilding anything.
+#
+# A background thread rebuilds entries whose source files changed (the
+# corpus step model included) and swaps them in; requests never wait on a
+# refresh. A sector that fails to rebuild keeps serving its current entry;
+# the failure is counted in describe() and printed to stderr. Each entry's
+# footprint is measured on the loaded objects (IDP index, sector step model,
+# config): entries above the per-sector limit are served but not pooled, and
+# least recently used sectors are evicted once the pool exceeds its total
+# limit.
+#
+# Layout: <BPA_DATA_DIR>/sectors/<sector>.json        ROI / compliance overrides
+#         <BPA_DATA_DIR>/models/sectors/<sector>/step_model.joblib
+#         <BPA_DATA_DIR>/idp/<sector>/index.json
+# —————————————————————————————
+
+SECTOR_MAX_BYTES = int(os.environ.get("BPA_SECTOR_MAX_BYTES", 128 * 1024 * 1024))
+POOL_MAX_BYTES = int(os.environ.get("BPA_SECTOR_POOL_MAX_BYTES", 512 * 1024 * 1024))
+REFRESH_INTERVAL_S = float(os.environ.get("BPA_SECTOR_REFRESH_S", 300))
+
+DEFAULT_ROI_PARAMS = {
+    "hourly_cost": 18.0,  # SGD
+    "frequencies": [["daily", 22], ["every morning", 22], ["weekly", 4], ["monthly", 1]],
+    "default_frequency": 22,  # assume a working-day routine
+}
+
+# regime -> rules; a step matching `pattern` is flagged with `issue` / `impact`
+COMPLIANCE_RULES = {
+    "ACRA": [
+        {"pattern": r"\b(annual return|agm|bizfile|register of (members|directors))\b",
+         "issue": "ACRA filing step", "impact": "Late or missed filings incur penalties"},
+    ],
+    "IRAS": [
+        {"pattern": r"\b(gst|tax|invoices?|receipts?)\b",
+         "issue": "IRAS record-keeping step", "impact": "Records must be kept accurately for 5 years"},
+    ],
+    "PDPA": [
+        {"pattern": r"\b(personal data|nric|customer (data|details|records)|contact details)\b",
+         "issue": "PDPA personal-data step", "impact": "Mishandled personal data risks PDPC penalties"},
+    ],
+    "CPF": [
+        {"pattern": r"\b(payroll|salary|salaries|cpf)\b",
+         "issue": "CPF contribution step", "impact": "Late contributions incur interest charges"},
+    ],
+    "MOM": [
+        {"pattern": r"\b(work pass|overtime|timesheets?|leave records?)\b",
+         "issue": "MOM employment-records step", "impact": "Incomplete records breach the Employment Act"},
+    ],
+}
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def footprint(*objs) -> int:
+    """
+    Approximate in-memory size of `objs` in bytes: containers and object
+    attributes are followed, numpy arrays and sparse matrices count their
+    buffers, and shared objects are counted once.
+    """
+    seen, total, stack = set(), 0, list(objs)
+    while stack:
+        obj = stack.pop()
+        if obj is None or id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (str, bytes, int, float, bool)):
+            continue
+        nbytes = getattr(obj, "nbytes", None)
+        if isinstance(nbytes, int) and hasattr(obj, "dtype"):
+            total += nbytes  # numpy array: data buffer
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset)):
+            stack.extend(obj)
+        elif isinstance(obj, re.Pattern):
+            stack.append(obj.pattern)
+        else:
+            stack.extend(getattr(obj, name, None) for name in getattr(type(obj), "__slots__", ()))
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+    return total
+
+
+class SectorResources:
+    __slots__ = ("sector", "idp_index", "step_model", "roi_params", "compliance", "sources", "nbytes", "loaded_at")
+
+    def __init__(self, sector, idp_index, step_model, roi_params, compliance, sources, nbytes):
+        self.sector = sector
+        self.idp_index = idp_index
+        self.step_model = step_model
+        self.roi_params = roi_params
+        self.compliance = compliance  # regime -> [(compiled pattern, issue, impact)]
+        self.sources = sources  # path -> mtime at build time
+        self.nbytes = nbytes
+        self.loaded_at = time.time()
+
+    def roi_for(self, business_context: Optional[dict] = None) -> dict:
+        """
+        Sector ROI defaults with the tenant's overrides (e.g. `hourly_cost`) applied.
+        """
+        params = dict(self.roi_params)
+        if business_context and business_context.get("hourly_cost") is not None:
+            params["hourly_cost"] = float(business_context["hourly_cost"])
+        return params
+
+    def rules_for(self, business_context: Optional[dict] = None) -> list:
+        """
+        Returns (regime, pattern, issue, impact) for the regimes listed in
+        business_context["compliance"] (e.g. ["ACRA", "IRAS"]).
+        """
+        regimes = (business_context or {}).get("compliance") or []
+        return [
+            (regime, pattern, issue, impact)
+            for regime in regimes
+            for pattern, issue, impact in self.compliance.get(str(regime).upper(), [])
+        ]
+
+    def is_stale(self) -> bool:
+        return any(_mtime(path) != mtime for path, mtime in self.sources.items())
+
+
+class SectorPool:
+    def __init__(
+        self,
+        max_bytes: int = POOL_MAX_BYTES,
+        sector_max_bytes: int = SECTOR_MAX_BYTES,
+        refresh_interval_s: float = REFRESH_INTERVAL_S,
+        root: Optional[Path] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.sector_max_bytes = sector_max_bytes
+        self.refresh_interval_s = refresh_interval_s
+        self.root = Path(root) if root else DATA_DIR
+        self._entries = OrderedDict()  # sector key -> SectorResources, least recently used first
+        self._lock = threading.Lock()
+        self._build_locks = {}
+        self._stop = threading.Event()
+        self._refresher = None
+        self.stats = {
+            "hits": 0, "builds": 0, "refreshes": 0, "evictions": 0, "oversize": 0,
+            "refresh_errors": 0, "last_refresh_error": None,
+        }
+
+    def _paths(self, sector: str) -> dict:
+        key = sector_key(sector)
+        return {
+            "config": self.root / "sectors" / f"{key}.json",
+            "step_model": self.root / "models" / "sectors" / key / "step_model.joblib",
+            "idp_index": idp_store.index_path(sector),
+        }
+
+    def build(self, sector: str) -> SectorResources:
+        """
+        Loads every resource for `sector` from disk (no pool lookup).
+        """
+        paths = self._paths(sector)
+        sources = {path: _mtime(path) for path in paths.values()}
+        sources[DEFAULT_MODEL_PATH] = _mtime(DEFAULT_MODEL_PATH)
+
+        config = {}
+        if sources[paths["config"]] is not None:
+            with open(paths["config"], "r", encoding="utf-8") as fh:
+                config = json.load(fh)
+        roi_params = {**DEFAULT_ROI_PARAMS, **config.get("roi", {})}
+        rules = {regime: list(r) for regime, r in COMPLIANCE_RULES.items()}
+        for regime, extra in config.get("compliance", {}).items():
+            rules.setdefault(regime.upper(), []).extend(extra)
+        compliance = {
+            regime: [(re.compile(r["pattern"], re.IGNORECASE), r["issue"], r["impact"]) for r in regime_rules]
+            for regime, regime_rules in rules.items()
+        }
+
+        step_model = None
+        if sources[paths["step_model"]] is not None:
+            step_model = StepFeatureModel.load(paths["step_model"])
+        idp_index = idp_store.read(sector)
+        return SectorResources(
+            sector=sector,
+            idp_index=idp_index,
+            # The corpus model is shared, not counted; re-read if it was refitted
+            step_model=step_model or get_step_model(reload=True),
+            roi_params=roi_params,
+            compliance=compliance,
+            sources=sources,
+            nbytes=footprint(idp_index, step_model, roi_params, compliance),
+        )
+
+    def get(self, sector: str) -> SectorResources:
+        """
+        Returns the pooled resources for `sector`, building them on first use.
+        Concurrent first requests for one sector share a single build.
+        """
+        key = sector_key(sector)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                record_cache(hit=True)
+                return entry
+            build_lock = self._build_locks.setdefault(key, threading.Lock())
+        with build_lock:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    record_cache(hit=True)
+                    return entry
+            record_cache(hit=False)
+            entry = self.build(sector)
+            self._admit(key, entry)
+            self.stats["builds"] += 1
+        return entry
+
+    def _admit(self, key: str, entry: SectorResources) -> None:
+        with self._lock:
+            if entry.nbytes > self.sector_max_bytes:
+                # Served for this request only: one huge sector can't flush the others
+                self.stats["oversize"] += 1
+                record(sector_pool="oversize", sector_bytes=entry.nbytes)
+                self._entries.pop(key, None)
+                idp_store.evict(entry.sector)
+                return
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > 1 and self.nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                idp_store.evict(evicted.sector)
+                self.stats["evictions"] += 1
+
+    @property
+    def nbytes(self) -> int:
+        return sum(e.nbytes for e in self._entries.values())
+
+    def warm(self, sectors) -> None:
+        for sector in sectors:
+            self.get(sector)
+
+    def evict(self, sector: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(sector_key(sector), None)
+        if entry is not None:
+            idp_store.evict(entry.sector)
+
+    def _refresh_failed(self, sector: Optional[str], exc: Exception) -> None:
+        # The current entry keeps being served; the error shows in describe() and on stderr
+        error = {"sector": sector, "error": f"{type(exc).__name__}: {exc}", "at": time.time()}
+        with self._lock:
+            self.stats["refresh_errors"] += 1
+            self.stats["last_refresh_error"] = error
+        print(json.dumps({"sector_pool_refresh_error": error}), file=sys.stderr)
+
+    def refresh(self, force: bool = False) -> list:
+        """
+        Rebuilds pooled sectors whose source files changed (all of them with
+        `force`) and swaps the new entries in. A sector that fails to rebuild
+        keeps its current entry and is retried on the next refresh.
+        Returns the refreshed sectors.
+        """
+        with self._lock:
+            entries = list(self._entries.items())
+        refreshed = []
+        for key, entry in entries:
+            if not (force or entry.is_stale()):
+                continue
+            try:
+                fresh = self.build(entry.sector)
+            except Exception as exc:  # e.g. a corrupt IDP index or unreadable model file
+                self._refresh_failed(entry.sector, exc)
+                continue
+            with self._lock:
+                if self._entries.get(key) is not entry:
+                    continue  # evicted or replaced meanwhile
+            idp_store.evict(entry.sector)
+            self._admit(key, fresh)
+            self.stats["refreshes"] += 1
+            refreshed.append(entry.sector)
+        return refreshed
+
+    def start_refresh(self) -> None:
+        """
+        Starts the background refresher (a daemon thread); idempotent.
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+        self._stop.clear()
+
+        def loop():
+            while not self._stop.wait(self.refresh_interval_s):
+                try:
+                    self.refresh()
+                except Exception as exc:  # keep serving the current entries; retried next interval
+                    self._refresh_failed(None, exc)
+
+        self._refresher = threading.Thread(target=loop, name="sector-pool-refresh", daemon=True)
+        self._refresher.start()
+
+    def stop_refresh(self) -> None:
+        self._stop.set()
+
+    def describe(self) -> dict:
+        with self._lock:
+            sectors = [
+                {"sector": e.sector, "bytes": e.nbytes, "loaded_at": e.loaded_at, "idp_index": e.idp_index is not None}
+                for e in self._entries.values()
+            ]
+        return {"sectors": sectors, "bytes": sum(s["bytes"] for s in sectors), **self.stats}
+
+
+# Shared pool used by the pipelines and the API server
+sector_pool = SectorPool()
@@ -0,0 +1,56 @@
+import re
+
+# —————————————————————————————
+# Deterministic step extraction from SOP text.
+# Numbered procedure lines ("1.", "2.3.", "Step 4:") are kept when they
+# are leaves of the numbering tree; otherwise we fall back to one step
+# per non-trivial line.
+# —————————————————————————————
+
+NUMBERED_LINE = re.compile(r"^\s*(?:step\s+)?(\d+(?:\.\d+)*)\.?[:)]?\s+(.+?)\s*$", re.IGNORECASE)
+MIN_STEP_WORDS = 3
+
+
+def _is_heading(body: str) -> bool:
+    # "Roles & Responsibilities", "Define Task & Format (Meta-Step)"
+    words = re.findall(r"[A-Za-z][\w-]*", body)
+    return not body.endswith(".") and all(w[0].isupper() for w in words)
+
+
+def extract_steps(text: str) -> list:
+    """
+    Args:
+      text: Full extracted SOP text.
+    Returns:
+      Ordered list of step descriptions (strings).
+    """
+    numbered = []
+    for line in text.splitlines():
+        m = NUMBERED_LINE.match(line)
+        if m:
+            numbered.append((m.group(1), m.group(2)))
+
+    if numbered:
+        # A number is a leaf unless the *next* numbered line is one of its children
+        steps = []
+        for i, (num, body) in enumerate(numbered):
+            nxt = numbered[i + 1][0] if i + 1 < len(numbered) else ""
+            if nxt.startswith(num + "."):
+                continue
+            if len(body.split()) >= MIN_STEP_WORDS and not _is_heading(body):
+                steps.append(body)
+        if steps:
+            return steps
+
+    return [
+        line.strip(" \t*–-•")
+        for line in text.splitlines()
+        if len(line.split()) >= MIN_STEP_WORDS
+    ]
+
+
+def step_key(step: str) -> str:
+    """
+    Normalized form of a step used for de-duplication and matching.
+    """
+    return re.sub(r"[^a-z0-9]+", " ", step.lower()).strip()
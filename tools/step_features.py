@@ -0,0 +1,84 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+# —————————————————————————————
+# Multi-feature step vectors
+# Computes one numeric row per workflow step: text length, manual-work
+# indicators, responsible role, position in the process map and TF-IDF
+# rarity. Used by the pre-fitted anomaly detector.
+# —————————————————————————————
+
+ROLES = ("staff", "manager", "cashier", "HQ")
+MANUAL_KEYWORDS = re.compile(
+    r"\b(manual(ly)?|paper|count|walk|enter|e-?mail|excel|spreadsheet|form|print|sign|"
+    r"inspect|verify|review|check|highlight|populate|save|upload|scan)\b",
+    re.IGNORECASE,
+)
+TOKEN = re.compile(r"[a-z0-9]+")
+FEATURE_NAMES = (
+    "length",
+    "word_count",
+    "manual_terms",
+    "digit_ratio",
+    *(f"role_{r}" for r in ROLES),
+    "role_other",
+    "position",
+    "tfidf_rarity",
+)
+
+
+def _as_entries(steps: list) -> list:
+    # Accepts plain step strings or process_map dicts {"order","step","role"}
+    return [s if isinstance(s, dict) else {"step": s} for s in steps]
+
+
+def build_step_features(steps: list, idf: dict = None) -> np.ndarray:
+    """
+    Args:
+      steps: Step strings or process_map dicts, in process order.
+      idf: Optional {token: idf} from a corpus-level vectorizer; when omitted,
+        rarity is computed from document frequency within `steps`.
+    Returns:
+      Float array of shape (len(steps), len(FEATURE_NAMES)).
+    """
+    entries = _as_entries(steps)
+    n = len(entries)
+    X = np.zeros((n, len(FEATURE_NAMES)), dtype=float)
+    if n == 0:
+        return X
+
+    texts = [e["step"] for e in entries]
+    tokens = [TOKEN.findall(t.lower()) for t in texts]
+    X[:, 0] = np.fromiter((len(t) for t in texts), dtype=float, count=n)
+    X[:, 1] = np.fromiter((len(tok) for tok in tokens), dtype=float, count=n)
+    X[:, 2] = np.fromiter((len(MANUAL_KEYWORDS.findall(t)) for t in texts), dtype=float, count=n)
+    X[:, 3] = np.fromiter((sum(c.isdigit() for c in t) for t in texts), dtype=float, count=n) / np.maximum(X[:, 0], 1)
+
+    role_index = {r.lower(): i for i, r in enumerate(ROLES)}
+    roles = np.fromiter(
+        (role_index.get(str(e.get("role", "")).lower(), len(ROLES)) for e in entries), dtype=int, count=n
+    )
+    X[np.arange(n), 4 + roles] = 1.0
+
+    orders = np.array([e.get("order", i + 1) for i, e in enumerate(entries)], dtype=float)
+    X[:, 4 + len(ROLES) + 1] = (orders - 1) / max(n - 1, 1)
+
+    if idf is None:
+        df = Counter(tok for toks in tokens for tok in set(toks))
+        idf = {tok: np.log((1 + n) / (1 + c)) + 1 for tok, c in df.items()}
+    default_idf = max(idf.values()) if idf else 1.0
+    X[:, -1] = [np.mean([idf.get(tok, default_idf) for tok in toks]) if toks else 0.0 for toks in tokens]
+    return X
+
+
+def corpus_idf(vectorizer) -> dict:
+    """
+    Extracts {token: idf} from a fitted TfidfVectorizer (unigrams only).
+    """
+    return {
+        term: float(vectorizer.idf_[idx])
+        for term, idx in vectorizer.vocabulary_.items()
+        if " " not in term
+    }
@@ -0,0 +1,388 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from tools.step_extraction import step_key
+from tools.storage import DATA_DIR
+
+# —————————————————————————————
+# Canonical step library with MinHash/LSH near-duplicate detection
+# SOP families repeat nearly identical steps across files and versions.
+# Each step seen by the pipeline is stored once as a canonical step, and
+# what was computed for it is stored per tenant: role, issue, task time and
+# per-sector IDP suggestion and priority. One tenant's answers are never
+# served to another. An incoming step is mapped to its canonical step
+# when the Jaccard similarity of their character 3-gram shingles reaches
+# SIMILARITY; candidates come from LSH buckets over 64-permutation MinHash
+# signatures (16 bands x 4 rows), so lookups don't scan the library.
+# Near-duplicates must also start with the same action verb: "Approve the
+# timesheet" and "Enter the timesheet" share most shingles but not a role.
+#
+# Answers are overwritten whenever the agents are asked again. Benchmarks
+# carry the version of the sector IDP index they were made against and are
+# not served once the index has been rebuilt.
+#
+# Modes: "use" (default; match and learn), "refresh" (serve nothing, so the
+# agents are asked again, and overwrite what was learned) or "off".
+# Set BPA_STEP_LIBRARY or `step_library.mode`.
+# Layout: <BPA_DATA_DIR>/step_library.sqlite3
+# —————————————————————————————
+
+MODES = ("use", "refresh", "off")
+SCHEMA_VERSION = 2  # 2: answers per tenant, versioned benchmarks
+SIMILARITY = float(os.environ.get("BPA_STEP_SIMILARITY", 0.7))
+SHINGLE_CHARS = 3
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+_PRIME = (1 << 61) - 1
+_rng = np.random.RandomState(20240501)  # fixed: signatures are persisted
+_A = _rng.randint(1, 1 << 31, NUM_PERM).astype(np.uint64)
+_B = _rng.randint(0, 1 << 31, NUM_PERM).astype(np.uint64)
+NUMBERING = re.compile(r"^(step\s+)?\d+\s+")
+FACT_FIELDS = ("role", "issue", "impact", "time_per_task_min")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS canonical_steps (
+    id INTEGER PRIMARY KEY,
+    step TEXT NOT NULL,
+    step_key TEXT NOT NULL UNIQUE,
+    hits INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tenant_steps (
+    canonical_id INTEGER NOT NULL REFERENCES canonical_steps (id),
+    tenant TEXT NOT NULL,
+    role TEXT,
+    issue TEXT,
+    impact TEXT,
+    time_per_task_min REAL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (canonical_id, tenant)
+);
+CREATE TABLE IF NOT EXISTS tenant_benchmarks (
+    canonical_id INTEGER NOT NULL REFERENCES canonical_steps (id),
+    tenant TEXT NOT NULL,
+    sector TEXT NOT NULL,
+    idp_suggestion TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    idp_version TEXT,
+    updated REAL NOT NULL,
+    PRIMARY KEY (canonical_id, tenant, sector)
+);
+"""
+
+
+def match_key(step: str) -> str:
+    # Normalized text without leading "Step 3:" / "3." numbering
+    return NUMBERING.sub("", step_key(step))
+
+
+def action(key: str) -> str:
+    # Leading verb, singular: "checks" and "check" are the same action
+    verb = key.split(" ", 1)[0]
+    return verb[:-1] if verb.endswith("s") and not verb.endswith("ss") else verb
+
+
+def shingles(key: str) -> set:
+    padded = f" {key} "
+    return {padded[i:i + SHINGLE_CHARS] for i in range(max(1, len(padded) - SHINGLE_CHARS + 1))}
+
+
+def minhash(shingle_set: set) -> np.ndarray:
+    """
+    Returns the NUM_PERM-value MinHash signature of a shingle set.
+    """
+    hashes = np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingle_set), dtype=np.uint64)
+    return ((hashes[:, None] * _A + _B) % _PRIME).min(axis=0)
+
+
+def lsh_buckets(signature: np.ndarray) -> list:
+    return [(band, signature[band * ROWS:(band + 1) * ROWS].tobytes()) for band in range(BANDS)]
+
+
+def jaccard(a: set, b: set) -> float:
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class StepFacts:
+    """
+    What was learned for one canonical step within one tenant.
+    """
+
+    __slots__ = ("canonical_id", "tenant", "role", "issue", "impact", "time_per_task_min", "benchmarks")
+
+    def __init__(self, canonical_id, tenant, role=None, issue=None, impact=None, time_per_task_min=None):
+        self.canonical_id = canonical_id
+        self.tenant = tenant
+        self.role = role
+        self.issue = issue
+        self.impact = impact
+        self.time_per_task_min = time_per_task_min
+        self.benchmarks = {}  # sector -> (idp_suggestion, priority, idp_version)
+
+    def benchmark(self, sector: str, idp_version: Optional[str] = None) -> Optional[tuple]:
+        """
+        Returns (idp_suggestion, priority) for `sector`, or None if there is
+        none or it was made against another version of the sector's IDP index.
+        """
+        found = self.benchmarks.get(sector)
+        if found is None or found[2] != idp_version:
+            return None
+        return found[:2]
+
+
+class CanonicalStep:
+    __slots__ = ("id", "step", "key", "action", "shingles", "tenants", "hits")
+
+    def __init__(self, id, step, key, hits=0):
+        self.id = id
+        self.step = step
+        self.key = key
+        self.action = action(key)
+        self.shingles = shingles(key)
+        self.tenants = {}  # tenant -> StepFacts
+        self.hits = hits
+
+    def facts(self, tenant: str) -> StepFacts:
+        facts = self.tenants.get(tenant)
+        if facts is None:
+            facts = self.tenants[tenant] = StepFacts(self.id, tenant)
+        return facts
+
+
+class StepLibrary:
+    def __init__(self, path: Optional[Path] = None, similarity: float = SIMILARITY, mode: Optional[str] = None):
+        self.path = Path(path) if path else DATA_DIR / "step_library.sqlite3"
+        self.similarity = similarity
+        self.mode = mode or os.environ.get("BPA_STEP_LIBRARY", "use")
+        if self.mode not in MODES:
+            raise ValueError(f"Unknown step library mode '{self.mode}', expected one of {MODES}")
+        self.matched = 0
+        self.unmatched = 0
+        self._entries = None  # id -> CanonicalStep, loaded on first use
+        self._by_key = {}
+        self._buckets = {}  # (band, band signature) -> [canonical ids]
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        # Learning; matches are only served in "use" mode
+        return self.mode in ("use", "refresh")
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._migrate(conn)
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection) -> None:
+        # Libraries from before SCHEMA_VERSION 2 held one global answer per
+        # step: drop them (they are only a cache) rather than guess a tenant
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS canonical_benchmarks")
+                conn.execute("DROP TABLE IF EXISTS canonical_steps")
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _index(self, entry: CanonicalStep) -> None:
+        self._entries[entry.id] = entry
+        self._by_key[entry.key] = entry
+        for bucket in lsh_buckets(minhash(entry.shingles)):
+            self._buckets.setdefault(bucket, []).append(entry.id)
+
+    def _load_facts(self, where: str = "", params=()) -> None:
+        conn = self._conn()
+        for canonical_id, tenant, *fields in conn.execute(
+            "SELECT canonical_id, tenant, role, issue, impact, time_per_task_min FROM tenant_steps" + where, params
+        ):
+            facts = self._entries[canonical_id].facts(tenant)
+            for name, value in zip(FACT_FIELDS, fields):
+                setattr(facts, name, value)
+        for canonical_id, tenant, sector, *benchmark in conn.execute(
+            "SELECT canonical_id, tenant, sector, idp_suggestion, priority, idp_version FROM tenant_benchmarks" + where,
+            params,
+        ):
+            self._entries[canonical_id].facts(tenant).benchmarks[sector] = tuple(benchmark)
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._entries is not None:
+                return
+            self._entries = {}
+            for row in self._conn().execute("SELECT id, step, step_key, hits FROM canonical_steps"):
+                self._index(CanonicalStep(*row))
+            self._load_facts()
+
+    def _find(self, key: str, shingle_set: set) -> Optional[CanonicalStep]:
+        entry = self._by_key.get(key)
+        if entry is not None:
+            return entry
+        candidates = {cid for bucket in lsh_buckets(minhash(shingle_set)) for cid in self._buckets.get(bucket, ())}
+        best, best_score = None, self.similarity
+        verb = action(key)
+        for cid in candidates:
+            candidate = self._entries[cid]
+            if candidate.action != verb:
+                continue
+            score = jaccard(shingle_set, candidate.shingles)
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def match(self, steps: list, tenant: str) -> list:
+        """
+        Returns what `tenant` has learned for each of `steps` (StepFacts of
+        its near-duplicate canonical step), or None for steps it hasn't.
+        Outside "use" mode nothing is served.
+        """
+        if self.mode != "use":
+            return [None] * len(steps)
+        self._load()
+        with self._lock:
+            matches = []
+            for step in steps:
+                key = match_key(step)
+                entry = self._find(key, shingles(key))
+                matches.append(entry.tenants.get(tenant) if entry is not None else None)
+            found = sum(m is not None for m in matches)
+            self.matched += found
+            self.unmatched += len(steps) - found
+        return matches
+
+    def add(self, step: str) -> Optional[CanonicalStep]:
+        """
+        Returns the canonical step for `step`, creating it if it is new.
+        Another process may have created it first; its row is then re-used.
+        """
+        if not self.enabled:
+            return None
+        self._load()
+        key = match_key(step)
+        shingle_set = shingles(key)
+        with self._lock:
+            entry = self._find(key, shingle_set)
+            if entry is None:
+                conn = self._conn()
+                conn.execute(
+                    "INSERT INTO canonical_steps (step, step_key, created) VALUES (?, ?, ?) "
+                    "ON CONFLICT (step_key) DO NOTHING",
+                    (step, key, time.time()),
+                )
+                row = conn.execute("SELECT id, step, step_key, hits FROM canonical_steps WHERE step_key = ?", (key,)).fetchone()
+                entry = CanonicalStep(*row)
+                self._index(entry)
+                self._load_facts(" WHERE canonical_id = ?", (entry.id,))
+            return entry
+
+    def _update(self, entry: CanonicalStep, tenant: str, **fields) -> None:
+        facts = entry.facts(tenant)
+        changed = {k: v for k, v in fields.items() if v is not None and getattr(facts, k) != v}
+        if not changed:
+            return
+        for k, v in changed.items():
+            setattr(facts, k, v)
+        columns = ", ".join(changed)
+        self._conn().execute(
+            f"INSERT INTO tenant_steps (canonical_id, tenant, {columns}, updated) "
+            f"VALUES (?, ?, {', '.join('?' * len(changed))}, ?) "
+            f"ON CONFLICT (canonical_id, tenant) DO UPDATE SET "
+            + ", ".join(f"{k} = excluded.{k}" for k in (*changed, "updated")),
+            (entry.id, tenant, *changed.values(), time.time()),
+        )
+
+    def learn_roles(self, tenant: str, process_map: list) -> None:
+        """
+        Records the role of each mined ProcessStep on its canonical step.
+        """
+        for p in process_map:
+            entry = self.add(p.step)
+            if entry is not None:
+                with self._lock:
+                    self._update(entry, tenant, role=p.role or None)
+
+    def learn_benchmarks(
+        self, tenant: str, sector: str, benchmarks: list, issues: list = (), idp_version: Optional[str] = None
+    ) -> None:
+        """
+        Records the sector's IDP suggestion and priority (and the issue
+        that led to it) on the canonical step of each Benchmark.
+        Args:
+          idp_version: Version of the sector IDP index the benchmarks were
+            made against (see IDPStore.version).
+        """
+        issue_by_key = {step_key(i.step): i for i in issues}
+        for b in benchmarks:
+            entry = self.add(b.step)
+            if entry is None or not b.idp_suggestion:
+                continue
+            issue = issue_by_key.get(step_key(b.step))
+            with self._lock:
+                if issue is not None:
+                    self._update(entry, tenant, issue=issue.issue, impact=issue.impact)
+                benchmark = (b.idp_suggestion, b.priority, idp_version)
+                facts = entry.facts(tenant)
+                if facts.benchmarks.get(sector) != benchmark:
+                    facts.benchmarks[sector] = benchmark
+                    self._conn().execute(
+                        "INSERT INTO tenant_benchmarks VALUES (?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (canonical_id, tenant, sector) DO UPDATE SET "
+                        "idp_suggestion = excluded.idp_suggestion, priority = excluded.priority, "
+                        "idp_version = excluded.idp_version, updated = excluded.updated",
+                        (entry.id, tenant, sector, *benchmark, time.time()),
+                    )
+
+    def learn_roi(self, tenant: str, items: list) -> None:
+        """
+        Records the task time of each ROICalculatorTool item on its canonical step.
+        """
+        for item in items:
+            entry = self.add(item["step"])
+            if entry is not None:
+                with self._lock:
+                    self._update(entry, tenant, time_per_task_min=item["time_per_task_min"])
+
+    def record_hits(self, matches: list) -> None:
+        ids = [m.canonical_id for m in matches if m is not None]
+        if ids:
+            with self._lock:
+                for i in ids:
+                    self._entries[i].hits += 1
+            self._conn().executemany("UPDATE canonical_steps SET hits = hits + 1 WHERE id = ?", [(i,) for i in ids])
+
+    def stats(self) -> dict:
+        self._load()
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "canonical_steps": len(self._entries),
+                "tenants": len({t for e in self._entries.values() for t in e.tenants}),
+                "matched": self.matched,
+                "unmatched": self.unmatched,
+                "similarity": self.similarity,
+            }
+
+
+# Shared library used by the pipelines
+step_library = StepLibrary()
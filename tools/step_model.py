@@ -0,0 +1,188 @@
+import hashlib
+import io
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from tools.storage import DATA_DIR, atomic_write_bytes
+from tools.step_extraction import extract_steps, step_key
+
+# —————————————————————————————
+# Persistent step-feature model
+# A TF-IDF vectorizer fitted once over the whole SOP corpus plus a
+# MiniBatchKMeans clusterer. New SOPs are vectorized with the frozen
+# vocabulary and assigned to existing clusters (optionally nudging the
+# centroids with `partial_fit`), so cluster IDs are stable across documents
+# and no per-call refit is needed. Step vectors are memoized by step text.
+# —————————————————————————————
+
+DEFAULT_MODEL_PATH = DATA_DIR / "models" / "step_model.joblib"
+DEFAULT_CLUSTERS = 8
+VECTOR_CACHE_SIZE = 50_000
+
+
+class StepFeatureModel:
+    def __init__(self, n_clusters: int = DEFAULT_CLUSTERS):
+        self.n_clusters = n_clusters
+        self.vectorizer = None
+        self.clusterer = None
+        self.path = None  # file the model was loaded from or saved to
+        self._vectors = OrderedDict()  # step digest -> 1 x V sparse row
+        self._lock = threading.Lock()
+
+    @property
+    def is_fitted(self) -> bool:
+        return self.clusterer is not None
+
+    def fit(self, corpus_steps: list) -> "StepFeatureModel":
+        """
+        Fits the vocabulary and clusters on the full SOP step corpus.
+        """
+        from sklearn.cluster import MiniBatchKMeans
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        steps = list(dict.fromkeys(corpus_steps))
+        self.vectorizer = TfidfVectorizer(ngram_range=(1, 2), sublinear_tf=True)
+        X = self.vectorizer.fit_transform(steps)
+        self.clusterer = MiniBatchKMeans(
+            n_clusters=min(self.n_clusters, len(steps)), random_state=42, n_init=3, batch_size=256
+        )
+        self.clusterer.fit(X)
+        self._vectors.clear()
+        return self
+
+    def transform(self, steps: list):
+        """
+        Returns a sparse TF-IDF matrix for `steps`, reusing cached rows.
+        """
+        import scipy.sparse as sp
+
+        rows, missing = [], []
+        with self._lock:
+            for i, step in enumerate(steps):
+                digest = hashlib.sha1(step_key(step).encode("utf-8")).hexdigest()
+                row = self._vectors.get(digest)
+                if row is not None:
+                    self._vectors.move_to_end(digest)
+                else:
+                    missing.append((i, digest))
+                rows.append(row)
+        if missing:
+            X_new = self.vectorizer.transform([steps[i] for i, _ in missing])
+            with self._lock:
+                for j, (i, digest) in enumerate(missing):
+                    rows[i] = X_new[j]
+                    self._vectors[digest] = X_new[j]
+                while len(self._vectors) > VECTOR_CACHE_SIZE:
+                    self._vectors.popitem(last=False)
+        return sp.vstack(rows, format="csr")
+
+    def predict(self, steps: list) -> list:
+        """
+        Assigns each step to an existing cluster; returns stable integer cluster IDs.
+        """
+        X = self.transform(steps)
+        with self._lock:  # partial_fit moves the centroids in place
+            labels = self.clusterer.predict(X)
+        return [int(label) for label in labels]
+
+    def partial_fit(self, steps: list, save: bool = True) -> None:
+        """
+        Incrementally updates the cluster centroids with a new SOP's steps.
+        The vocabulary stays frozen; terms unseen at fit time are ignored.
+        Args:
+          save: Write the updated model back to the file it came from, so the
+            update survives a restart.
+        """
+        X = self.transform(steps)
+        with self._lock:
+            self.clusterer.partial_fit(X)
+        if save and self.path is not None:
+            self.save(self.path)
+
+    def save(self, path: Optional[Path] = None) -> Path:
+        import joblib
+
+        path = Path(path or DEFAULT_MODEL_PATH)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            state = {"n_clusters": self.n_clusters, "vectorizer": self.vectorizer, "clusterer": self.clusterer}
+            buf = io.BytesIO()
+            joblib.dump(state, buf)
+            # Atomic: concurrent readers never load a half-written model
+            atomic_write_bytes(path, buf.getvalue())
+            self.path = path
+        return path
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> Optional["StepFeatureModel"]:
+        import joblib
+
+        path = Path(path or DEFAULT_MODEL_PATH)
+        if not path.exists():
+            return None
+        state = joblib.load(path)
+        model = cls(n_clusters=state["n_clusters"])
+        model.vectorizer = state["vectorizer"]
+        model.clusterer = state["clusterer"]
+        model.path = path
+        return model
+
+
+_shared_model = None
+_shared_mtime = None  # mtime of DEFAULT_MODEL_PATH when _shared_model was loaded
+_shared_lock = threading.Lock()
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return path.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+
+def get_step_model(reload: bool = False) -> Optional[StepFeatureModel]:
+    """
+    Returns the process-wide step model, loading it from disk on first use.
+    Returns None if no model has been fitted yet.
+    Args:
+      reload: Re-read the model if its file changed since it was loaded
+        (e.g. refitted with `python -m tools.step_model fit`).
+    """
+    global _shared_model, _shared_mtime
+    with _shared_lock:
+        if _shared_model is None or reload:
+            mtime = _mtime(DEFAULT_MODEL_PATH)
+            if _shared_model is None or mtime != _shared_mtime:
+                _shared_model = StepFeatureModel.load()
+                _shared_mtime = mtime
+        return _shared_model
+
+
+def corpus_steps(file_paths: list) -> list:
+    from tools.document_tools import LangChainParserTool
+
+    parser = LangChainParserTool()
+    steps = []
+    for file_path in file_paths:
+        steps.extend(extract_steps(parser.parse(file_path)["text"]))
+    return steps
+
+
+if __name__ == "__main__":
+    # python -m tools.step_model fit <sop files...>     (fit over the whole corpus)
+    # python -m tools.step_model update <sop files...>  (incremental centroid update)
+    command, files = sys.argv[1], sys.argv[2:]
+    steps = corpus_steps(files)
+    if command == "fit":
+        model = StepFeatureModel().fit(steps)
+    elif command == "update":
+        model = StepFeatureModel.load()
+        if model is None:
+            sys.exit("No step model found; run `fit` first.")
+        model.partial_fit(steps, save=False)
+    else:
+        sys.exit(f"Unknown command: {command}")
+    print(f"Saved step model ({len(steps)} steps, {model.clusterer.n_clusters} clusters) to {model.save()}")
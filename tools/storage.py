@@ -0,0 +1,36 @@
+import os
+import tempfile
+from pathlib import Path
+
+# —————————————————————————————
+# Local storage root for caches, indexes and persisted models.
+# Override with the BPA_DATA_DIR environment variable.
+# —————————————————————————————
+DATA_DIR = Path(os.environ.get("BPA_DATA_DIR", ".bpa"))
+
+
+def data_path(*parts: str) -> Path:
+    """
+    Returns a directory under the data root, creating it if needed.
+    """
+    path = DATA_DIR.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def atomic_write_bytes(path: Path, payload: bytes) -> None:
+    """
+    Writes `payload` to `path` via a temp file + rename so concurrent readers
+    never observe a partially written file. Each call gets its own temp file,
+    so concurrent writers of one path (threads or processes) never share one;
+    the last rename wins.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(payload)
+        os.replace(tmp, path)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
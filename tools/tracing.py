@@ -0,0 +1,242 @@
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+# —————————————————————————————
+# Lightweight tracing for pipeline runs
+# Every sub-agent call, pipeline stage and Tool.run is recorded as a span
+# with wall time, input/output sizes, LLM token counts and cache hits.
+# Spans are grouped per run (one SOP) and per batch, exported as JSONL and
+# rolled up into per-name summaries. Spans opened outside a run are dropped.
+# Export path: BPA_TRACE_PATH environment variable or Tracer(export_path=...).
+# —————————————————————————————
+
+_current_trace = ContextVar("bpa_trace", default=None)
+_current_span = ContextVar("bpa_span", default=None)
+_current_batch = ContextVar("bpa_batch", default=None)
+
+SUMMED_ATTRS = (
+    "input_bytes", "output_bytes", "prompt_tokens", "output_tokens",
+    "prompt_tokens_before", "prompt_tokens_after", "output_repaired", "output_retried",
+)
+
+
+class Span:
+    __slots__ = ("name", "kind", "span_id", "parent_id", "start", "end", "attrs")
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str], attrs: dict):
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start = time.perf_counter()
+        self.end = None
+        self.attrs = attrs
+
+    def set(self, **attrs) -> None:
+        self.attrs.update(attrs)
+
+    def incr(self, key: str, amount: int = 1) -> None:
+        self.attrs[key] = self.attrs.get(key, 0) + amount
+
+    @property
+    def duration_s(self) -> float:
+        return (self.end or time.perf_counter()) - self.start
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "kind": self.kind,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "duration_ms": round(self.duration_s * 1000, 3),
+            **self.attrs,
+        }
+
+
+class SpanCollector:
+    def __init__(self, trace_id: str, **attrs):
+        self.trace_id = trace_id
+        self.attrs = attrs
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> dict:
+        return summarize_spans(self.spans)
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+def summarize_spans(spans: list) -> dict:
+    """
+    Aggregates spans by (kind, name).
+    Returns:
+      { "<kind>:<name>": { "count", "total_ms", "p50_ms", "p95_ms", "max_ms",
+                           "input_bytes", "output_bytes", "prompt_tokens",
+                           "output_tokens", "prompt_tokens_before", "prompt_tokens_after",
+                           "output_repaired", "output_retried", "cache_hits", "cache_misses", "errors" } }
+    """
+    groups = {}
+    for span in spans:
+        groups.setdefault(f"{span.kind}:{span.name}", []).append(span)
+    summary = {}
+    for key, group in sorted(groups.items()):
+        durations = sorted(s.duration_s * 1000 for s in group)
+        entry = {
+            "count": len(group),
+            "total_ms": round(sum(durations), 3),
+            "p50_ms": round(_percentile(durations, 50), 3),
+            "p95_ms": round(_percentile(durations, 95), 3),
+            "max_ms": round(durations[-1], 3),
+        }
+        for attr in SUMMED_ATTRS + ("cache_hits", "cache_misses"):
+            entry[attr] = sum(s.attrs.get(attr, 0) for s in group)
+        entry["errors"] = sum(1 for s in group if "error" in s.attrs)
+        summary[key] = entry
+    return summary
+
+
+def payload_size(obj) -> int:
+    if isinstance(obj, (str, bytes)):
+        return len(obj)
+    try:
+        return len(json.dumps(obj, default=str))
+    except (TypeError, ValueError):
+        return len(str(obj))
+
+
+class Tracer:
+    def __init__(self, export_path: Optional[str] = None):
+        self.export_path = export_path or os.environ.get("BPA_TRACE_PATH")
+        self._export_lock = threading.Lock()
+
+    @contextmanager
+    def run(self, run_id: Optional[str] = None, **attrs):
+        """
+        Groups all spans opened inside the block into one run trace.
+        Nested calls reuse the enclosing run.
+        """
+        if _current_trace.get() is not None:
+            yield _current_trace.get()
+            return
+        batch = _current_batch.get()
+        trace = SpanCollector(run_id or uuid.uuid4().hex[:12], **attrs)
+        if batch is not None:
+            trace.attrs["batch_id"] = batch.trace_id
+        token = _current_trace.set(trace)
+        try:
+            with self.span("run", kind="run", **attrs):
+                yield trace
+        finally:
+            _current_trace.reset(token)
+            if batch is not None:
+                for span in trace.spans:
+                    batch.add(span)
+            self._export(trace)
+
+    @contextmanager
+    def batch(self, batch_id: Optional[str] = None, **attrs):
+        """
+        Collects the spans of every run started inside the block for a batch summary.
+        """
+        collector = SpanCollector(batch_id or uuid.uuid4().hex[:12], **attrs)
+        token = _current_batch.set(collector)
+        try:
+            yield collector
+        finally:
+            _current_batch.reset(token)
+
+    @contextmanager
+    def span(self, name: str, kind: str = "stage", **attrs):
+        trace = _current_trace.get()
+        if trace is None:
+            yield Span(name, kind, None, attrs)  # untraced: record nothing
+            return
+        parent = _current_span.get()
+        span = Span(name, kind, parent.span_id if parent else None, dict(attrs))
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as exc:
+            span.set(error=f"{type(exc).__name__}: {exc}")
+            raise
+        finally:
+            span.end = time.perf_counter()
+            _current_span.reset(token)
+            trace.add(span)
+
+    def _export(self, trace: SpanCollector) -> None:
+        if not self.export_path:
+            return
+        lines = [
+            json.dumps({"trace_id": trace.trace_id, **trace.attrs, **span.to_dict()}, default=str)
+            for span in trace.spans
+        ]
+        with self._export_lock, open(self.export_path, "a", encoding="utf-8") as fh:
+            fh.write("\n".join(lines) + "\n")
+
+
+# Shared tracer
+tracer = Tracer()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def record(**attrs) -> None:
+    """
+    Sets attributes on the innermost active span, if any.
+    """
+    span = _current_span.get()
+    if span is not None:
+        span.set(**attrs)
+
+
+def record_cache(hit: bool) -> None:
+    span = _current_span.get()
+    if span is not None:
+        span.incr("cache_hits" if hit else "cache_misses")
+
+
+def _traced_method(original, method_name: str):
+    @functools.wraps(original)
+    def wrapper(self, *args, **kwargs):
+        name = self.name if method_name == "run" else f"{self.name}.{method_name}"
+        with tracer.span(name, kind="tool") as span:
+            traced = _current_trace.get() is not None
+            if traced:
+                span.set(input_bytes=payload_size([args, kwargs]))
+            result = original(self, *args, **kwargs)
+            if traced:
+                span.set(output_bytes=payload_size(result))
+            return result
+
+    return wrapper
+
+
+def traced_tool(cls=None, methods=("run",)):
+    """
+    Class decorator recording a "tool" span around each of `methods`.
+    """
+    def decorate(cls):
+        for method_name in methods:
+            setattr(cls, method_name, _traced_method(getattr(cls, method_name), method_name))
+        return cls
+
+    return decorate(cls) if cls is not None else decorate